@@ -7,8 +7,15 @@ from pathlib import Path
 # 项目根目录
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# 数据目录（可通过环境变量指向其他位置，如基准测试生成的合成数据）
+ADMIN_DATA_DIR = Path(os.getenv("ADMIN_DATA_DIR", BASE_DIR / "admin_data"))
+USER_DATA_DIR = Path(os.getenv("USER_DATA_DIR", BASE_DIR / "user_data"))
+
 # 数据库配置
-DATABASE_URL = f"sqlite:///{BASE_DIR}/blog.db"
+DATABASE_URL = os.getenv("DATABASE_URL", f"sqlite:///{BASE_DIR}/blog.db")
+
+# 内容存储后端：json（admin_data/*.json 文件）或 sqlite（DATABASE_URL）
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "json")
 
 # 媒体文件路径
 MEDIA_ROOT = BASE_DIR / "frontend" / "media"
@@ -17,11 +24,48 @@ AUDIO_DIR = MEDIA_ROOT / "audio"
 VIDEOS_DIR = MEDIA_ROOT / "videos"
 
 # 上传文件配置
-MAX_UPLOAD_SIZE = 10 * 1024 * 1024  # 10MB
+MAX_UPLOAD_SIZE = int(os.getenv("MAX_UPLOAD_SIZE", 10 * 1024 * 1024))  # 单个文件上限 10MB，超出返回 413
+MAX_UPLOAD_FILES = 20  # 批量上传一次最多的文件数
+UPLOAD_PART_OVERHEAD = 64 * 1024  # 请求体上限中每个文件额外允许的 multipart 分隔符和表单头字节数
 ALLOWED_IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif"}
 ALLOWED_VIDEO_EXTENSIONS = {".mp4", ".webm", ".ogg"}
 ALLOWED_AUDIO_EXTENSIONS = {".mp3", ".wav", ".ogg"}
 
+# 图片编码进程池配置（可通过环境变量覆盖）
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", os.cpu_count() or 2))  # 编码进程数
+IMAGE_QUEUE_DEPTH = int(os.getenv("IMAGE_QUEUE_DEPTH", 40))  # 排队等待的最大任务数，超出返回 503
+
+# 文件读写线程池大小（阻塞的文件/数据库操作在线程池中执行，不占用事件循环）
+IO_WORKERS = int(os.getenv("IO_WORKERS", 8))
+
+# 读取接口预序列化响应体的内存缓存容量
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+
+# 多 worker 部署时读入其他进程聊天消息并推送的间隔（秒），0 表示不同步（单进程部署）
+# 聊天读取接口只访问内存缓冲区，其他进程的消息最多延迟一个间隔可见
+CHAT_SYNC_INTERVAL = float(os.getenv("CHAT_SYNC_INTERVAL", 0.5))
+
+# 上传图片的像素数上限（防止解压炸弹：很小的文件解码后占用大量内存），超出返回 413
+MAX_IMAGE_PIXELS = int(os.getenv("MAX_IMAGE_PIXELS", 50_000_000))
+# 上传图片保存的最大边长，更大的图片解码时直接缩小（JPEG 按 1/2、1/4、1/8 缩放解码）
+IMAGE_MAX_DIMENSION = int(os.getenv("IMAGE_MAX_DIMENSION", 2560))
+
+# 响应式图片：上传时预先生成的宽度版本（full 为原图）
+IMAGE_VARIANT_WIDTHS = {"thumb": 320, "card": 768}
+# 按需缩放（?w=）允许的宽度档位，请求宽度向上取整到最近的档位
+IMAGE_RESIZE_WIDTHS = [160, 320, 480, 768, 1024, 1280, 1600, 2048]
+# 按需缩放结果的磁盘缓存（超出容量时按最近最少使用淘汰）
+CACHE_DIR = Path(os.getenv("CACHE_DIR", BASE_DIR / "cache"))
+IMAGE_CACHE_DIR = CACHE_DIR / "images"
+IMAGE_CACHE_MAX_BYTES = int(os.getenv("IMAGE_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+# 图片垃圾回收：最近修改的图片在保留期内不回收（刚上传、尚未保存到内容中）；最近几个发布版本引用的图片保留以便回滚
+IMAGE_GC_GRACE_HOURS = float(os.getenv("IMAGE_GC_GRACE_HOURS", 24))
+IMAGE_GC_KEEP_VERSIONS = int(os.getenv("IMAGE_GC_KEEP_VERSIONS", 10))
+# 构建静态资源时是否把动画 GIF 额外转为静音 MP4（需要 ffmpeg）
+STATIC_IMAGE_MP4 = os.getenv("STATIC_IMAGE_MP4", "0") == "1"
+# 启动时是否构建静态资源；部署时已单独执行 python -m backend.services.static_assets 的可设为 0
+STATIC_BUILD_ON_STARTUP = os.getenv("STATIC_BUILD_ON_STARTUP", "1") == "1"
+
 # 应用配置
 APP_NAME = "weirdcore store"
 APP_DESCRIPTION = "个人博客网站"
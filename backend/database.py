@@ -1,16 +1,34 @@
 """
 数据库连接和会话管理
 """
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from .config import DATABASE_URL
 
+def make_engine(url: str):
+    """
+    创建 SQLite 引擎
+    每个连接启用 WAL（读写互不阻塞）、NORMAL 同步级别和忙等待
+    """
+    sqlite_engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False}  # SQLite需要此配置
+    )
+
+    @event.listens_for(sqlite_engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA busy_timeout=5000")
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+    return sqlite_engine
+
 # 创建数据库引擎
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False}  # SQLite需要此配置
-)
+engine = make_engine(DATABASE_URL)
 
 # 创建会话工厂
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -25,4 +43,3 @@ def get_db():
         yield db
     finally:
         db.close()
-
@@ -9,12 +9,16 @@ from pathlib import Path
 ROOT_DIR = Path(__file__).parent.parent
 sys.path.insert(0, str(ROOT_DIR))
 
-from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, Request, Depends
+from fastapi.responses import Response
 from fastapi.middleware.cors import CORSMiddleware
 import os
 
+from backend.services.static_assets import PrecompressedStaticFiles, html_response, OPTIMIZED_IMAGES_DIR
+from backend.utils.metrics import MetricsMiddleware, metrics
+from backend.utils.request_limits import RequestSizeLimitMiddleware
+from backend.config import MAX_UPLOAD_SIZE, MAX_UPLOAD_FILES, UPLOAD_PART_OVERHEAD
+
 # 创建FastAPI应用
 app = FastAPI(
     title="weirdcore store API",
@@ -31,66 +35,96 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# 挂载静态文件目录
-app.mount("/css", StaticFiles(directory="frontend/css"), name="css")
-app.mount("/js", StaticFiles(directory="frontend/js"), name="js")
-app.mount("/pages", StaticFiles(directory="frontend/pages"), name="pages")
-app.mount("/admin-static", StaticFiles(directory="frontend/admin"), name="admin-static")
-app.mount("/images", StaticFiles(directory="frontend/images"), name="images")
+# 上传请求体大小限制（接收时按实际字节数计算；单张上传为单个文件上限，批量上传为整批上限，均加上 multipart 余量）
+app.add_middleware(
+    RequestSizeLimitMiddleware,
+    limits={
+        "/api/upload/image": MAX_UPLOAD_SIZE + UPLOAD_PART_OVERHEAD,
+        "/api/upload/images": MAX_UPLOAD_FILES * (MAX_UPLOAD_SIZE + UPLOAD_PART_OVERHEAD),
+    }
+)
+
+# 请求指标（最外层，统计包括 CORS 在内的完整处理时间）
+app.add_middleware(MetricsMiddleware)
 
-# 挂载管理员数据目录（图片等资源）
-app.mount("/media/images", StaticFiles(directory="admin_data/images"), name="admin-images")
+# 挂载静态文件目录（支持预压缩；带 ?v=哈希 的请求长期缓存）
+app.mount("/css", PrecompressedStaticFiles(directory="frontend/css", url_prefix="/css", build_subdir="css"), name="css")
+app.mount("/js", PrecompressedStaticFiles(directory="frontend/js", url_prefix="/js", build_subdir="js"), name="js")
+app.mount("/pages", PrecompressedStaticFiles(directory="frontend/pages", url_prefix="/pages", build_subdir="html/pages", rewritten=True), name="pages")
+app.mount("/admin-static", PrecompressedStaticFiles(directory="frontend/admin", url_prefix="/admin-static", build_subdir="html/admin", rewritten=True), name="admin-static")
+# 构建时优化的图片（文件名含内容哈希），需要在 /images 之前挂载；目录由静态资源构建创建
+app.mount("/images/opt", PrecompressedStaticFiles(directory=str(OPTIMIZED_IMAGES_DIR), url_prefix="/images/opt", build_subdir="images-opt", check_dir=False), name="images-opt")
+app.mount("/images", PrecompressedStaticFiles(directory="frontend/images", url_prefix="/images", build_subdir="images"), name="images")
 
 # 根路由 - 返回首页
 @app.get("/")
-async def read_root():
-    return FileResponse("frontend/index.html")
+async def read_root(request: Request):
+    return html_response("index.html", request)
 
 # 页面路由
 @app.get("/research")
-async def research_page():
-    return FileResponse("frontend/pages/research.html")
+async def research_page(request: Request):
+    return html_response("pages/research.html", request)
 
 @app.get("/media")
-async def media_page():
-    return FileResponse("frontend/pages/media.html")
+async def media_page(request: Request):
+    return html_response("pages/media.html", request)
 
 @app.get("/activity")
-async def activity_page():
-    return FileResponse("frontend/pages/activity.html")
+async def activity_page(request: Request):
+    return html_response("pages/activity.html", request)
 
 @app.get("/shop")
-async def shop_page():
-    return FileResponse("frontend/pages/shop.html")
+async def shop_page(request: Request):
+    return html_response("pages/shop.html", request)
 
 @app.get("/chat")
-async def chat_page():
-    return FileResponse("frontend/pages/chat.html")
+async def chat_page(request: Request):
+    return html_response("pages/chat.html", request)
 
 # 管理员路由
 @app.get("/admin/login")
-async def admin_login_page():
-    return FileResponse("frontend/admin/login.html")
+async def admin_login_page(request: Request):
+    return html_response("admin/login.html", request)
 
 @app.get("/admin")
-async def admin_page():
-    return FileResponse("frontend/admin/index.html")
+async def admin_page(request: Request):
+    return html_response("admin/index.html", request)
 
 @app.get("/admin/content")
-async def admin_content_page():
-    return FileResponse("frontend/admin/content.html")
+async def admin_content_page(request: Request):
+    return html_response("admin/content.html", request)
 
 @app.get("/admin/announcement")
-async def admin_announcement_page():
-    return FileResponse("frontend/admin/announcement.html")
+async def admin_announcement_page(request: Request):
+    return html_response("admin/announcement.html", request)
 
-# 健康检查
+# 健康检查（附带内容缓存命中统计）
 @app.get("/api/health")
 async def health_check():
-    return {"status": "ok"}
+    from backend.utils.file_storage import get_cache_stats
+    return {"status": "ok", "content_cache": get_cache_stats()}
 
 # 导入API路由
-from backend.routers import auth, admin, public, upload, search, chat, draft, book, announcement
+from backend.routers import auth, admin, public, upload, search, chat, draft, book, announcement, media, bootstrap
+
+# 运行指标（Prometheus 文本格式，需要管理员 token）
+@app.get("/api/metrics")
+async def metrics_endpoint(admin_user: str = Depends(auth.get_current_admin)):
+    from backend.utils.file_storage import get_cache_stats
+    from backend.services.imaging import image_pool
+    from backend.services.chat_hub import chat_hub
+
+    cache_stats = get_cache_stats()
+    metrics.set_gauge('weirdcore_content_cache_hits', cache_stats['hits'], '内容缓存命中次数')
+    metrics.set_gauge('weirdcore_content_cache_misses', cache_stats['misses'], '内容缓存未命中次数')
+    for content_type, info in cache_stats['types'].items():
+        metrics.set_gauge('weirdcore_content_cache_posts', info['posts'], '缓存中的内容条数', type=content_type)
+    metrics.set_gauge('weirdcore_image_pool_in_flight', image_pool.in_flight, '图片编码进程池中处理和排队的任务数')
+    metrics.set_gauge('weirdcore_image_pool_capacity', image_pool.capacity, '图片编码进程池容量')
+    metrics.set_gauge('weirdcore_chat_subscribers', chat_hub.subscriber_count, '聊天推送连接数')
+
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4")
 
 # 认证路由
 app.include_router(auth.router, prefix="/api/auth", tags=["认证"])
@@ -104,6 +138,9 @@ app.include_router(public.router, prefix="/api/content", tags=["公开内容"])
 # 文件上传路由
 app.include_router(upload.router, prefix="/api/upload", tags=["文件上传"])
 
+# 上传图片访问路由（管理员数据目录，支持 ?w= 按需缩放）
+app.include_router(media.router, prefix="/media/images", tags=["媒体"])
+
 # 搜索路由
 app.include_router(search.router, prefix="/api", tags=["搜索"])
 
@@ -119,6 +156,9 @@ app.include_router(book.router, prefix="/api/book", tags=["书籍"])
 # 公告路由
 app.include_router(announcement.router, prefix="/api/announcement", tags=["公告"])
 
+# 首页启动数据路由
+app.include_router(bootstrap.router, prefix="/api/bootstrap", tags=["首页"])
+
 def convert_background_to_webp():
     """将背景图片转换为 WebP 格式"""
     from PIL import Image
@@ -183,21 +223,92 @@ def update_css_background_path(filename):
 
 def init_data_files():
     """初始化用户数据文件"""
-    import json
-    from pathlib import Path
-    
     # 只创建用户数据目录
-    user_dir = ROOT_DIR / "user_data"
-    user_dir.mkdir(exist_ok=True)
-    
-    # 创建聊天消息文件
-    chat_file = user_dir / "chat_messages.json"
-    if not chat_file.exists():
-        with open(chat_file, 'w', encoding='utf-8') as f:
-            json.dump({"messages": []}, f, ensure_ascii=False, indent=2)
-        print("✅ 用户数据文件初始化完成")
-    else:
-        print("✅ 用户数据已存在")
+    from backend.config import USER_DATA_DIR
+    USER_DATA_DIR.mkdir(parents=True, exist_ok=True)
+    print("✅ 用户数据目录已就绪")
+
+@app.on_event("startup")
+async def build_static_assets():
+    """
+    启动时构建静态资源（内容哈希、预压缩、改写 HTML 引用），在文件读写线程中执行
+    多个 worker 由文件锁串行化；部署时已单独构建的可用 STATIC_BUILD_ON_STARTUP=0 跳过
+    """
+    from backend.config import STATIC_BUILD_ON_STARTUP
+    from backend.services.static_assets import build_assets
+    from backend.utils.async_io import run_io
+    if not STATIC_BUILD_ON_STARTUP:
+        # 部署时单独构建；构建未执行时优化图片目录可能不存在
+        OPTIMIZED_IMAGES_DIR.mkdir(parents=True, exist_ok=True)
+        return
+    try:
+        await run_io(build_assets, verbose=True)
+    except OSError as e:
+        print(f"❌ 静态资源构建失败，使用未压缩的原始文件: {e}")
+
+@app.on_event("startup")
+async def recover_chat_log():
+    """启动时从聊天日志重建最近消息缓冲区（包括崩溃后的恢复）"""
+    from backend.services.chat_log import chat_log
+    from backend.services.chat_hub import chat_hub
+    from backend.utils.async_io import run_io
+    await run_io(chat_log.recover)
+    chat_hub.last_id = chat_log.last_id
+
+@app.on_event("startup")
+async def recover_publish():
+    """启动时完成崩溃前未完成的发布或回滚（正文按版本指针重新生成）"""
+    from backend.services.snapshots import recover
+    from backend.utils.async_io import run_io
+    recovered = await run_io(recover, ['research', 'media', 'activity', 'shop'])
+    if recovered:
+        print(f"已恢复未完成的发布: {', '.join(recovered)}")
+
+@app.on_event("startup")
+async def start_chat_sync():
+    """
+    后台同步其他 worker 进程写入的聊天消息并推送给本进程的订阅者
+    日志未变化时每次只检查文件大小；没有订阅者时只读入消息，不推送
+    """
+    import asyncio
+    from backend.config import CHAT_SYNC_INTERVAL
+    from backend.services.chat_log import chat_log, RING_SIZE
+    from backend.services.chat_hub import chat_hub
+    from backend.utils.async_io import run_io
+
+    if CHAT_SYNC_INTERVAL <= 0:
+        return
+
+    async def sync_loop():
+        while True:
+            await asyncio.sleep(CHAT_SYNC_INTERVAL)
+            try:
+                if await run_io(chat_log.sync) > chat_hub.last_id:
+                    for message in chat_log.since(chat_hub.last_id, RING_SIZE):
+                        chat_hub.publish(message)
+            except Exception as e:
+                print(f"聊天消息同步失败: {e}")
+
+    app.state.chat_sync_task = asyncio.create_task(sync_loop())
+
+@app.on_event("shutdown")
+async def stop_chat_sync():
+    """停止聊天消息同步任务"""
+    task = getattr(app.state, 'chat_sync_task', None)
+    if task is not None:
+        task.cancel()
+
+@app.on_event("shutdown")
+async def shutdown_image_pool():
+    """关闭图片编码进程池"""
+    from backend.services.imaging import image_pool
+    image_pool.shutdown()
+
+@app.on_event("shutdown")
+async def shutdown_io_pool():
+    """关闭文件读写线程池（等待进行中的写入完成）"""
+    from backend.utils.async_io import shutdown_io
+    shutdown_io()
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,72 @@
+"""
+内容存储迁移工具：在 JSON 文件（admin_data/{type}.json）和 SQLite 数据库之间复制全部内容
+
+用法：
+    python -m backend.migrate_storage --to sqlite     # JSON -> SQLite（DATABASE_URL）
+    python -m backend.migrate_storage --to json       # SQLite -> JSON（导出）
+    python -m backend.migrate_storage --to sqlite --database sqlite:////tmp/blog.db --admin-dir /tmp/admin_data
+
+目标中对应类型的内容会被整体替换；迁移完成后将 STORAGE_BACKEND 设为目标后端即可。
+源数据中 ID 重复的文章只保留最后一条（数据库中 ID 唯一），重复的 ID 在输出中列出。
+"""
+import argparse
+import sys
+from pathlib import Path
+
+from backend.services.search_index import CONTENT_TYPES
+from backend.utils import file_storage
+from backend.utils.file_storage import ContentStorage
+from backend.utils.sqlite_storage import SqliteContentStorage, dedupe_posts, use_engine
+
+
+def migrate(target: str, types=CONTENT_TYPES) -> dict:
+    """
+    迁移全部内容类型
+    :param target: 'sqlite'（从 JSON 导入）或 'json'（从 SQLite 导出）
+    :return: 每个类型迁移的条数和被去掉的重复 ID {'type': (条数, [重复ID])}
+    """
+    counts = {}
+    for content_type in types:
+        json_storage = ContentStorage(content_type)
+        sqlite_storage = SqliteContentStorage(content_type)
+        source, destination = (json_storage, sqlite_storage) if target == 'sqlite' else (sqlite_storage, json_storage)
+
+        posts, duplicates = dedupe_posts(source.get_all())
+        destination.replace_all({'posts': posts})
+
+        copied = destination.get_all()
+        if [p.get('id') for p in copied] != [p.get('id') for p in posts]:
+            raise RuntimeError(f"{content_type} 迁移后校验失败")
+        counts[content_type] = (len(posts), duplicates)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="内容存储迁移工具")
+    parser.add_argument('--to', choices=['sqlite', 'json'], required=True, help="目标存储后端")
+    parser.add_argument('--database', help="SQLite 数据库 URL（默认使用 DATABASE_URL）")
+    parser.add_argument('--admin-dir', type=Path, help="JSON 数据目录（默认 admin_data）")
+    args = parser.parse_args()
+
+    if args.database:
+        from backend.database import make_engine
+        use_engine(make_engine(args.database))
+    if args.admin_dir:
+        file_storage.ADMIN_DATA_DIR = args.admin_dir
+        args.admin_dir.mkdir(parents=True, exist_ok=True)
+
+    try:
+        counts = migrate(args.to)
+    except Exception as e:
+        print(f"❌ 迁移失败: {e}")
+        sys.exit(1)
+
+    for content_type, (count, duplicates) in counts.items():
+        print(f"  {content_type}: {count} 条")
+        if duplicates:
+            print(f"  ⚠️ {content_type} 中 {len(duplicates)} 个文章ID重复，保留最后一条: {', '.join(map(str, duplicates))}")
+    print(f"✅ 已迁移到 {args.to}，共 {sum(count for count, _ in counts.values())} 条内容")
+
+
+if __name__ == '__main__':
+    main()
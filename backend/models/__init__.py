@@ -1,7 +1,7 @@
 # Models package
-from .post import Post
+from .post import Post, ContentRevision
 
 __all__ = [
-    "Post"
+    "Post",
+    "ContentRevision"
 ]
-
@@ -1,15 +1,37 @@
-"""博客文章模型"""
-from sqlalchemy import Column, Integer, Text, DateTime
-from datetime import datetime
+"""内容模型（SQLite 存储后端使用）"""
+from sqlalchemy import Column, Integer, String, Text, BigInteger, Index, UniqueConstraint
 from ..database import Base
 
 
 class Post(Base):
+    """
+    单篇内容
+    常用字段单独成列用于索引和搜索，完整内容以 JSON 保存在 data 中（与 JSON 文件格式一致）
+    """
     __tablename__ = "posts"
 
-    id = Column(Integer, primary_key=True, index=True)
-    content = Column(Text, nullable=False)
-    images = Column(Text)  # JSON字符串存储图片列表
-    created_at = Column(DateTime, default=datetime.utcnow, index=True)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # 自增序号：保持插入顺序，同时作为全文索引的 rowid
+    seq = Column(Integer, primary_key=True, autoincrement=True)
+    id = Column(String(64), nullable=False)
+    type = Column(String(32), nullable=False)
+    status = Column(String(32), nullable=False, default="published")
+    title = Column(Text)
+    content = Column(Text)
+    # ISO 8601 字符串，与 JSON 存储中的排序方式一致
+    created_at = Column(String(40), nullable=False, default="")
+    updated_at = Column(String(40))
+    data = Column(Text, nullable=False)
 
+    __table_args__ = (
+        UniqueConstraint("type", "id", name="uq_posts_type_id"),
+        Index("ix_posts_type_status_created", "type", "status", "created_at", "id"),
+    )
+
+
+class ContentRevision(Base):
+    """每个内容类型的数据版本（每次写入递增，用于 ETag 和变更通知）"""
+    __tablename__ = "content_revisions"
+
+    type = Column(String(32), primary_key=True)
+    revision = Column(Integer, nullable=False, default=0)
+    updated_ns = Column(BigInteger, nullable=False, default=0)
@@ -1,29 +1,42 @@
 """
 管理员内容管理路由
 """
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Response
 from typing import List
 from backend.schemas.content import ContentCreate, ContentUpdate, ContentResponse
-from backend.utils.file_storage import ContentStorage
+from backend.utils.async_io import run_io
+from backend.utils.file_storage import get_content_storage
+from backend.utils.response_cache import response_cache, json_bytes_response
 from backend.routers.auth import get_current_admin
 
 router = APIRouter()
 
-@router.get("/{content_type}", response_model=List[ContentResponse])
+@router.get("/{content_type}", response_model=None, responses={200: {"model": List[ContentResponse]}})
 async def get_all_content(
     content_type: str,
+    response: Response,
     admin: str = Depends(get_current_admin)
 ):
     """
     获取指定类型的所有内容
+    按 ContentResponse 校验和裁剪字段后编码的响应体按内容签名缓存，内容未变化时不重新校验和序列化
     :param content_type: research, media, activity, shop
     """
     if content_type not in ['research', 'media', 'activity', 'shop']:
         raise HTTPException(status_code=400, detail="无效的内容类型")
     
-    storage = ContentStorage(content_type)
-    posts = storage.get_all()
-    return posts
+    storage = get_content_storage(content_type)
+    signature = await run_io(storage.get_signature)
+
+    def produce():
+        posts = [ContentResponse.model_validate(post).model_dump() for post in storage.get_all()]
+        return posts, {}
+
+    key = ('admin', content_type)
+    entry = response_cache.lookup(key, signature)
+    if entry is None:
+        entry = await run_io(response_cache.build, key, signature, produce)
+    return json_bytes_response(entry, response)
 
 @router.get("/{content_type}/{post_id}", response_model=ContentResponse)
 async def get_content_by_id(
@@ -37,8 +50,8 @@ async def get_content_by_id(
     if content_type not in ['research', 'media', 'activity', 'shop']:
         raise HTTPException(status_code=400, detail="无效的内容类型")
     
-    storage = ContentStorage(content_type)
-    post = storage.get_by_id(post_id)
+    storage = get_content_storage(content_type)
+    post = await run_io(storage.get_by_id, post_id)
     
     if not post:
         raise HTTPException(status_code=404, detail="内容不存在")
@@ -57,8 +70,8 @@ async def create_content(
     if content_type not in ['research', 'media', 'activity', 'shop']:
         raise HTTPException(status_code=400, detail="无效的内容类型")
     
-    storage = ContentStorage(content_type)
-    new_post = storage.create(content.dict())
+    storage = get_content_storage(content_type)
+    new_post = await run_io(storage.create, content.dict())
     return new_post
 
 @router.put("/{content_type}/{post_id}", response_model=ContentResponse)
@@ -74,8 +87,8 @@ async def update_content(
     if content_type not in ['research', 'media', 'activity', 'shop']:
         raise HTTPException(status_code=400, detail="无效的内容类型")
     
-    storage = ContentStorage(content_type)
-    updated_post = storage.update(post_id, content.dict())
+    storage = get_content_storage(content_type)
+    updated_post = await run_io(storage.update, post_id, content.dict())
     
     if not updated_post:
         raise HTTPException(status_code=404, detail="内容不存在")
@@ -94,8 +107,8 @@ async def delete_content(
     if content_type not in ['research', 'media', 'activity', 'shop']:
         raise HTTPException(status_code=400, detail="无效的内容类型")
     
-    storage = ContentStorage(content_type)
-    success = storage.delete(post_id)
+    storage = get_content_storage(content_type)
+    success = await run_io(storage.delete, post_id)
     
     if not success:
         raise HTTPException(status_code=404, detail="内容不存在")
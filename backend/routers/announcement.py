@@ -1,18 +1,19 @@
 """
 公告管理路由 - 支持富文本和图片
 """
-from fastapi import APIRouter, HTTPException, Depends
-from pathlib import Path
-import json
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
 from datetime import datetime
 from typing import List, Optional
 from pydantic import BaseModel
+from backend.config import ADMIN_DATA_DIR
 from backend.routers.auth import get_current_admin
+from backend.utils.async_io import run_io, read_json_file, write_json_file
+from backend.utils.http_cache import conditional_response, file_version
 
 router = APIRouter()
 
 # 公告文件路径
-ANNOUNCEMENT_FILE = Path(__file__).parent.parent.parent / "admin_data" / "announcement.json"
+ANNOUNCEMENT_FILE = ADMIN_DATA_DIR / "announcement.json"
 
 class AnnouncementItem(BaseModel):
     """公告项数据模型"""
@@ -24,65 +25,68 @@ class AnnouncementData(BaseModel):
     items: List[AnnouncementItem]
     status: str = "published"  # published 或 draft
 
+def default_announcement():
+    """默认公告（公告文件不存在或损坏时使用）"""
+    return {
+        "items": [{"type": "text", "content": "欢迎来到 weirdcore store！"}],
+        "status": "published",
+        "updated_at": datetime.now().isoformat()
+    }
+
 def load_announcement():
     """加载公告内容"""
-    if not ANNOUNCEMENT_FILE.exists():
-        return {
-            "items": [{"type": "text", "content": "欢迎来到 weirdcore store！"}],
-            "status": "published",
-            "updated_at": datetime.now().isoformat()
-        }
-    
     try:
-        with open(ANNOUNCEMENT_FILE, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            # 兼容旧格式
-            if "content" in data and "items" not in data:
-                return {
-                    "items": [{"type": "text", "content": data["content"]}],
-                    "status": "published",
-                    "updated_at": data.get("updated_at", datetime.now().isoformat())
-                }
-            return data
+        data = read_json_file(ANNOUNCEMENT_FILE)
     except:
+        return default_announcement()
+    if data is None:
+        return default_announcement()
+    # 兼容旧格式
+    if "content" in data and "items" not in data:
         return {
-            "items": [{"type": "text", "content": "欢迎来到 weirdcore store！"}],
+            "items": [{"type": "text", "content": data["content"]}],
             "status": "published",
-            "updated_at": datetime.now().isoformat()
+            "updated_at": data.get("updated_at", datetime.now().isoformat())
         }
+    return data
+
+def public_announcement(data: dict) -> dict:
+    """公开接口返回的公告（草稿状态不返回内容）"""
+    if data.get("status") == "draft":
+        return {
+            "items": [],
+            "status": "draft",
+            "updated_at": data.get("updated_at")
+        }
+    return data
 
 def save_announcement(items: List[dict], status: str = "published"):
     """保存公告内容"""
-    ANNOUNCEMENT_FILE.parent.mkdir(parents=True, exist_ok=True)
-    
     data = {
         "items": items,
         "status": status,
         "updated_at": datetime.now().isoformat()
     }
     
-    with open(ANNOUNCEMENT_FILE, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    write_json_file(ANNOUNCEMENT_FILE, data)
     
     return data
 
 @router.get("")
-async def get_announcement():
+async def get_announcement(request: Request, response: Response):
     """获取公告内容（公开接口，只返回已发布的）"""
-    data = load_announcement()
+    # 公告文件未变化时直接返回 304
+    not_modified = conditional_response(request, response, 'announcement', file_version(ANNOUNCEMENT_FILE))
+    if not_modified:
+        return not_modified
+    
     # 只有发布状态才返回内容
-    if data.get("status") == "draft":
-        return {
-            "items": [],
-            "status": "draft",
-            "updated_at": data.get("updated_at")
-        }
-    return data
+    return public_announcement(await run_io(load_announcement))
 
 @router.get("/admin")
 async def get_announcement_admin(admin: str = Depends(get_current_admin)):
     """获取公告内容（管理员接口，包括草稿）"""
-    return load_announcement()
+    return await run_io(load_announcement)
 
 @router.put("")
 async def update_announcement(
@@ -94,5 +98,5 @@ async def update_announcement(
         raise HTTPException(status_code=400, detail="公告内容不能为空")
     
     items = [item.dict() for item in data.items]
-    result = save_announcement(items, data.status)
+    result = await run_io(save_announcement, items, data.status)
     return {"success": True, "data": result}
@@ -1,47 +1,54 @@
 """
 书籍内容滚动路由
 """
-from fastapi import APIRouter, HTTPException
-from pathlib import Path
-import os
+from typing import Optional
+
+from fastapi import APIRouter, Query, Request, Response
+from backend.services.book_index import book_index
+from backend.utils.async_io import run_io
+from backend.utils.http_cache import conditional_response
 
 router = APIRouter()
 
-# 书籍文件夹路径
-BOOK_DIR = Path(__file__).parent.parent.parent / "admin_data" / "book"
+# 默认返回的行数 / 单次请求的最大行数
+DEFAULT_LINES = 100
+MAX_LINES = 1000
+
+def window_payload(start: Optional[int], lines: int) -> dict:
+    """读取一段书籍内容，返回接口格式（start 为 None 时从随机位置开始）"""
+    start, content_lines, total = book_index.window(start, lines)
 
-@router.get("/content")
-async def get_book_content():
-    """
-    获取书籍内容用于滚动显示
-    只返回前100行内容，避免页面卡顿
-    """
-    if not BOOK_DIR.exists():
-        return {"content": ""}
-    
-    content_lines = []
-    max_lines = 100  # 只读取前100行
-    
-    # 遍历 book 目录下的所有 txt 文件
-    for file_path in BOOK_DIR.glob("*.txt"):
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                for line in f:
-                    line = line.strip()
-                    if line:  # 只保留非空行
-                        content_lines.append(line)
-                        if len(content_lines) >= max_lines:
-                            break
-            
-            if len(content_lines) >= max_lines:
-                break
-                
-        except Exception as e:
-            print(f"读取文件 {file_path} 失败: {e}")
-            continue
-    
     # 返回合并后的内容，用空格连接
     return {
         "content": " ".join(content_lines) if content_lines else "",
-        "total_lines": len(content_lines)
+        "total_lines": len(content_lines),
+        "offset": start,
+        "next_offset": (start + len(content_lines)) % total if total else 0,
+        "book_lines": total
     }
+
+@router.get("/content")
+async def get_book_content(
+    request: Request,
+    response: Response,
+    offset: int = Query(0, ge=0, description="起始行号（只计非空行），超出总行数时从头开始"),
+    lines: int = Query(DEFAULT_LINES, ge=1, le=MAX_LINES, description="返回的行数"),
+    random: bool = Query(False, description="从随机位置开始")
+):
+    """
+    获取书籍内容用于滚动显示
+    默认返回前100行；通过 offset/lines 读取任意窗口，random=1 从随机位置开始。
+    返回的 next_offset 可用于继续读取下一段
+    """
+    if random:
+        # 随机窗口每次请求都不同，不缓存
+        response.headers['Cache-Control'] = 'no-store'
+        start = None
+    else:
+        # 书籍文件未变化时直接返回 304
+        not_modified = conditional_response(request, response, 'book', await run_io(book_index.version), offset, lines)
+        if not_modified:
+            return not_modified
+        start = offset
+
+    return await run_io(window_payload, start, lines)
@@ -0,0 +1,81 @@
+"""
+首页启动数据路由
+一次返回首页首屏需要的公告、书籍滚动文本和各内容类型最新的几篇，冷启动只需一次请求。
+响应体按输入版本（公告文件、书籍文件、各类型内容签名）预先序列化并缓存（utils/response_cache.py），任一输入变化时重新生成；
+ETag 由同样的版本计算，浏览器再次请求时未变化直接返回 304。
+"""
+import hashlib
+from datetime import date
+from typing import Tuple
+
+from fastapi import APIRouter, Request, Response
+from backend.routers.announcement import ANNOUNCEMENT_FILE, load_announcement, public_announcement
+from backend.routers.book import DEFAULT_LINES, window_payload
+from backend.routers.public import encode_cursor, normalize_post, parse_fields, project_post
+from backend.services.book_index import book_index
+from backend.utils.async_io import run_io
+from backend.utils.file_storage import get_content_storage
+from backend.utils.http_cache import conditional_response, file_version
+from backend.utils.response_cache import response_cache, json_bytes_response
+
+router = APIRouter()
+
+# 返回的内容类型
+CONTENT_TYPES = ['research', 'media', 'activity', 'shop']
+# 每个类型返回的最新条数（与内容页第一页一致，内容页可以直接使用）
+LATEST_POSTS = 20
+# 内容页列表卡片用到的字段
+LIST_FIELDS = parse_fields('id,title,content,images,created_at')
+
+
+def input_versions() -> Tuple:
+    """所有输入的版本（只读取文件状态和内容签名，不加载数据）；书籍起始位置每天变化一次"""
+    return (
+        file_version(ANNOUNCEMENT_FILE),
+        book_index.version(),
+        tuple(get_content_storage(t).get_signature() for t in CONTENT_TYPES),
+        date.today().isoformat(),
+    )
+
+
+def book_start(versions: Tuple) -> int:
+    """书籍滚动的起始行：由版本和日期决定（多个 worker 进程一致，ETag 稳定），每天换一个位置"""
+    total = book_index.total()
+    if total == 0:
+        return 0
+    digest = hashlib.sha1(repr((versions[1], versions[3])).encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') % total
+
+
+def build_payload(versions: Tuple) -> Tuple[dict, dict]:
+    """生成启动数据（响应数据, 附加响应头）；内容与 /api/content/{type} 一样先按 ContentResponse 校验"""
+    content = {}
+    for content_type in CONTENT_TYPES:
+        posts, next_key = get_content_storage(content_type).get_published_page(LATEST_POSTS)
+        content[content_type] = {
+            "posts": [project_post(normalize_post(post), LIST_FIELDS, False) for post in posts],
+            "next_cursor": encode_cursor(next_key) if next_key is not None else None
+        }
+    payload = {
+        "announcement": public_announcement(load_announcement()),
+        "book": window_payload(book_start(versions), DEFAULT_LINES),
+        "content": content
+    }
+    return payload, {}
+
+
+@router.get("")
+async def get_bootstrap(request: Request, response: Response):
+    """
+    首页启动数据：公告、书籍滚动文本（与 /api/book/content 格式相同，可用 next_offset 继续读取）、
+    各类型最新的已发布内容（posts 与 next_cursor，可用 /api/content/{type}?cursor= 继续加载）
+    """
+    versions = await run_io(input_versions)
+    not_modified = conditional_response(request, response, 'bootstrap', versions)
+    if not_modified:
+        return not_modified
+
+    entry = response_cache.lookup(('bootstrap',), versions)
+    if entry is None:
+        entry = await run_io(response_cache.build, ('bootstrap',), versions, lambda: build_payload(versions))
+    return json_bytes_response(entry, response)
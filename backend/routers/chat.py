@@ -1,18 +1,24 @@
 """
 聊天消息路由
 """
-from fastapi import APIRouter, HTTPException
-from typing import List, Dict, Any
-from pathlib import Path
-import json
+from fastapi import APIRouter, HTTPException, Query, Request, Response, Header
+from fastapi.responses import StreamingResponse
+from typing import List, Dict, Any, Optional
 from datetime import datetime
 from pydantic import BaseModel
+import asyncio
+import json
+from backend.services.chat_log import chat_log
+from backend.services.chat_hub import chat_hub
+from backend.utils.http_cache import conditional_response
 
 router = APIRouter()
 
-# 聊天消息文件路径
-USER_DATA_DIR = Path(__file__).parent.parent.parent / "user_data"
-CHAT_FILE = USER_DATA_DIR / "chat_messages.json"
+# 接口返回的最近消息数
+HISTORY_LIMIT = 100
+
+# SSE 心跳间隔（秒），防止代理断开空闲连接
+KEEPALIVE_INTERVAL = 15
 
 class ChatMessage(BaseModel):
     """聊天消息模型"""
@@ -25,41 +31,91 @@ class ChatResponse(BaseModel):
     messages: List[Dict[str, Any]]
 
 def read_messages() -> List[Dict[str, Any]]:
-    """读取聊天消息"""
-    if not CHAT_FILE.exists():
-        return []
-    
-    with open(CHAT_FILE, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-        return data.get('messages', [])
+    """读取最近的聊天消息（来自内存缓冲区）"""
+    return chat_log.recent(HISTORY_LIMIT)
 
-def write_messages(messages: List[Dict[str, Any]]):
-    """写入聊天消息"""
-    USER_DATA_DIR.mkdir(exist_ok=True)
-    
-    with open(CHAT_FILE, 'w', encoding='utf-8') as f:
-        json.dump({'messages': messages}, f, ensure_ascii=False, indent=2)
+def format_event(message: Dict[str, Any]) -> str:
+    """格式化为 SSE 事件"""
+    data = json.dumps(message, ensure_ascii=False)
+    return f"id: {message['id']}\nevent: message\ndata: {data}\n\n"
 
 @router.get("/messages", response_model=ChatResponse)
-async def get_messages():
+async def get_messages(
+    request: Request,
+    response: Response,
+    after: Optional[int] = Query(None, ge=0)
+):
     """
-    获取所有聊天消息
+    获取聊天消息
+    :param after: 只返回ID大于该值的消息（轮询增量获取）
     """
+    # 没有新消息时直接返回 304
+    not_modified = conditional_response(request, response, 'chat', chat_log.last_id, after)
+    if not_modified:
+        return not_modified
+    
     try:
+        if after is not None:
+            return {"messages": chat_log.since(after, HISTORY_LIMIT)}
         messages = read_messages()
         return {"messages": messages}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"读取消息失败: {str(e)}")
 
+@router.get("/stream")
+async def stream_messages(
+    request: Request,
+    after: Optional[int] = Query(None, ge=0),
+    last_event_id: Optional[str] = Header(None)
+):
+    """
+    SSE 实时推送新消息
+    :param after: 先补发ID大于该值的消息；断线重连时使用 Last-Event-ID
+    """
+    if last_event_id and last_event_id.isdigit():
+        after = int(last_event_id)
+    if after is None:
+        after = chat_log.last_id
+
+    async def event_stream():
+        # 先订阅再补发，避免漏掉补发期间到达的消息
+        queue = chat_hub.subscribe()
+        last_sent = after
+        try:
+            for message in chat_log.since(after, HISTORY_LIMIT):
+                last_sent = message['id']
+                yield format_event(message)
+            
+            while True:
+                if await request.is_disconnected():
+                    break
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=KEEPALIVE_INTERVAL)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if message is None:
+                    # 消费过慢被广播中心断开，客户端会带 Last-Event-ID 重连
+                    break
+                if message['id'] <= last_sent:
+                    continue
+                last_sent = message['id']
+                yield format_event(message)
+        finally:
+            chat_hub.unsubscribe(queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.post("/messages")
 async def send_message(message: ChatMessage):
     """
     发送新消息
     """
     try:
-        # 读取现有消息
-        messages = read_messages()
-        
         # 添加时间戳
         new_message = {
             "user": message.user,
@@ -67,15 +123,12 @@ async def send_message(message: ChatMessage):
             "timestamp": message.timestamp or datetime.now().isoformat()
         }
         
-        # 添加到消息列表
-        messages.append(new_message)
-        
-        # 只保留最近100条消息
-        if len(messages) > 100:
-            messages = messages[-100:]
+        # 追加到日志（并发消息合并刷盘），返回带ID的消息
+        new_message = await chat_log.append(new_message)
         
-        # 写入文件
-        write_messages(messages)
+        # 推送给所有在线订阅者（连同其他 worker 进程写入、尚未推送的消息，按ID顺序）
+        for pending in chat_log.since(chat_hub.last_id, HISTORY_LIMIT):
+            chat_hub.publish(pending)
         
         return {"success": True, "message": new_message}
     except Exception as e:
@@ -1,27 +1,49 @@
 """
 草稿管理路由
 """
-from fastapi import APIRouter, HTTPException, Depends
-from typing import Optional, Dict, Any
-from pathlib import Path
-import json
+import re
+from fastapi import APIRouter, HTTPException, Depends, Query
+from typing import List, Dict, Any
+from pydantic import BaseModel, ValidationError
 from backend.routers.auth import get_current_admin
+from backend.schemas.content import ContentResponse
+from backend.services import snapshots
+from backend.services.draft_store import draft_store, DraftConflict, DRAFT_TYPES
+from backend.services.snapshots import snapshot_store, SnapshotNotFound
+from backend.utils.async_io import run_io
+from backend.utils.json_patch import JsonPatchTestFailed
 
 router = APIRouter()
 
-# 草稿目录路径
-ADMIN_DATA_DIR = Path(__file__).parent.parent.parent / "admin_data"
-DRAFTS_DIR = ADMIN_DATA_DIR / "drafts"
+class DraftPatch(BaseModel):
+    """草稿增量修改（RFC 6902 JSON Patch）"""
+    revision: int  # 补丁基于的草稿版本号
+    operations: List[Dict[str, Any]]
 
-def ensure_drafts_dir():
-    """确保草稿目录存在"""
-    DRAFTS_DIR.mkdir(parents=True, exist_ok=True)
-
-def get_draft_path(content_type: str) -> Path:
-    """获取草稿文件路径"""
-    if content_type not in ['research', 'media', 'activity', 'shop']:
+def check_content_type(content_type: str):
+    """检查内容类型"""
+    if content_type not in DRAFT_TYPES:
         raise HTTPException(status_code=400, detail="无效的内容类型")
-    return DRAFTS_DIR / f"{content_type}.json"
+
+def validate_posts(document: Dict[str, Any]):
+    """
+    发布前按 ContentResponse 校验每篇内容（写入时校验一次，读取接口直接返回缓存的编码结果）
+    格式错误时返回 400
+    """
+    for index, post in enumerate(document.get('posts', [])):
+        try:
+            ContentResponse.model_validate(post)
+        except ValidationError as e:
+            error = e.errors()[0]
+            field = '.'.join(str(part) for part in error['loc'])
+            raise HTTPException(status_code=400, detail=f"第 {index + 1} 篇内容格式错误（{field}）: {error['msg']}")
+
+def conflict_error(revision: int) -> HTTPException:
+    """草稿已被修改时返回的错误（附带当前版本号）"""
+    return HTTPException(
+        status_code=409,
+        detail={"message": "草稿已被修改，请重新加载", "revision": revision}
+    )
 
 @router.get("/{content_type}")
 async def get_draft(
@@ -29,17 +51,12 @@ async def get_draft(
     admin: str = Depends(get_current_admin)
 ):
     """
-    获取指定类型的草稿
+    获取指定类型的草稿（revision 为当前版本号，增量保存时作为基础版本）
     """
-    draft_path = get_draft_path(content_type)
-    
-    if not draft_path.exists():
-        return {"posts": []}
-    
+    check_content_type(content_type)
+
     try:
-        with open(draft_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            return data
+        return await run_io(draft_store.get, content_type)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"读取草稿失败: {str(e)}")
 
@@ -50,43 +67,113 @@ async def save_draft(
     admin: str = Depends(get_current_admin)
 ):
     """
-    保存草稿
+    保存草稿（整体替换）
+    """
+    check_content_type(content_type)
+
+    try:
+        revision = await run_io(draft_store.replace, content_type, draft_data)
+
+        return {"success": True, "message": "草稿保存成功", "revision": revision}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"保存草稿失败: {str(e)}")
+
+@router.patch("/{content_type}")
+async def patch_draft(
+    content_type: str,
+    patch: DraftPatch,
+    admin: str = Depends(get_current_admin)
+):
+    """
+    增量保存草稿
+    在 revision 版本上按顺序应用 operations，全部成功才写入；
+    revision 不是当前版本（或 test 操作失败）时返回 409 和当前版本号
     """
-    ensure_drafts_dir()
-    draft_path = get_draft_path(content_type)
-    
+    check_content_type(content_type)
+
     try:
-        with open(draft_path, 'w', encoding='utf-8') as f:
-            json.dump(draft_data, f, ensure_ascii=False, indent=2)
-        
-        return {"success": True, "message": "草稿保存成功"}
+        revision = await run_io(draft_store.patch, content_type, patch.revision, patch.operations)
+    except DraftConflict as e:
+        raise conflict_error(e.revision)
+    except JsonPatchTestFailed:
+        raise conflict_error(await run_io(draft_store.revision, content_type))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"无效的补丁: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"保存草稿失败: {str(e)}")
 
+    return {"success": True, "message": "草稿保存成功", "revision": revision}
+
 @router.post("/{content_type}/publish")
 async def publish_draft(
     content_type: str,
     admin: str = Depends(get_current_admin)
 ):
     """
-    发布草稿到正文（将草稿复制到正文）
+    发布草稿到正文
+    草稿先保存为快照版本，再原子替换正文并切换当前版本指针（version 为新版本号）
     """
-    draft_path = get_draft_path(content_type)
-    content_path = ADMIN_DATA_DIR / f"{content_type}.json"
-    
-    if not draft_path.exists():
+    check_content_type(content_type)
+
+    # 读取草稿
+    try:
+        draft_data = await run_io(draft_store.published_data, content_type)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"读取草稿失败: {str(e)}")
+    if draft_data is None:
         raise HTTPException(status_code=404, detail="草稿不存在")
-    
+    await run_io(validate_posts, draft_data)
+
     try:
-        # 读取草稿
-        with open(draft_path, 'r', encoding='utf-8') as f:
-            draft_data = json.load(f)
-        
-        # 写入正文
-        with open(content_path, 'w', encoding='utf-8') as f:
-            json.dump(draft_data, f, ensure_ascii=False, indent=2)
-        
-        return {"success": True, "message": "发布成功"}
+        # 写入快照和正文（通过内容存储刷新缓存并通知搜索索引）
+        info = await run_io(snapshots.publish, content_type, draft_data)
+
+        return {"success": True, "message": "发布成功", "version": info['version']}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"发布失败: {str(e)}")
 
+@router.get("/{content_type}/versions")
+async def list_versions(
+    content_type: str,
+    limit: int = Query(50, ge=1, le=500),
+    admin: str = Depends(get_current_admin)
+):
+    """
+    发布历史（最新的在前），current 为当前版本号
+    """
+    check_content_type(content_type)
+
+    try:
+        current = await run_io(snapshot_store.head, content_type)
+        versions = await run_io(snapshot_store.history, content_type, limit)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"读取发布历史失败: {str(e)}")
+
+    return {"current": current, "versions": versions}
+
+@router.post("/{content_type}/versions/{version}/rollback")
+async def rollback_version(
+    content_type: str,
+    version: str,
+    admin: str = Depends(get_current_admin)
+):
+    """
+    回滚到历史版本：正文恢复为该版本，草稿同时替换为该版本的内容
+    """
+    check_content_type(content_type)
+    if not re.fullmatch(r'[0-9a-f]{64}', version):
+        raise HTTPException(status_code=400, detail="无效的版本号")
+
+    try:
+        result = await run_io(snapshots.rollback, content_type, version)
+    except SnapshotNotFound:
+        raise HTTPException(status_code=404, detail="版本不存在")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"回滚失败: {str(e)}")
+
+    try:
+        revision = await run_io(draft_store.replace, content_type, result['document'])
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"正文已回滚，但更新草稿失败: {str(e)}")
+
+    return {"success": True, "message": "回滚成功", "version": version, "revision": revision}
@@ -0,0 +1,68 @@
+"""
+媒体图片路由
+提供上传图片的访问，支持 ?w= 按需缩放（结果写入磁盘缓存）
+"""
+from bisect import bisect_left
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import FileResponse
+from typing import Optional
+from backend.config import IMAGE_RESIZE_WIDTHS
+from backend.routers.upload import IMAGES_DIR, variant_filename
+from backend.services.imaging import image_pool, resize_file_to_webp, ImagePoolBusy
+from backend.services.image_cache import resize_cache
+from backend.utils.async_io import run_io
+
+router = APIRouter()
+
+# 上传图片文件名唯一且内容不变，可长期缓存
+IMAGE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+def snap_width(width: int) -> int:
+    """把请求宽度向上取整到允许的档位，限制缓存版本数量"""
+    i = bisect_left(IMAGE_RESIZE_WIDTHS, width)
+    return IMAGE_RESIZE_WIDTHS[min(i, len(IMAGE_RESIZE_WIDTHS) - 1)]
+
+def image_response(path) -> FileResponse:
+    return FileResponse(path, headers={"Cache-Control": IMAGE_CACHE_CONTROL})
+
+@router.api_route("/{filename}", methods=["GET", "HEAD"])
+async def get_image(filename: str, w: Optional[int] = Query(None, ge=1)):
+    """
+    获取图片
+    :param w: 目标宽度（像素），向上取整到允许的档位；原图更窄时直接返回原图
+    """
+    file_path = IMAGES_DIR / filename
+    
+    # 安全检查：只允许访问 images 目录下的文件
+    if file_path.parent.resolve() != IMAGES_DIR.resolve() or not file_path.is_file():
+        raise HTTPException(status_code=404, detail="图片不存在")
+    
+    if w is None:
+        return image_response(file_path)
+    
+    width = snap_width(w)
+    
+    # 上传时预先生成的版本
+    variant_path = IMAGES_DIR / variant_filename(filename, width)
+    if variant_path.is_file():
+        return image_response(variant_path)
+    
+    # 按需缩放缓存
+    cache_name = variant_filename(filename, width)
+    cached_path = resize_cache.get(cache_name)
+    if cached_path is not None:
+        return image_response(cached_path)
+    
+    try:
+        with image_pool.slots():
+            data = await image_pool.run(resize_file_to_webp, str(file_path), width)
+    except ImagePoolBusy:
+        # 繁忙时退回原图，不影响页面显示
+        return image_response(file_path)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"图片缩放失败: {str(e)}")
+    
+    if data is None:
+        # 原图不比目标宽度宽，缓存一份原图，下次无需再次解码
+        data = await run_io(file_path.read_bytes)
+    return image_response(await run_io(resize_cache.put, cache_name, data))
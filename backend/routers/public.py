@@ -1,26 +1,118 @@
 """
 公开API路由（无需认证）
 """
-from fastapi import APIRouter, HTTPException
-from typing import List
+import base64
+import json
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from typing import List, Optional, Tuple
 from backend.schemas.content import ContentResponse
-from backend.utils.file_storage import ContentStorage
+from backend.utils.async_io import run_io
+from backend.utils.file_storage import get_content_storage
+from backend.utils.http_cache import conditional_response
+from backend.utils.response_cache import response_cache, json_bytes_response
 
 router = APIRouter()
 
-@router.get("/{content_type}", response_model=List[ContentResponse])
-async def get_public_content(content_type: str):
+# 单页最大条数
+MAX_PAGE_SIZE = 100
+# 摘要模式下正文保留的字符数
+SUMMARY_LENGTH = 200
+# 可通过 fields 选择的字段
+CONTENT_FIELDS = set(ContentResponse.model_fields)
+
+
+def encode_cursor(key: Tuple[str, str]) -> str:
+    """把 (创建时间, ID) 编码为不透明的游标字符串"""
+    raw = json.dumps(list(key), ensure_ascii=False).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """解析游标，格式错误时返回 400"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        created_at, post_id = json.loads(raw)
+        if not isinstance(created_at, str) or not isinstance(post_id, str):
+            raise ValueError
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="无效的分页游标")
+    return created_at, post_id
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """解析 fields 参数（逗号分隔），始终包含 id"""
+    if not fields:
+        return None
+    selected = [f.strip() for f in fields.split(',') if f.strip()]
+    unknown = [f for f in selected if f not in CONTENT_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"未知字段: {', '.join(unknown)}")
+    if 'id' not in selected:
+        selected.insert(0, 'id')
+    return selected
+
+
+def normalize_post(post: dict) -> dict:
+    """按 ContentResponse 校验单篇内容：补齐默认值（如 author）并去掉模式外的字段"""
+    return ContentResponse.model_validate(post).model_dump()
+
+
+def project_post(post: dict, fields: Optional[List[str]], summary: bool) -> dict:
+    """按字段选择和摘要模式裁剪单篇内容"""
+    if fields is not None:
+        post = {f: post.get(f) for f in fields}
+    if summary and isinstance(post.get('content'), str):
+        content = post['content'].strip()
+        truncated = len(content) > SUMMARY_LENGTH
+        post = {**post, 'content': content[:SUMMARY_LENGTH] + ('…' if truncated else ''), 'truncated': truncated}
+    return post
+
+
+@router.get("/{content_type}", response_model=None, responses={200: {"model": List[ContentResponse]}})
+async def get_public_content(
+    content_type: str,
+    request: Request,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="每页条数，不传时返回全部"),
+    cursor: Optional[str] = Query(None, description="上一页响应头 X-Next-Cursor 的值"),
+    fields: Optional[str] = Query(None, description="只返回指定字段（逗号分隔）"),
+    summary: bool = Query(False, description="正文只返回前200字的摘要")
+):
     """
-    获取公开发布的内容（只返回已发布的内容）
+    获取公开发布的内容（只返回已发布的内容，按创建时间倒序）
+    传入 limit 或 cursor 时分页返回，下一页游标在响应头 X-Next-Cursor 中（没有更多内容时不返回）
+    按 ContentResponse 校验和裁剪字段后编码的响应体按内容签名和参数缓存，内容未变化时不重新校验和序列化
     """
     if content_type not in ['research', 'media', 'activity', 'shop']:
         raise HTTPException(status_code=400, detail="无效的内容类型")
-    
-    storage = ContentStorage(content_type)
-    all_posts = storage.get_all()
-    
-    # 只返回已发布的内容，按创建时间倒序
-    published_posts = [p for p in all_posts if p.get('status') == 'published']
-    published_posts.sort(key=lambda x: x.get('created_at', ''), reverse=True)
-    
-    return published_posts
+
+    after = decode_cursor(cursor) if cursor else None
+    selected = parse_fields(fields)
+    storage = get_content_storage(content_type)
+
+    # 内容未变化时直接返回 304
+    signature = await run_io(storage.get_signature)
+    not_modified = conditional_response(request, response, 'content', content_type, signature,
+                                        limit, cursor, selected, summary)
+    if not_modified:
+        return not_modified
+
+    def produce():
+        headers = {}
+        if limit is None and after is None:
+            # 已发布内容在缓存中预先筛选并按创建时间倒序排列
+            posts = storage.get_published()
+        else:
+            posts, next_key = storage.get_published_page(limit or MAX_PAGE_SIZE, after)
+            if next_key is not None:
+                headers['X-Next-Cursor'] = encode_cursor(next_key)
+        posts = [normalize_post(post) for post in posts]
+        if selected is not None or summary:
+            posts = [project_post(post, selected, summary) for post in posts]
+        return posts, headers
+
+    key = ('content', content_type, limit, cursor, tuple(selected) if selected else None, summary)
+    entry = response_cache.lookup(key, signature)
+    if entry is None:
+        entry = await run_io(response_cache.build, key, signature, produce)
+    return json_bytes_response(entry, response)
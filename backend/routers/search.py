@@ -1,83 +1,57 @@
 """
-搜索路由 - 直接从 admin_data 读取并搜索
+搜索路由 - 搜索已发布内容（JSON 存储使用内存倒排索引，SQLite 存储使用 FTS5）
 """
-from fastapi import APIRouter, Query
-from typing import List, Dict, Any
-import json
-from pathlib import Path
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Query
+from backend.services.search_index import CONTENT_TYPES
+from backend.utils.async_io import run_io
+from backend.utils.file_storage import get_content_storage
 
 router = APIRouter()
 
-# admin_data 目录路径
-ADMIN_DATA_DIR = Path(__file__).parent.parent.parent / "admin_data"
+# 每个类型默认返回的条数 / 最大条数
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
 
-@router.get("/search")
-async def search_content(q: str = Query(..., min_length=1)):
-    """
-    全局搜索 - 搜索所有内容类型
-    :param q: 搜索关键词
-    """
-    keyword = q.lower()
+def search_all(q: str, content_types: List[str], limit: int, offset: int) -> dict:
+    """搜索指定的内容类型（阻塞操作，在文件读写线程池中执行）"""
     results = {
         'research': [],
         'media': [],
         'activity': [],
         'shop': [],
+        'counts': {},
         'total': 0
     }
-    
-    # 搜索所有类型
-    content_types = ['research', 'media', 'activity', 'shop']
-    
+
     for content_type in content_types:
-        file_path = ADMIN_DATA_DIR / f"{content_type}.json"
-        
-        if not file_path.exists():
-            continue
-        
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                posts = data.get('posts', [])
-                
-                # 过滤匹配的内容
-                for post in posts:
-                    # 只搜索已发布的内容
-                    if post.get('status') != 'published':
-                        continue
-                    
-                    title = (post.get('title') or '').lower()
-                    content = (post.get('content') or '').lower()
-                    
-                    # 模糊匹配
-                    if keyword in title or keyword in content:
-                        # 计算相关度
-                        relevance = 0
-                        if keyword in title:
-                            relevance += 10
-                        if keyword in content:
-                            relevance += 1
-                        
-                        # 添加类型和相关度
-                        post_with_meta = {
-                            **post,
-                            'type': content_type,
-                            'relevance': relevance
-                        }
-                        results[content_type].append(post_with_meta)
-        
+            total, items = get_content_storage(content_type).search(q, limit, offset)
         except Exception as e:
             print(f"搜索 {content_type} 失败: {e}")
             continue
-    
-    # 计算总数
-    results['total'] = sum(len(results[t]) for t in content_types)
-    
-    # 对每个类型的结果按相关度和时间排序
-    for content_type in content_types:
-        results[content_type].sort(
-            key=lambda x: (-x.get('relevance', 0), x.get('created_at', '')),
-            reverse=True
-        )
-    
+        results[content_type] = items
+        results['counts'][content_type] = total
+
+    # 总数为各类型的匹配数之和（不受 limit/offset 影响）
+    results['total'] = sum(results['counts'].values())
     return results
+
+@router.get("/search")
+async def search_content(
+    q: str = Query(..., min_length=1),
+    content_type: Optional[str] = Query(None, alias="type", description="只搜索指定类型"),
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT, description="每个类型返回的条数"),
+    offset: int = Query(0, ge=0, description="每个类型跳过的条数")
+):
+    """
+    全局搜索 - 搜索所有内容类型
+    每个类型按相关度、创建时间倒序返回第 offset 条起的 limit 条结果，
+    结果只包含标题和关键词附近的摘要（highlights 为摘要中匹配位置），counts 为各类型的匹配总数
+    :param q: 搜索关键词
+    """
+    if content_type is not None and content_type not in CONTENT_TYPES:
+        raise HTTPException(status_code=400, detail="无效的内容类型")
+
+    content_types = [content_type] if content_type else CONTENT_TYPES
+    return await run_io(search_all, q, content_types, limit, offset)
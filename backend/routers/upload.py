@@ -1,19 +1,26 @@
 """
 文件上传路由
 """
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Query
 from typing import List
+import asyncio
 import os
 import uuid
-from pathlib import Path
-from PIL import Image
-import io
+from backend.config import (
+    IMAGE_VARIANT_WIDTHS, ADMIN_DATA_DIR, IMAGE_GC_GRACE_HOURS,
+    MAX_UPLOAD_SIZE, MAX_UPLOAD_FILES
+)
 from backend.routers.auth import get_current_admin
+from backend.services.imaging import image_pool, encode_webp_variants, ImagePoolBusy, ImageTooLarge
+from backend.services.image_cache import resize_cache
+from backend.services.image_gc import image_collector
+from backend.services.image_manifest import image_manifest, content_hasher
+from backend.utils.async_io import run_io
+from backend.utils.metrics import metrics, timed_io
 
 router = APIRouter()
 
-# 管理员数据目录（统一存储所有管理员数据）
-ADMIN_DATA_DIR = Path(__file__).parent.parent.parent / "admin_data"
+# 图片目录（位于管理员数据目录下）
 IMAGES_DIR = ADMIN_DATA_DIR / "images"
 
 # 确保目录存在
@@ -22,8 +29,12 @@ IMAGES_DIR.mkdir(parents=True, exist_ok=True)
 # 允许的图片格式（输入）
 ALLOWED_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.webp', '.bmp', '.tiff'}
 
-# WebP 压缩质量（0-100，推荐85-95）
-WEBP_QUALITY = 90
+# 计算上传文件哈希时每次读取的字节数
+HASH_CHUNK_SIZE = 1024 * 1024
+
+class UploadTooLarge(Exception):
+    """上传文件超出 MAX_UPLOAD_SIZE"""
+    pass
 
 def get_file_extension(filename: str) -> str:
     """获取文件扩展名"""
@@ -33,51 +44,154 @@ def is_allowed_file(filename: str) -> bool:
     """检查文件类型是否允许"""
     return get_file_extension(filename) in ALLOWED_EXTENSIONS
 
-def convert_to_webp(image_data: bytes, original_filename: str) -> tuple:
+def variant_filename(filename: str, width: int) -> str:
+    """宽度版本的文件名，如 abc.webp -> abc-320w.webp"""
+    stem = os.path.splitext(filename)[0]
+    return f"{stem}-{width}w.webp"
+
+def pool_busy_error() -> HTTPException:
+    """编码进程池已满时返回的错误"""
+    return HTTPException(
+        status_code=503,
+        detail="图片处理繁忙，请稍后重试",
+        headers={"Retry-After": "5"}
+    )
+
+def too_large_error(filename: str) -> HTTPException:
+    """上传文件超出大小上限时返回的错误"""
+    return HTTPException(
+        status_code=413,
+        detail=f"文件过大: {filename}（单个文件上限 {MAX_UPLOAD_SIZE // 1024 // 1024}MB）"
+    )
+
+def hash_upload(source) -> tuple:
+    """
+    分块读取上传文件（Starlette 接收时已写入的临时文件，不再复制）计算 SHA-256（在文件读写线程中执行）
+    超出 MAX_UPLOAD_SIZE 时立即停止读取并抛出 UploadTooLarge
+    返回: (字节数, 哈希)
+    """
+    hasher = content_hasher()
+    size = 0
+    source.seek(0)
+    while True:
+        chunk = source.read(HASH_CHUNK_SIZE)
+        if not chunk:
+            break
+        size += len(chunk)
+        if size > MAX_UPLOAD_SIZE:
+            raise UploadTooLarge()
+        hasher.update(chunk)
+    return size, hasher.hexdigest()
+
+def read_upload(source) -> bytes:
+    """读取上传文件的全部内容（只用于需要编码的新图片，大小已由 hash_upload 检查）"""
+    source.seek(0)
+    return source.read()
+
+async def convert_to_webp(source, original_size: int, original_filename: str) -> dict:
     """
-    将图片转换为WebP格式
-    返回: (webp_data, new_filename)
+    将上传的文件转换为WebP格式，同时生成响应式宽度版本（在编码进程池中执行，调用方需先预占名额）
+    文件内容在预占名额后才读入内存，同时在内存中的上传文件数不超过进程池容量
+    像素数超出上限时返回 413
+    返回: 包含 webp_data、variants（宽度 -> 数据）、尺寸、文件名和压缩信息的字典
     """
     try:
-        # 打开图片
-        image = Image.open(io.BytesIO(image_data))
-        
-        # 如果是RGBA模式（PNG透明），保持透明度
-        if image.mode == 'RGBA':
-            pass
-        # 如果是调色板模式，转换为RGB
-        elif image.mode == 'P':
-            image = image.convert('RGBA')
-        # 其他模式转为RGB
-        elif image.mode not in ('RGB', 'RGBA'):
-            image = image.convert('RGB')
+        # 记录编码耗时和输入字节数
+        with timed_io('image_convert') as io:
+            io.bytes = original_size
+            image_data = await run_io(read_upload, source)
+            webp_data, variants, (width, height) = await image_pool.run(
+                encode_webp_variants, image_data, list(IMAGE_VARIANT_WIDTHS.values())
+            )
         
         # 生成新文件名（使用UUID + .webp）
         new_filename = f"{uuid.uuid4().hex}.webp"
         
-        # 转换为WebP
-        output = io.BytesIO()
-        image.save(
-            output, 
-            format='WEBP',
-            quality=WEBP_QUALITY,
-            method=6  # 压缩方法（0-6，6最慢但压缩最好）
-        )
-        webp_data = output.getvalue()
-        
-        # 获取原始和压缩后的大小
-        original_size = len(image_data)
+        # 压缩后的大小
         compressed_size = len(webp_data)
         compression_ratio = (1 - compressed_size / original_size) * 100
         
-        return webp_data, new_filename, original_size, compressed_size, compression_ratio
+        return {
+            "webp_data": webp_data,
+            "variants": variants,
+            "width": width,
+            "height": height,
+            "new_filename": new_filename,
+            "original_size": original_size,
+            "compressed_size": compressed_size,
+            "compression_ratio": compression_ratio
+        }
         
+    except ImageTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=400,
             detail=f"图片处理失败: {str(e)}"
         )
 
+def deduplicated_info(entry: dict, original_filename: str, original_size: int, digest: str) -> dict:
+    """已上传过的图片：直接返回已有文件的信息"""
+    metrics.inc('weirdcore_image_uploads_total', result='deduplicated')
+    info = {k: v for k, v in entry.items() if k != 'uploaded_at'}
+    return {
+        **info,
+        "original_filename": original_filename,
+        "original_size": original_size,
+        "deduplicated": True,
+        "sha256": digest
+    }
+
+def save_converted(converted: dict, original_filename: str, digest: str) -> dict:
+    """
+    保存原图和各宽度版本并记录到哈希清单，返回图片信息
+    variants 中缺少的版本（原图更窄）直接使用原图
+    """
+    new_filename = converted["new_filename"]
+    with open(IMAGES_DIR / new_filename, 'wb') as f:
+        f.write(converted["webp_data"])
+    
+    image_url = f"/media/images/{new_filename}"
+    variants = {}
+    srcset = []
+    for name, width in IMAGE_VARIANT_WIDTHS.items():
+        data = converted["variants"].get(width)
+        if data is None:
+            variants[name] = image_url
+            continue
+        filename = variant_filename(new_filename, width)
+        with open(IMAGES_DIR / filename, 'wb') as f:
+            f.write(data)
+        variants[name] = f"/media/images/{filename}"
+        srcset.append(f"{variants[name]} {width}w")
+    variants["full"] = image_url
+    srcset.append(f"{image_url} {converted['width']}w")
+    
+    info = {
+        "url": image_url,
+        "filename": new_filename,
+        "original_filename": original_filename,
+        "original_size": converted["original_size"],
+        "compressed_size": converted["compressed_size"],
+        "compression_ratio": f"{converted['compression_ratio']:.1f}%",
+        "format": "webp",
+        "width": converted["width"],
+        "height": converted["height"],
+        "variants": variants,
+        "srcset": ", ".join(srcset)
+    }
+    image_manifest.add(digest, info)
+    metrics.inc('weirdcore_image_uploads_total', result='encoded')
+    return {**info, "deduplicated": False, "sha256": digest}
+
+def delete_image_files(filename: str):
+    """删除原图、各宽度版本和按需缩放的缓存"""
+    (IMAGES_DIR / filename).unlink(missing_ok=True)
+    for width in IMAGE_VARIANT_WIDTHS.values():
+        (IMAGES_DIR / variant_filename(filename, width)).unlink(missing_ok=True)
+    resize_cache.remove_prefix(os.path.splitext(filename)[0])
+    image_manifest.remove_filename(filename)
+
 @router.post("/image")
 async def upload_image(
     file: UploadFile = File(...),
@@ -85,6 +199,7 @@ async def upload_image(
 ):
     """
     上传单张图片（自动转换为WebP）
+    同一张图片（内容哈希相同）已上传过时直接返回已有地址，deduplicated 为 true
     需要管理员权限
     """
     # 检查文件类型
@@ -94,32 +209,31 @@ async def upload_image(
             detail=f"不支持的文件类型。允许的类型: {', '.join(ALLOWED_EXTENSIONS)}"
         )
     
-    # 读取文件内容
-    content = await file.read()
-    
-    # 转换为WebP
-    webp_data, new_filename, original_size, compressed_size, compression_ratio = convert_to_webp(
-        content, 
-        file.filename
-    )
+    # 分块计算哈希（超出大小上限时返回 413）
+    try:
+        size, digest = await run_io(hash_upload, file.file)
+    except UploadTooLarge:
+        raise too_large_error(file.filename)
     
-    # 保存文件
-    file_path = IMAGES_DIR / new_filename
-    with open(file_path, 'wb') as f:
-        f.write(webp_data)
+    # 已上传过的图片跳过编码
+    existing = await run_io(image_manifest.lookup, digest)
+    if existing is not None:
+        return {
+            "success": True,
+            **deduplicated_info(existing, file.filename, size, digest)
+        }
     
-    # 返回图片 URL
-    image_url = f"/media/images/{new_filename}"
+    # 转换为WebP（进程池已满时返回 503）
+    try:
+        with image_pool.slots():
+            converted = await convert_to_webp(file.file, size, file.filename)
+    except ImagePoolBusy:
+        raise pool_busy_error()
     
+    # 保存文件并返回图片 URL（含响应式版本）
     return {
         "success": True,
-        "url": image_url,
-        "filename": new_filename,
-        "original_filename": file.filename,
-        "original_size": original_size,
-        "compressed_size": compressed_size,
-        "compression_ratio": f"{compression_ratio:.1f}%",
-        "format": "webp"
+        **(await run_io(save_converted, converted, file.filename, digest))
     }
 
 @router.post("/images")
@@ -129,57 +243,80 @@ async def upload_images(
 ):
     """
     批量上传图片（自动转换为WebP）
+    已上传过的图片和同一批中重复的图片不重新编码（deduplicated 为 true）
     需要管理员权限
     """
-    if len(files) > 20:
+    if len(files) > MAX_UPLOAD_FILES:
         raise HTTPException(
             status_code=400,
-            detail="一次最多上传 20 张图片"
+            detail=f"一次最多上传 {MAX_UPLOAD_FILES} 张图片"
         )
     
     uploaded_images = []
     errors = []
     
+    async def process(source, size: int, filename: str, digest: str) -> dict:
+        """处理单张新图片：编码、保存"""
+        # 转换为WebP
+        converted = await convert_to_webp(source, size, filename)
+        
+        # 保存文件
+        return await run_io(save_converted, converted, filename, digest)
+    
+    # 检查文件类型
+    valid_files = []
     for file in files:
+        if is_allowed_file(file.filename):
+            valid_files.append(file)
+        else:
+            errors.append({
+                "filename": file.filename,
+                "error": "不支持的文件类型"
+            })
+    
+    # 逐个分块计算哈希（超出大小上限的文件记为错误，不影响其他文件）
+    hashed = []
+    for file in valid_files:
         try:
-            # 检查文件类型
-            if not is_allowed_file(file.filename):
-                errors.append({
-                    "filename": file.filename,
-                    "error": "不支持的文件类型"
-                })
-                continue
-            
-            # 读取文件内容
-            content = await file.read()
-            
-            # 转换为WebP
-            webp_data, new_filename, original_size, compressed_size, compression_ratio = convert_to_webp(
-                content,
-                file.filename
-            )
-            
-            # 保存文件
-            file_path = IMAGES_DIR / new_filename
-            with open(file_path, 'wb') as f:
-                f.write(webp_data)
-            
-            # 添加到成功列表
-            uploaded_images.append({
-                "url": f"/media/images/{new_filename}",
-                "filename": new_filename,
-                "original_filename": file.filename,
-                "original_size": original_size,
-                "compressed_size": compressed_size,
-                "compression_ratio": f"{compression_ratio:.1f}%",
-                "format": "webp"
+            hashed.append((file, *(await run_io(hash_upload, file.file))))
+        except UploadTooLarge:
+            errors.append({
+                "filename": file.filename,
+                "error": too_large_error(file.filename).detail
             })
-            
-        except Exception as e:
+    
+    # 按哈希查找已上传的图片
+    found = await asyncio.gather(*(run_io(image_manifest.lookup, digest) for _, _, digest in hashed))
+    
+    # 需要编码的图片（同一批中内容相同的只编码一次）
+    pending = {}
+    for (file, size, digest), existing in zip(hashed, found):
+        if existing is None and digest not in pending:
+            pending[digest] = (file, size)
+    
+    # 一次性预占整批名额，并行编码（进程池已满时整批返回 503）
+    try:
+        with image_pool.slots(len(pending)):
+            results = await asyncio.gather(
+                *(process(file.file, size, file.filename, digest) for digest, (file, size) in pending.items()),
+                return_exceptions=True
+            )
+    except ImagePoolBusy:
+        raise pool_busy_error()
+    encoded = dict(zip(pending, results))
+    
+    for (file, size, digest), existing in zip(hashed, found):
+        result = encoded.get(digest) if existing is None else existing
+        if isinstance(result, Exception):
             errors.append({
                 "filename": file.filename,
-                "error": str(e)
+                "error": result.detail if isinstance(result, HTTPException) else str(result)
             })
+        elif existing is None and pending.pop(digest, None) is not None:
+            # 本批中第一次出现的图片
+            uploaded_images.append(result)
+        else:
+            uploaded_images.append(deduplicated_info(result, file.filename, size, digest))
     
     return {
         "success": len(uploaded_images) > 0,
@@ -187,7 +324,8 @@ async def upload_images(
         "errors": errors,
         "total": len(files),
         "success_count": len(uploaded_images),
-        "error_count": len(errors)
+        "error_count": len(errors),
+        "deduplicated_count": sum(1 for image in uploaded_images if image["deduplicated"])
     }
 
 @router.delete("/image/{filename}")
@@ -208,10 +346,36 @@ async def delete_image(
     if not str(file_path.resolve()).startswith(str(IMAGES_DIR.resolve())):
         raise HTTPException(status_code=403, detail="无效的文件路径")
     
-    # 删除文件
-    file_path.unlink()
+    # 删除文件及其宽度版本、缩放缓存
+    await run_io(delete_image_files, filename)
     
     return {
         "success": True,
         "message": "图片已删除"
-    }
\ No newline at end of file
+    }
+
+
+@router.get("/gc")
+async def list_orphan_images(
+    grace_hours: float = Query(IMAGE_GC_GRACE_HOURS, ge=0, description="最近修改的图片不计入"),
+    admin: str = Depends(get_current_admin)
+):
+    """
+    列出没有被正文、草稿、公告和最近发布版本引用的图片（不删除）
+    需要管理员权限
+    """
+    return await run_io(image_collector.collect, False, grace_hours)
+
+@router.post("/gc")
+async def collect_orphan_images(
+    grace_hours: float = Query(IMAGE_GC_GRACE_HOURS, ge=0, description="最近修改的图片不回收"),
+    admin: str = Depends(get_current_admin)
+):
+    """
+    删除孤立图片（含宽度版本和缩放缓存），返回释放的字节数
+    需要管理员权限
+    """
+    try:
+        return await run_io(image_collector.collect, True, grace_hours)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"图片回收失败: {str(e)}")
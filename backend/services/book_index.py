@@ -0,0 +1,166 @@
+"""
+书籍行索引
+为 admin_data/book 下的每个 txt 文件建立非空行的字节偏移索引，通过 mmap 按需读取任意窗口。
+文件变化（修改时间/大小）或目录变化时才重建索引，读取一个窗口的开销只与窗口大小有关。
+"""
+import mmap
+import os
+import random
+import threading
+from array import array
+from bisect import bisect_right
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from backend.config import ADMIN_DATA_DIR
+from backend.utils.http_cache import file_version
+
+# 书籍文件夹路径
+BOOK_DIR = ADMIN_DATA_DIR / "book"
+
+_BOM = b'\xef\xbb\xbf'
+
+
+class BookFile:
+    """单个书籍文件的行索引"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.version = file_version(path)
+        # 每个非空行的起止字节偏移（不含换行符）
+        self.starts = array('Q')
+        self.ends = array('Q')
+        self._file = None
+        self._mmap: Optional[mmap.mmap] = None
+        self._build()
+
+    def _build(self):
+        self._file = open(self.path, 'rb')
+        size = os.fstat(self._file.fileno()).st_size
+        if size == 0:
+            return
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        data = self._mmap
+        pos = len(_BOM) if data[:len(_BOM)] == _BOM else 0
+        while pos < size:
+            end = data.find(b'\n', pos)
+            if end == -1:
+                end = size
+            # 只记录去除空白后非空的行
+            if data[pos:end].strip():
+                self.starts.append(pos)
+                self.ends.append(end)
+            pos = end + 1
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def lines(self, start: int, count: int) -> List[str]:
+        """读取第 start 行起的 count 行"""
+        result = []
+        for i in range(start, min(start + count, len(self.starts))):
+            raw = self._mmap[self.starts[i]:self.ends[i]]
+            result.append(raw.decode('utf-8', errors='replace').strip())
+        return result
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+        if self._file is not None:
+            self._file.close()
+
+
+class BookIndex:
+    """目录下全部书籍文件的行索引（按文件名顺序拼接为连续的行号）"""
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self._files: List[BookFile] = []
+        # 每个文件第一行的全局行号
+        self._offsets: List[int] = []
+        self._total = 0
+        self._dir_version = None
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        """目录或文件变化时重建对应索引（未变化的文件直接复用）"""
+        dir_version = file_version(self.directory)
+        if dir_version is None:
+            self._replace([])
+            self._dir_version = None
+            return
+        unchanged = dir_version == self._dir_version and all(
+            file_version(f.path) == f.version for f in self._files
+        )
+        if unchanged:
+            return
+
+        existing = {f.path: f for f in self._files}
+        files = []
+        for path in sorted(self.directory.glob("*.txt")):
+            book = existing.get(path)
+            if book is None or file_version(path) != book.version:
+                try:
+                    book = BookFile(path)
+                except OSError as e:
+                    print(f"读取文件 {path} 失败: {e}")
+                    continue
+            files.append(book)
+        self._replace(files)
+        self._dir_version = dir_version
+
+    def _replace(self, files: List[BookFile]):
+        """替换索引并关闭不再使用的文件"""
+        for old in self._files:
+            if old not in files:
+                old.close()
+        self._files = files
+        self._offsets = []
+        total = 0
+        for book in files:
+            self._offsets.append(total)
+            total += len(book)
+        self._total = total
+
+    def version(self) -> Tuple:
+        """当前索引对应的文件版本（用于 ETag）"""
+        with self._lock:
+            self._refresh()
+            return tuple((f.path.name, f.version) for f in self._files)
+
+    def total(self) -> int:
+        """总行数（只计非空行）"""
+        with self._lock:
+            self._refresh()
+            return self._total
+
+    def window(self, offset: Optional[int], count: int) -> Tuple[int, List[str], int]:
+        """
+        读取从全局第 offset 行开始的 count 行（跨文件连续读取）
+        :param offset: 起始行号，None 表示随机位置；超出总行数时从头开始
+        :return: (实际起始行号, 行列表, 总行数)
+        """
+        with self._lock:
+            self._refresh()
+            total = self._total
+            if total == 0:
+                return 0, [], 0
+            if offset is None:
+                offset = random.randrange(total)
+            elif offset >= total:
+                offset = 0
+
+            lines: List[str] = []
+            i = bisect_right(self._offsets, offset) - 1
+            position = offset
+            while len(lines) < count and i < len(self._files):
+                book = self._files[i]
+                lines.extend(book.lines(position - self._offsets[i], count - len(lines)))
+                i += 1
+                if i < len(self._files):
+                    position = self._offsets[i]
+            return offset, lines, total
+
+
+# 全局书籍索引实例
+book_index = BookIndex(BOOK_DIR)
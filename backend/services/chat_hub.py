@@ -0,0 +1,53 @@
+"""
+聊天广播中心
+新消息推送给所有 SSE 订阅者，空闲时不产生任何文件读写
+多 worker 部署时其他进程写入的消息由后台同步任务读入后推送，按消息ID去重，保证每条消息只推送一次且按顺序
+"""
+import asyncio
+from typing import Dict, Any, Optional, Set
+
+# 每个订阅者的待发送队列长度，超出说明客户端消费过慢，会被断开（客户端重连后按游标补齐）
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+class ChatHub:
+    """进程内的消息广播中心"""
+
+    def __init__(self):
+        self._subscribers: Set[asyncio.Queue] = set()
+        # 已推送的最新消息ID
+        self.last_id = 0
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self) -> asyncio.Queue:
+        """订阅新消息"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        """取消订阅"""
+        self._subscribers.discard(queue)
+
+    def publish(self, message: Optional[Dict[str, Any]]):
+        """向所有订阅者广播一条消息（已推送过的消息ID跳过）"""
+        if message is not None:
+            if message['id'] <= self.last_id:
+                return
+            self.last_id = message['id']
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # 清空队列并放入 None，通知该订阅者断开
+                self._subscribers.discard(queue)
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+
+
+# 全局广播中心实例
+chat_hub = ChatHub()
@@ -0,0 +1,349 @@
+"""
+聊天消息日志
+消息以 NDJSON 追加写入分段日志文件，内存中保留最近消息的环形缓冲区用于读取。
+同一时间到达的多条消息合并为一次写入 + 一次 fsync（group commit）。
+多个 worker 进程共用同一份日志：写入时持有文件锁，先读入其他进程追加的消息再分配 ID，
+保证 ID 全局递增且不重复；同步时从上次读到的位置继续读取文件末尾的新消息。
+读取接口只访问内存缓冲区，不读文件、不等待写入刷盘或文件锁，可以直接在事件循环中调用；
+其他进程写入的消息由 sync()（后台同步任务，在文件读写线程池中执行）读入。
+"""
+import asyncio
+import json
+import os
+import threading
+from collections import deque
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+
+from backend.config import USER_DATA_DIR
+from backend.utils.async_io import run_io
+from backend.utils.file_lock import file_lock
+from backend.utils.metrics import timed_io
+
+# 分段日志目录
+CHAT_LOG_DIR = USER_DATA_DIR / "chat"
+# 旧版整文件存储（首次启动时导入）
+LEGACY_CHAT_FILE = USER_DATA_DIR / "chat_messages.json"
+
+# 内存中保留的最近消息数
+RING_SIZE = 500
+# 单个分段的最大消息数，写满后切换到新分段
+SEGMENT_MAX_MESSAGES = 1000
+# 保留的分段数量（旧分段在切换时删除）
+SEGMENTS_TO_KEEP = RING_SIZE // SEGMENT_MAX_MESSAGES + 2
+
+
+class ChatLog:
+    """追加写入的聊天日志"""
+
+    def __init__(self, directory: Path, ring_size: int = RING_SIZE,
+                 segment_max_messages: int = SEGMENT_MAX_MESSAGES):
+        self.directory = directory
+        self.segment_max_messages = segment_max_messages
+        self._recent: deque = deque(maxlen=ring_size)
+        self._last_id = 0
+        self._segment_no = 0
+        self._segment_count = 0
+        # 当前分段已读入的字节数（之后的内容由其他进程追加）
+        self._offset = 0
+        self._loaded = False
+        # 文件锁：串行化同步和写入（写入时会等待跨进程文件锁和 fsync）
+        self._lock = threading.Lock()
+        # 内存缓冲区锁：只在读写 _recent/_last_id 时短暂持有，读取接口只用这个锁
+        self._buffer_lock = threading.Lock()
+        # group commit：等待写入的 (消息, future) 列表
+        self._pending: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self._flush_task: Optional[asyncio.Task] = None
+
+    # ---------- 分段文件 ----------
+
+    def _segment_path(self, number: int) -> Path:
+        return self.directory / f"segment-{number:08d}.ndjson"
+
+    def _segment_numbers(self) -> List[int]:
+        """按顺序列出现有分段编号"""
+        numbers = []
+        for path in self.directory.glob("segment-*.ndjson"):
+            try:
+                numbers.append(int(path.stem.split('-')[1]))
+            except (IndexError, ValueError):
+                continue
+        return sorted(numbers)
+
+    def _fsync_dir(self):
+        """新建或删除分段后同步目录项"""
+        try:
+            fd = os.open(self.directory, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+    def _read_segment(self, number: int, repair: bool = False) -> List[Dict[str, Any]]:
+        """
+        读取一个分段
+        :param repair: 末尾存在未写完的行（崩溃导致）时截断文件
+        """
+        path = self._segment_path(number)
+        with timed_io('chat_read') as io:
+            with open(path, 'rb') as f:
+                raw = f.read()
+            io.bytes = len(raw)
+
+        messages = []
+        lines = raw.split(b'\n')
+        tail = lines.pop()
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                messages.append(json.loads(line))
+            except ValueError:
+                print(f"聊天日志 {path.name} 中存在损坏的行，已跳过")
+
+        if tail and repair:
+            print(f"聊天日志 {path.name} 末尾存在未写完的记录，已截断")
+            with open(path, 'r+b') as f:
+                f.truncate(len(raw) - len(tail))
+                os.fsync(f.fileno())
+        return messages
+
+    # ---------- 启动恢复 ----------
+
+    def recover(self):
+        """从日志重建内存缓冲区（启动时调用，崩溃后同样适用）"""
+        with self._lock, file_lock(self.directory):
+            self._recover_locked()
+
+    def _recover_locked(self):
+        """重建内存缓冲区（调用方持有进程内锁和文件锁）"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        numbers = self._segment_numbers()
+        if not numbers:
+            self._import_legacy()
+            numbers = self._segment_numbers()
+
+        self._segment_no = numbers[-1] if numbers else 1
+        self._segment_count = 0
+        self._offset = 0
+        if not numbers:
+            # 空日志也创建第一个分段，其他进程据此判断当前分段
+            self._segment_path(self._segment_no).touch()
+
+        # 从最新分段向前读取，直到填满缓冲区
+        collected: List[Dict[str, Any]] = []
+        for number in reversed(numbers):
+            messages = self._read_segment(number, repair=(number == numbers[-1]))
+            if number == numbers[-1]:
+                self._segment_count = len(messages)
+                self._offset = self._segment_path(number).stat().st_size
+            collected = messages + collected
+            if len(collected) >= self._recent.maxlen:
+                break
+
+        with self._buffer_lock:
+            self._recent.clear()
+            self._recent.extend(collected)
+            self._last_id = max((int(m.get('id', 0)) for m in collected), default=0)
+        self._loaded = True
+
+    def _import_legacy(self):
+        """把旧版 chat_messages.json 导入为第一个分段"""
+        if not LEGACY_CHAT_FILE.exists():
+            return
+        try:
+            with open(LEGACY_CHAT_FILE, 'r', encoding='utf-8') as f:
+                messages = json.load(f).get('messages', [])
+        except (OSError, ValueError) as e:
+            print(f"导入旧聊天记录失败: {e}")
+            return
+        if not messages:
+            return
+
+        with open(self._segment_path(1), 'w', encoding='utf-8') as f:
+            for i, message in enumerate(messages, start=1):
+                f.write(json.dumps({**message, 'id': i}, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        self._fsync_dir()
+        print(f"✅ 已导入 {len(messages)} 条旧聊天记录")
+
+    def _ensure_loaded(self):
+        """未加载时从日志重建（应用启动时已在线程池中完成，这里只用于脚本等直接使用的场景）"""
+        if not self._loaded:
+            self.recover()
+
+    # ---------- 多进程同步 ----------
+
+    def _sync_locked(self) -> int:
+        """
+        读入其他进程追加的消息（调用方持有进程内锁）
+        只读取完整的行，正在写入的半行留到下次读取
+        :return: 新读入的消息数
+        """
+        added = 0
+        while True:
+            path = self._segment_path(self._segment_no)
+            try:
+                size = path.stat().st_size
+            except FileNotFoundError:
+                size = None
+            if size is None:
+                # 当前分段已被其他进程删除（本进程落后太多），跳到之后最早的分段继续读取
+                later = [n for n in self._segment_numbers() if n > self._segment_no]
+                if not later:
+                    # 日志目录被清空，持有文件锁从日志重建
+                    with file_lock(self.directory):
+                        self._recover_locked()
+                    return added
+                self._segment_no = later[0]
+                self._segment_count = 0
+                self._offset = 0
+                continue
+            if size > self._offset:
+                with timed_io('chat_sync') as io:
+                    with open(path, 'rb') as f:
+                        f.seek(self._offset)
+                        raw = f.read(size - self._offset)
+                    io.bytes = len(raw)
+                end = raw.rfind(b'\n') + 1
+                last_id = self._last_id
+                new = []
+                for line in raw[:end].split(b'\n'):
+                    if not line.strip():
+                        continue
+                    try:
+                        message = json.loads(line)
+                    except ValueError:
+                        continue
+                    self._segment_count += 1
+                    if int(message.get('id', 0)) > last_id:
+                        new.append(message)
+                        last_id = int(message['id'])
+                if new:
+                    with self._buffer_lock:
+                        self._recent.extend(new)
+                        self._last_id = last_id
+                    added += len(new)
+                self._offset += end
+            # 其他进程写满当前分段后切换到了新分段
+            if not self._segment_path(self._segment_no + 1).exists():
+                return added
+            self._segment_no += 1
+            self._segment_count = 0
+            self._offset = 0
+
+    def sync(self) -> int:
+        """读入其他 worker 进程写入的新消息，返回最新消息ID"""
+        self._ensure_loaded()
+        with self._lock:
+            self._sync_locked()
+            return self._last_id
+
+    # ---------- 读写 ----------
+
+    def recent(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """获取最近的消息（来自内存缓冲区）"""
+        self._ensure_loaded()
+        with self._buffer_lock:
+            messages = list(self._recent)
+        return messages[-limit:] if len(messages) > limit else messages
+
+    def since(self, after_id: int, limit: int = 100) -> List[Dict[str, Any]]:
+        """获取ID大于 after_id 的消息（最多 limit 条，取最早的）"""
+        self._ensure_loaded()
+        with self._buffer_lock:
+            if self._last_id <= after_id:
+                return []
+            newer = []
+            for message in reversed(self._recent):
+                if int(message.get('id', 0)) <= after_id:
+                    break
+                newer.append(message)
+        newer.reverse()
+        return newer[:limit]
+
+    @property
+    def last_id(self) -> int:
+        """最新消息ID（其他进程写入的消息在 sync() 读入后计入）"""
+        self._ensure_loaded()
+        with self._buffer_lock:
+            return self._last_id
+
+    def _commit(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """分配ID并把一批消息写入当前分段（一次 fsync）"""
+        self._ensure_loaded()
+        with self._lock, file_lock(self.directory):
+            # 先读入其他进程已写入的消息，ID 接着全局最新的 ID 分配
+            # （_last_id 只在持有 _lock 时修改，这里不需要缓冲区锁）
+            self._sync_locked()
+            stored = [{**message, 'id': self._last_id + i} for i, message in enumerate(messages, start=1)]
+
+            with timed_io('chat_write') as io:
+                raw = ''.join(json.dumps(m, ensure_ascii=False) + '\n' for m in stored).encode('utf-8')
+                with open(self._segment_path(self._segment_no), 'ab') as f:
+                    f.write(raw)
+                    f.flush()
+                    os.fsync(f.fileno())
+                io.bytes = len(raw)
+
+            self._offset += len(raw)
+            with self._buffer_lock:
+                self._recent.extend(stored)
+                self._last_id = stored[-1]['id']
+            self._segment_count += len(stored)
+            if self._segment_count >= self.segment_max_messages:
+                self._roll_segment()
+            return stored
+
+    def _roll_segment(self):
+        """切换到新分段（立即创建，其他进程据此跟随切换），并删除超出保留数量的旧分段"""
+        self._segment_no += 1
+        self._segment_count = 0
+        self._offset = 0
+        self._segment_path(self._segment_no).touch()
+        for number in self._segment_numbers()[:-SEGMENTS_TO_KEEP]:
+            try:
+                self._segment_path(number).unlink()
+            except OSError:
+                pass
+        self._fsync_dir()
+
+    def append_sync(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        """同步追加一条消息"""
+        return self._commit([message])[0]
+
+    async def append(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        异步追加一条消息
+        并发到达的消息在同一次刷盘中提交
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((message, future))
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = loop.create_task(self._flush_pending())
+        return await future
+
+    async def _flush_pending(self):
+        """把等待中的消息批量写入；写入期间到达的消息进入下一批"""
+        while self._pending:
+            batch, self._pending = self._pending, []
+            try:
+                stored = await run_io(self._commit, [m for m, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future), message in zip(batch, stored):
+                if not future.done():
+                    future.set_result(message)
+
+
+# 全局聊天日志实例
+chat_log = ChatLog(CHAT_LOG_DIR)
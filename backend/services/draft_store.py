@@ -0,0 +1,125 @@
+"""
+草稿存储
+每个内容类型的草稿缓存在内存中，并带有递增的版本号（revision，随草稿一起保存在文件中）。
+自动保存通过 JSON Patch 只提交改动的部分：校验基础版本号 → 应用补丁 → 原子写入文件。
+修改期间持有文件锁，多个 worker 进程的缓存按文件版本（inode）失效，版本号在进程间保持递增。
+"""
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from backend.config import ADMIN_DATA_DIR
+from backend.utils.async_io import read_json_file, write_json_file
+from backend.utils.file_lock import file_lock
+from backend.utils.http_cache import file_version
+from backend.utils.json_patch import apply_patch
+
+# 草稿目录路径
+DRAFTS_DIR = ADMIN_DATA_DIR / "drafts"
+
+# 支持草稿的内容类型
+DRAFT_TYPES = ['research', 'media', 'activity', 'shop']
+
+
+class DraftConflict(Exception):
+    """基础版本号与当前版本不一致"""
+
+    def __init__(self, revision: int):
+        super().__init__(f"草稿版本冲突，当前版本: {revision}")
+        self.revision = revision
+
+
+class _DraftEntry:
+    """单个类型的草稿缓存"""
+
+    __slots__ = ('document', 'version')
+
+    def __init__(self, document: Dict[str, Any], version):
+        self.document = document
+        # 文件版本（修改时间/大小），文件被外部修改时重新加载
+        self.version = version
+
+
+class DraftStore:
+    """草稿的内存缓存和持久化"""
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self._entries: Dict[str, _DraftEntry] = {}
+        self._lock = threading.Lock()
+
+    def path(self, content_type: str) -> Path:
+        return self.directory / f"{content_type}.json"
+
+    def _load(self, content_type: str) -> Dict[str, Any]:
+        """获取缓存的草稿（调用方持有锁）"""
+        path = self.path(content_type)
+        version = file_version(path)
+        entry = self._entries.get(content_type)
+        if entry is None or entry.version != version:
+            document = read_json_file(path, {"posts": []})
+            if not isinstance(document, dict):
+                raise ValueError("草稿文件格式错误")
+            entry = _DraftEntry(document, version)
+            self._entries[content_type] = entry
+        return entry.document
+
+    def _save(self, content_type: str, document: Dict[str, Any]):
+        """原子写入草稿文件并刷新缓存（调用方持有锁）"""
+        path = self.path(content_type)
+        # 草稿只由程序读写，不缩进以减少写入量（json 的 C 编码器只在不缩进时启用）
+        write_json_file(path, document, indent=None)
+        self._entries[content_type] = _DraftEntry(document, file_version(path))
+
+    def get(self, content_type: str) -> Dict[str, Any]:
+        """获取草稿（包含 revision）"""
+        with self._lock:
+            document = self._load(content_type)
+        return {**document, "revision": revision_of(document)}
+
+    def revision(self, content_type: str) -> int:
+        """当前版本号"""
+        with self._lock:
+            return revision_of(self._load(content_type))
+
+    def replace(self, content_type: str, document: Dict[str, Any]) -> int:
+        """整体保存草稿，返回新版本号"""
+        with self._lock, file_lock(self.path(content_type)):
+            revision = revision_of(self._load(content_type)) + 1
+            self._save(content_type, {**document, "revision": revision})
+        return revision
+
+    def patch(self, content_type: str, base_revision: int, operations: List[Dict[str, Any]]) -> int:
+        """
+        在基础版本上应用 JSON Patch，返回新版本号
+        基础版本不是当前版本时抛出 DraftConflict；补丁无效时抛出 JsonPatchError（草稿不变）
+        """
+        with self._lock, file_lock(self.path(content_type)):
+            current = self._load(content_type)
+            revision = revision_of(current)
+            if base_revision != revision:
+                raise DraftConflict(revision)
+            document = apply_patch(current, operations)
+            if not isinstance(document, dict) or not isinstance(document.get("posts", []), list):
+                raise ValueError("草稿必须是包含 posts 数组的对象")
+            revision += 1
+            self._save(content_type, {**document, "revision": revision})
+        return revision
+
+    def published_data(self, content_type: str) -> Optional[Dict[str, Any]]:
+        """用于发布的草稿内容（去掉版本号），草稿不存在时返回 None"""
+        with self._lock:
+            if file_version(self.path(content_type)) is None:
+                return None
+            document = self._load(content_type)
+        return {k: v for k, v in document.items() if k != "revision"}
+
+
+def revision_of(document: Dict[str, Any]) -> int:
+    """草稿版本号（旧版草稿文件没有版本号，视为 0）"""
+    revision = document.get("revision", 0)
+    return revision if isinstance(revision, int) else 0
+
+
+# 全局草稿存储实例
+draft_store = DraftStore(DRAFTS_DIR)
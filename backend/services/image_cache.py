@@ -0,0 +1,89 @@
+"""
+按需缩放图片的磁盘缓存
+按文件修改时间近似最近使用时间（命中时刷新），超出容量时淘汰最久未使用的文件
+"""
+import os
+import threading
+from pathlib import Path
+from typing import Optional
+
+from backend.config import IMAGE_CACHE_DIR, IMAGE_CACHE_MAX_BYTES
+
+
+class DiskLRUCache:
+    """容量受限的磁盘 LRU 缓存"""
+
+    def __init__(self, directory: Path, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._total_bytes: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _scan_total(self) -> int:
+        """首次使用时统计缓存总大小"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        return sum(p.stat().st_size for p in self.directory.iterdir() if p.is_file())
+
+    def get(self, name: str) -> Optional[Path]:
+        """查找缓存文件，命中时刷新使用时间"""
+        path = self.directory / name
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put(self, name: str, data: bytes) -> Path:
+        """写入缓存（先写临时文件再改名，读者不会看到写了一半的文件）"""
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = self._scan_total()
+            path = self.directory / name
+            tmp_path = path.with_name(f".{name}.tmp")
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            try:
+                replaced = path.stat().st_size
+            except FileNotFoundError:
+                replaced = 0
+            os.replace(tmp_path, path)
+            self._total_bytes += len(data) - replaced
+            if self._total_bytes > self.max_bytes:
+                self._evict(keep=path)
+        return path
+
+    def _evict(self, keep: Path):
+        """淘汰最久未使用的文件，直到低于容量的 90%"""
+        entries = []
+        for p in self.directory.iterdir():
+            if p.is_file() and p != keep and not p.name.startswith('.'):
+                stat = p.stat()
+                entries.append((stat.st_mtime, stat.st_size, p))
+        entries.sort()
+        target = int(self.max_bytes * 0.9)
+        for _, size, p in entries:
+            if self._total_bytes <= target:
+                break
+            try:
+                p.unlink()
+                self._total_bytes -= size
+            except FileNotFoundError:
+                pass
+
+    def remove_prefix(self, prefix: str):
+        """删除某张原图的所有缓存版本"""
+        if not self.directory.exists():
+            return
+        with self._lock:
+            for p in self.directory.glob(f"{prefix}-*"):
+                try:
+                    size = p.stat().st_size
+                    p.unlink()
+                    if self._total_bytes is not None:
+                        self._total_bytes -= size
+                except FileNotFoundError:
+                    pass
+
+
+# 全局缩放缓存实例
+resize_cache = DiskLRUCache(IMAGE_CACHE_DIR, IMAGE_CACHE_MAX_BYTES)
@@ -0,0 +1,314 @@
+"""
+上传图片的引用索引和垃圾回收
+引用来源：正文内容（内容变更通知增量更新）、草稿和公告（文件版本变化时才重新提取）、最近几个发布快照。
+图片按文件名主干分组（原图、宽度版本等衍生文件），整组都没有被引用且超过保留期的才视为孤立图片。
+目录列表按目录修改时间缓存，没有增删文件时不重新扫描。
+
+用法：
+    python -m backend.services.image_gc              # 列出孤立图片
+    python -m backend.services.image_gc --delete     # 删除孤立图片
+    python -m backend.services.image_gc --delete --grace-hours 0
+"""
+import argparse
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Hashable, List, Optional, Set, Tuple
+
+from backend.config import ADMIN_DATA_DIR, IMAGE_GC_GRACE_HOURS, IMAGE_GC_KEEP_VERSIONS
+from backend.services.draft_store import draft_store, DRAFT_TYPES
+from backend.services.image_cache import resize_cache
+from backend.services.image_manifest import image_manifest
+from backend.services.search_index import CONTENT_TYPES
+from backend.services.snapshots import snapshot_store, SnapshotNotFound
+from backend.utils.async_io import read_json_file
+from backend.utils.file_storage import add_change_listener, get_content_storage
+from backend.utils.http_cache import file_version
+from backend.utils.metrics import timed_io
+
+# 图片目录和公告文件
+IMAGES_DIR = ADMIN_DATA_DIR / "images"
+ANNOUNCEMENT_FILE = ADMIN_DATA_DIR / "announcement.json"
+
+# 内容中的图片地址（/media/images/<文件名>，可能带 ?w= 等参数）
+_IMAGE_URL_RE = re.compile(r'/media/images/([A-Za-z0-9_.-]+)')
+# 衍生文件的后缀（宽度版本 abc-320w.webp）
+_VARIANT_SUFFIX_RE = re.compile(r'-\d+w$')
+
+
+def image_stem(filename: str) -> str:
+    """图片分组的主干：abc.webp、abc-320w.webp -> abc"""
+    return _VARIANT_SUFFIX_RE.sub('', os.path.splitext(filename)[0])
+
+
+def extract_refs(value: Any, refs: Optional[Set[str]] = None) -> Set[str]:
+    """提取文档中引用的图片主干（遍历所有字符串：images 字段、公告图片项、正文中的图片地址）"""
+    if refs is None:
+        refs = set()
+    if isinstance(value, str):
+        if '/media/images/' in value:
+            refs.update(image_stem(name) for name in _IMAGE_URL_RE.findall(value))
+    elif isinstance(value, dict):
+        for item in value.values():
+            extract_refs(item, refs)
+    elif isinstance(value, list):
+        for item in value:
+            extract_refs(item, refs)
+    return refs
+
+
+class ImageReferenceIndex:
+    """
+    图片引用计数：来源 -> 引用的图片主干，图片主干 -> 引用次数
+    来源：('post', 类型, id)、('draft', 类型)、('announcement',)、('snapshot', 类型, 版本)
+    """
+
+    def __init__(self):
+        self._sources: Dict[Hashable, Set[str]] = {}
+        self._counts: Dict[str, int] = {}
+        # 正文内容已同步到的版本号；草稿和公告已提取的文件版本
+        self._revisions: Dict[str, int] = {}
+        self._file_versions: Dict[Hashable, Any] = {}
+        self._lock = threading.RLock()
+
+    def _set_source(self, key: Hashable, refs: Set[str]):
+        """替换一个来源的引用（调用方持有锁）"""
+        old = self._sources.pop(key, set())
+        for stem in old - refs:
+            count = self._counts[stem] - 1
+            if count:
+                self._counts[stem] = count
+            else:
+                del self._counts[stem]
+        for stem in refs - old:
+            self._counts[stem] = self._counts.get(stem, 0) + 1
+        if refs:
+            self._sources[key] = refs
+
+    def _sync_posts(self, content_type: str, posts: List[Dict[str, Any]]):
+        """整体同步一个类型的正文内容（调用方持有锁）"""
+        seen = set()
+        for post in posts:
+            key = ('post', content_type, post.get('id'))
+            seen.add(key)
+            self._set_source(key, extract_refs(post))
+        stale = [key for key in self._sources if key[0] == 'post' and key[1] == content_type and key not in seen]
+        for key in stale:
+            self._set_source(key, set())
+
+    def on_content_change(self, content_type: str, revision: int, event: str, payload: Any):
+        """ContentStorage 变更回调：增量更新对应类型的引用"""
+        with self._lock:
+            if content_type not in self._revisions:
+                # 尚未建立索引的类型在下次回收时全量同步
+                return
+            if event == 'reload':
+                self._sync_posts(content_type, payload)
+            elif self._revisions[content_type] != revision - 1:
+                # 漏掉了中间版本，下次回收时按存储内容重新同步
+                return
+            elif event == 'upsert':
+                self._set_source(('post', content_type, payload.get('id')), extract_refs(payload))
+            elif event == 'delete':
+                self._set_source(('post', content_type, payload), set())
+            self._revisions[content_type] = revision
+
+    def refresh(self) -> List[str]:
+        """
+        使索引与当前数据一致，只重新提取有变化的来源
+        :return: 本次重新提取的来源（用于报告增量程度）
+        """
+        refreshed = []
+        with self._lock:
+            for content_type in CONTENT_TYPES:
+                storage = get_content_storage(content_type)
+                revision = storage.get_revision()
+                if self._revisions.get(content_type) != revision:
+                    self._sync_posts(content_type, storage.get_all())
+                    self._revisions[content_type] = revision
+                    refreshed.append(content_type)
+
+            for content_type in DRAFT_TYPES:
+                version = file_version(draft_store.path(content_type))
+                if self._refresh_file(('draft', content_type), version, lambda: draft_store.get(content_type)):
+                    refreshed.append(f"drafts/{content_type}")
+
+            version = file_version(ANNOUNCEMENT_FILE)
+            if self._refresh_file(('announcement',), version, lambda: read_json_file(ANNOUNCEMENT_FILE, {})):
+                refreshed.append('announcement')
+
+            refreshed.extend(self._refresh_snapshots())
+        return refreshed
+
+    def _refresh_file(self, key: Hashable, version: Any, load) -> bool:
+        """文件版本变化时重新提取引用（调用方持有锁）"""
+        if key in self._file_versions and self._file_versions[key] == version:
+            return False
+        self._set_source(key, extract_refs(load()))
+        self._file_versions[key] = version
+        return True
+
+    def _refresh_snapshots(self) -> List[str]:
+        """保留最近 IMAGE_GC_KEEP_VERSIONS 个发布版本引用的图片，保证可以回滚（快照不可变，按版本缓存）"""
+        keep = set()
+        for content_type in DRAFT_TYPES:
+            for entry in snapshot_store.history(content_type, IMAGE_GC_KEEP_VERSIONS):
+                keep.add((content_type, entry['version']))
+
+        wanted = {('snapshot', content_type, version) for content_type, version in keep}
+        cached = {key for key in self._file_versions if key[0] == 'snapshot'}
+        refreshed = []
+        for key in wanted - cached:
+            try:
+                document = snapshot_store.checkout(key[1], key[2])
+            except SnapshotNotFound:
+                document = {}
+            self._set_source(key, extract_refs(document))
+            self._file_versions[key] = key[2]
+            refreshed.append(f"snapshots/{key[2][:12]}")
+        for key in cached - wanted:
+            del self._file_versions[key]
+            self._set_source(key, set())
+        return refreshed
+
+    def is_referenced(self, stem: str) -> bool:
+        with self._lock:
+            return stem in self._counts
+
+    def referenced_count(self) -> int:
+        with self._lock:
+            return len(self._counts)
+
+
+class ImageDirectory:
+    """图片目录列表（按目录修改时间缓存，新增/删除文件时才重新扫描）"""
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self._version: Optional[int] = None
+        # 主干 -> [(文件名, 大小, 修改时间)]
+        self._groups: Dict[str, List[Tuple[str, int, float]]] = {}
+        self.scans = 0
+
+    def groups(self) -> Dict[str, List[Tuple[str, int, float]]]:
+        try:
+            version = self.directory.stat().st_mtime_ns
+        except FileNotFoundError:
+            return {}
+        if version != self._version:
+            groups: Dict[str, List[Tuple[str, int, float]]] = {}
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if entry.name.startswith('.') or not entry.is_file():
+                        continue
+                    stat = entry.stat()
+                    groups.setdefault(image_stem(entry.name), []).append((entry.name, stat.st_size, stat.st_mtime))
+            self._groups = groups
+            self._version = version
+            self.scans += 1
+        return self._groups
+
+    def touched(self, files: List[Tuple[str, int, float]]) -> float:
+        """整组文件最近的修改时间（重新读取，去重上传会刷新已有文件的修改时间）"""
+        latest = 0.0
+        for name, _, mtime in files:
+            try:
+                latest = max(latest, (self.directory / name).stat().st_mtime)
+            except FileNotFoundError:
+                latest = max(latest, mtime)
+        return latest
+
+
+class ImageCollector:
+    """孤立图片回收"""
+
+    def __init__(self, directory: Path):
+        self.index = ImageReferenceIndex()
+        self.listing = ImageDirectory(directory)
+        self._lock = threading.Lock()
+
+    def collect(self, delete: bool = False, grace_hours: float = IMAGE_GC_GRACE_HOURS) -> Dict[str, Any]:
+        """
+        查找（并可选删除）没有被引用、且最近 grace_hours 小时内没有修改的图片
+        :return: 孤立图片列表、字节数、实际回收的字节数等
+        """
+        with self._lock, timed_io('image_gc'):
+            refreshed = self.index.refresh()
+            groups = self.listing.groups()
+            cutoff = time.time() - grace_hours * 3600
+
+            orphans = []
+            recent = 0
+            for stem, files in groups.items():
+                if self.index.is_referenced(stem):
+                    continue
+                if self.listing.touched(files) > cutoff:
+                    recent += 1
+                    continue
+                orphans.append({
+                    "stem": stem,
+                    "files": sorted(name for name, _, _ in files),
+                    "bytes": sum(size for _, size, _ in files)
+                })
+            orphans.sort(key=lambda o: o["stem"])
+
+            reclaimed = 0
+            if delete:
+                for orphan in orphans:
+                    reclaimed += self._delete(orphan)
+
+        return {
+            "orphans": orphans,
+            "orphan_count": len(orphans),
+            "orphan_bytes": sum(o["bytes"] for o in orphans),
+            "deleted": delete,
+            "reclaimed_bytes": reclaimed,
+            "skipped_recent": recent,
+            "grace_hours": grace_hours,
+            "image_groups": len(groups),
+            "referenced": self.index.referenced_count(),
+            "refreshed_sources": refreshed,
+            "directory_scans": self.listing.scans
+        }
+
+    def _delete(self, orphan: Dict[str, Any]) -> int:
+        """删除一组图片文件、缩放缓存和哈希清单记录，返回释放的字节数"""
+        reclaimed = 0
+        for name in orphan["files"]:
+            path = self.listing.directory / name
+            try:
+                size = path.stat().st_size
+                path.unlink()
+                reclaimed += size
+            except FileNotFoundError:
+                pass
+            image_manifest.remove_filename(name)
+        resize_cache.remove_prefix(orphan["stem"])
+        return reclaimed
+
+
+# 全局回收器实例
+image_collector = ImageCollector(IMAGES_DIR)
+add_change_listener(image_collector.index.on_content_change)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="上传图片垃圾回收")
+    parser.add_argument('--delete', action='store_true', help="删除孤立图片（默认只列出）")
+    parser.add_argument('--grace-hours', type=float, default=IMAGE_GC_GRACE_HOURS,
+                        help=f"最近修改的图片不回收（默认 {IMAGE_GC_GRACE_HOURS} 小时）")
+    args = parser.parse_args()
+
+    result = image_collector.collect(delete=args.delete, grace_hours=args.grace_hours)
+    for orphan in result["orphans"]:
+        print(f"  {orphan['stem']}: {len(orphan['files'])} 个文件，{orphan['bytes']} 字节")
+    print(f"孤立图片 {result['orphan_count']} 组，共 {result['orphan_bytes']} 字节"
+          f"（保留期内跳过 {result['skipped_recent']} 组）")
+    if args.delete:
+        print(f"✅ 已删除，释放 {result['reclaimed_bytes']} 字节")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""
+上传图片的内容哈希清单
+记录 原始文件 SHA-256 -> 已保存图片信息，同一张图片再次上传时直接返回已有的地址，跳过 WebP 编码。
+清单保存在 admin_data/image_manifest.json（原子写入），缓存在内存中，文件被其他 worker 进程改写后重新加载；
+修改期间持有文件锁。
+"""
+import hashlib
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from backend.config import ADMIN_DATA_DIR
+from backend.utils.async_io import read_json_file, write_json_file
+from backend.utils.file_lock import file_lock
+from backend.utils.http_cache import file_version
+
+# 清单文件路径
+IMAGE_MANIFEST_PATH = ADMIN_DATA_DIR / "image_manifest.json"
+
+
+def content_hasher():
+    """原始上传内容的 SHA-256（上传时分块 update，hexdigest() 作为清单的键）"""
+    return hashlib.sha256()
+
+
+class ImageManifest:
+    """内容哈希 -> 图片信息（url、filename、尺寸、variants、srcset 等）"""
+
+    def __init__(self, path: Path, images_dir: Path):
+        self.path = path
+        self.images_dir = images_dir
+        self._entries: Optional[Dict[str, Dict[str, Any]]] = None
+        self._by_filename: Dict[str, str] = {}
+        self._version = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        """加载清单，文件未变化时使用缓存（调用方持有锁）"""
+        version = file_version(self.path)
+        if self._entries is None or version != self._version:
+            data = read_json_file(self.path, {})
+            self._version = version
+            self._entries = data.get('images', {}) if isinstance(data, dict) else {}
+            self._by_filename = {entry['filename']: digest for digest, entry in self._entries.items()}
+        return self._entries
+
+    def _save(self):
+        """原子写入清单（调用方持有进程内锁和文件锁）"""
+        write_json_file(self.path, {'images': self._entries}, indent=None, operation='image_manifest_save')
+        self._version = file_version(self.path)
+
+    def lookup(self, digest: str) -> Optional[Dict[str, Any]]:
+        """
+        查找已上传的图片，文件已被删除时移除记录并返回 None
+        """
+        with self._lock, file_lock(self.path):
+            entries = self._load()
+            entry = entries.get(digest)
+            if entry is None:
+                return None
+            try:
+                # 刷新修改时间，重新使用的图片不会被垃圾回收当作过期的孤立图片
+                os.utime(self.images_dir / entry['filename'])
+            except FileNotFoundError:
+                del entries[digest]
+                self._by_filename.pop(entry['filename'], None)
+                self._save()
+                return None
+            return entry
+
+    def add(self, digest: str, info: Dict[str, Any]):
+        """记录新保存的图片（不保存每次上传不同的原始文件名）"""
+        entry = {k: v for k, v in info.items() if k != 'original_filename'}
+        entry['uploaded_at'] = datetime.now().isoformat()
+        with self._lock, file_lock(self.path):
+            entries = self._load()
+            previous = entries.get(digest)
+            if previous is not None:
+                self._by_filename.pop(previous['filename'], None)
+            entries[digest] = entry
+            self._by_filename[entry['filename']] = digest
+            self._save()
+
+    def remove_filename(self, filename: str):
+        """图片被删除时移除对应记录"""
+        with self._lock, file_lock(self.path):
+            self._load()
+            digest = self._by_filename.pop(filename, None)
+            if digest is not None:
+                del self._entries[digest]
+                self._save()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._load())
+
+
+# 全局清单实例
+image_manifest = ImageManifest(IMAGE_MANIFEST_PATH, ADMIN_DATA_DIR / "images")
@@ -0,0 +1,176 @@
+"""
+图片编码服务
+WebP 编码在独立的进程池中执行，避免阻塞事件循环，批量上传可并行利用多核
+解码前只读取文件头检查像素数，超大图片在解码时直接缩小
+"""
+import asyncio
+import io
+import multiprocessing
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from typing import Optional, Dict, Tuple, Iterable
+
+from PIL import Image
+
+from backend.config import IMAGE_WORKERS, IMAGE_QUEUE_DEPTH, MAX_IMAGE_PIXELS, IMAGE_MAX_DIMENSION
+
+# WebP 压缩质量（0-100，推荐85-95）
+WEBP_QUALITY = 90
+
+
+def _normalize_mode(image: Image.Image) -> Image.Image:
+    """统一色彩模式"""
+    # 如果是RGBA模式（PNG透明），保持透明度
+    if image.mode == 'RGBA':
+        return image
+    # 如果是调色板模式，转换为RGB
+    if image.mode == 'P':
+        return image.convert('RGBA')
+    # 其他模式转为RGB
+    if image.mode not in ('RGB', 'RGBA'):
+        return image.convert('RGB')
+    return image
+
+
+def _save_webp(image: Image.Image, method: int = 6) -> bytes:
+    output = io.BytesIO()
+    image.save(
+        output,
+        format='WEBP',
+        quality=WEBP_QUALITY,
+        method=method  # 压缩方法（0-6，6最慢但压缩最好）
+    )
+    return output.getvalue()
+
+
+def _resize_to_width(image: Image.Image, width: int) -> Image.Image:
+    """等比缩放到指定宽度"""
+    height = max(1, round(image.height * width / image.width))
+    return image.resize((width, height), Image.LANCZOS)
+
+
+class ImageTooLarge(ValueError):
+    """图片像素数超出上限"""
+    pass
+
+
+def _open_bounded(image_data: bytes, max_dimension: int = IMAGE_MAX_DIMENSION) -> Image.Image:
+    """
+    打开上传的图片并解码为不超过最大边长的尺寸
+    只读取文件头检查像素数；JPEG 通过 draft() 直接以缩小的尺寸解码，其他格式解码后用 reduce 快速缩小
+    """
+    with warnings.catch_warnings():
+        # 像素数由下面的 MAX_IMAGE_PIXELS 检查，不使用 Pillow 自带的警告
+        warnings.simplefilter('ignore', Image.DecompressionBombWarning)
+        try:
+            image = Image.open(io.BytesIO(image_data))
+        except Image.DecompressionBombError as e:
+            raise ImageTooLarge(str(e))
+    width, height = image.size
+    if width * height > MAX_IMAGE_PIXELS:
+        image.close()
+        raise ImageTooLarge(f"图片像素过多（{width}x{height}），上限 {MAX_IMAGE_PIXELS // 1_000_000} 百万像素")
+    # JPEG 以不小于目标尺寸的 1/2、1/4、1/8 缩放直接解码（其他格式忽略）
+    image.draft(image.mode, (max_dimension, max_dimension))
+    # 其他格式完整解码后先用 reduce 按整数倍缩小，最后 LANCZOS 缩放到目标尺寸
+    image.thumbnail((max_dimension, max_dimension), Image.LANCZOS, reducing_gap=2.0)
+    return image
+
+
+def encode_webp_variants(image_data: bytes, widths: Iterable[int]) -> Tuple[bytes, Dict[int, bytes], Tuple[int, int]]:
+    """
+    解码一次，生成原图和各宽度版本的 WebP（在工作进程中执行）
+    原图超过最大边长时先缩小；只生成比原图窄的版本
+    像素数超出上限时抛出 ImageTooLarge
+    返回: (原图 webp_data, {宽度: webp_data}, (原图宽, 原图高))
+    """
+    with _open_bounded(image_data) as source:
+        image = _normalize_mode(source)
+        full = _save_webp(image)
+        variants = {}
+        for width in sorted(set(widths)):
+            if width < image.width:
+                variants[width] = _save_webp(_resize_to_width(image, width))
+        return full, variants, image.size
+
+
+def resize_file_to_webp(path: str, width: int) -> Optional[bytes]:
+    """
+    把已保存的图片缩放到指定宽度（按需缩放，在工作进程中执行）
+    原图不比目标宽度宽时返回 None
+    """
+    with Image.open(path) as image:
+        if image.width <= width:
+            return None
+        image = _normalize_mode(image)
+        # 按需缩放优先响应速度，使用较快的压缩方法
+        return _save_webp(_resize_to_width(image, width), method=4)
+
+
+class ImagePoolBusy(Exception):
+    """进程池已满（正在处理 + 排队的任务达到上限）"""
+    pass
+
+
+class ImagePool:
+    """有界的图片编码进程池"""
+
+    def __init__(self, workers: int = IMAGE_WORKERS, queue_depth: int = IMAGE_QUEUE_DEPTH):
+        self.workers = max(1, workers)
+        self.queue_depth = max(0, queue_depth)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._in_flight = 0
+
+    @property
+    def capacity(self) -> int:
+        """同时接受的最大任务数"""
+        return self.workers + self.queue_depth
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # 使用 spawn 启动工作进程，避免在多线程的服务进程中 fork
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return self._executor
+
+    @contextmanager
+    def slots(self, count: int = 1):
+        """
+        预占任务名额，超出容量时抛出 ImagePoolBusy
+        批量上传一次性预占全部名额，避免处理到一半才失败
+        """
+        if self._in_flight + count > self.capacity:
+            raise ImagePoolBusy()
+        self._in_flight += count
+        try:
+            yield
+        finally:
+            self._in_flight -= count
+
+    async def run(self, func, *args):
+        """在进程池中执行函数（调用方需先通过 slots 预占名额）"""
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        except BrokenProcessPool:
+            # 工作进程异常退出（如内存不足），重建进程池
+            self.shutdown(wait=False)
+            raise
+
+    def shutdown(self, wait: bool = True):
+        """关闭进程池"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=not wait)
+            self._executor = None
+
+
+# 全局图片编码进程池
+image_pool = ImagePool()
@@ -0,0 +1,357 @@
+"""
+搜索倒排索引
+中文按单字 + 双字（bigram）切分，拉丁文字按单词切分，覆盖已发布内容的标题和正文。
+拉丁单词另建三字母（trigram）到单词的索引，查询词可以匹配单词中的任意位置，与原先的子串匹配一致。
+索引常驻内存，通过 ContentStorage 的变更通知增量更新。
+搜索结果按相关度用堆选出前 k 条，只返回带高亮位置的摘要而不是全文。
+"""
+import heapq
+import re
+import threading
+from typing import Iterable, List, Dict, Any, Optional, Pattern, Set, Tuple
+
+from backend.utils.file_storage import ContentStorage, add_change_listener, page_key
+
+# 支持搜索的内容类型
+CONTENT_TYPES = ['research', 'media', 'activity', 'shop']
+
+# 摘要：匹配位置前后保留的字符数；正文不含关键词时从开头截取的长度
+SNIPPET_CONTEXT = 60
+SNIPPET_LENGTH = 150
+
+# 中日韩字符范围
+_CJK_RANGES = '\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af'
+# 一段连续的中日韩字符，或一个拉丁单词（字母/数字，不含中日韩字符）
+_TOKEN_RE = re.compile(rf'[{_CJK_RANGES}]+|[^\W_{_CJK_RANGES}]+')
+
+# 拉丁单词子串查找使用的字母组长度；更短的查询词直接扫描词表
+GRAM_SIZE = 3
+
+
+def _is_cjk(run: str) -> bool:
+    """判断切分出的片段是否为中日韩字符"""
+    return bool(re.match(rf'[{_CJK_RANGES}]', run))
+
+
+def tokenize(text: str) -> Set[str]:
+    """
+    将文本切分为索引词
+    中文：每个单字和相邻双字；拉丁文字：整个单词（小写）
+    """
+    terms = set()
+    for run in _TOKEN_RE.findall(text.lower()):
+        if _is_cjk(run):
+            terms.update(run)
+            terms.update(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            terms.add(run)
+    return terms
+
+
+def _grams(word: str) -> Set[str]:
+    """拉丁单词的全部字母组"""
+    return {word[i:i + GRAM_SIZE] for i in range(len(word) - GRAM_SIZE + 1)}
+
+
+def query_terms(keyword: str) -> List[Tuple[str, bool]]:
+    """
+    将搜索关键词切分为查询词
+    返回 (词, 是否子串匹配)：中文双字精确匹配，拉丁单词匹配包含它的任意索引词（可以从单词中间开始）
+    """
+    terms = []
+    for run in _TOKEN_RE.findall(keyword.lower()):
+        if _is_cjk(run):
+            if len(run) == 1:
+                terms.append((run, False))
+            else:
+                terms.extend((run[i:i + 2], False) for i in range(len(run) - 1))
+        else:
+            terms.append((run, True))
+    return terms
+
+
+def match_relevance(keyword: str, title: Optional[str], content: Optional[str]) -> int:
+    """
+    计算相关度：标题包含关键词 +10，正文包含 +1，均不包含时为 0
+    :param keyword: 已转为小写的关键词
+    """
+    return _relevance(keyword, (title or '').lower(), (content or '').lower())
+
+
+def _relevance(keyword: str, title: str, content: str) -> int:
+    """match_relevance 的内部版本（标题和正文已转为小写）"""
+    return (10 if keyword in title else 0) + (1 if keyword in content else 0)
+
+
+def keyword_pattern(keyword: str) -> Pattern:
+    """关键词的忽略大小写匹配模式（用于在原文中定位高亮位置）"""
+    return re.compile(re.escape(keyword), re.IGNORECASE)
+
+
+def make_snippet(text: Optional[str], pattern: Pattern) -> Tuple[str, List[List[int]]]:
+    """
+    截取第一个匹配位置前后的摘要
+    :return: (摘要, 摘要中每个匹配的 [起, 止) 位置)
+    """
+    text = text or ''
+    match = pattern.search(text)
+    if match is None:
+        start, end = 0, min(len(text), SNIPPET_LENGTH)
+    else:
+        start = max(0, match.start() - SNIPPET_CONTEXT)
+        end = min(len(text), match.end() + SNIPPET_CONTEXT)
+    prefix = '…' if start > 0 else ''
+    snippet = prefix + text[start:end] + ('…' if end < len(text) else '')
+    shift = len(prefix) - start
+    highlights = [[m.start() + shift, m.end() + shift] for m in pattern.finditer(text, start, end)]
+    return snippet, highlights
+
+
+def search_result(post: Dict[str, Any], content_type: str, relevance: int, pattern: Pattern) -> Dict[str, Any]:
+    """单条搜索结果：标题、摘要和高亮位置（不含正文全文）"""
+    snippet, highlights = make_snippet(post.get('content'), pattern)
+    return {
+        'id': post.get('id'),
+        'type': content_type,
+        'title': post.get('title'),
+        'snippet': snippet,
+        'highlights': highlights,
+        'image_count': len(post.get('images') or []),
+        'created_at': post.get('created_at'),
+        'relevance': relevance
+    }
+
+
+def _rank_key(match: Tuple[int, Dict[str, Any]]) -> Tuple[int, Tuple[str, str]]:
+    relevance, post = match
+    return relevance, page_key(post)
+
+
+def top_matches(keyword: str, scored: Iterable[Tuple[int, Dict[str, Any]]], content_type: str,
+                limit: Optional[int] = None, offset: int = 0) -> Tuple[int, List[Dict[str, Any]]]:
+    """
+    按相关度、创建时间倒序选出第 offset 条起的 limit 条，只为选中的结果生成摘要
+    :param scored: (相关度, 文章) 序列，相关度为 0 的跳过
+    :param limit: None 表示返回全部
+    :return: (匹配总数, 本页结果)
+    """
+    total = 0
+
+    def matched():
+        nonlocal total
+        for relevance, post in scored:
+            if relevance:
+                total += 1
+                yield relevance, post
+
+    if limit is None:
+        ranked = sorted(matched(), key=_rank_key, reverse=True)
+    else:
+        # 堆选择：O(n log k)，不对全部匹配排序
+        ranked = heapq.nlargest(offset + limit, matched(), key=_rank_key)
+    pattern = keyword_pattern(keyword)
+    page = ranked[offset:] if limit is None else ranked[offset:offset + limit]
+    return total, [search_result(post, content_type, relevance, pattern) for relevance, post in page]
+
+
+class _Doc:
+    """索引中的单篇文档"""
+
+    __slots__ = ('post', 'title', 'content', 'terms', 'signature')
+
+    def __init__(self, post: Dict[str, Any]):
+        self.post = post
+        self.title = (post.get('title') or '').lower()
+        self.content = (post.get('content') or '').lower()
+        self.terms = tokenize(self.title) | tokenize(self.content)
+        self.signature = _doc_signature(post)
+
+
+def _doc_signature(post: Dict[str, Any]) -> tuple:
+    """文档签名，用于整体替换时判断文章是否需要重新切词"""
+    return (post.get('updated_at'), post.get('title'), post.get('content'))
+
+
+class _TypeIndex:
+    """单个内容类型的倒排索引"""
+
+    def __init__(self):
+        self.revision = 0
+        self.docs: Dict[str, _Doc] = {}
+        self.postings: Dict[str, Set[str]] = {}
+        # 拉丁单词词表及其字母组索引（字母组 -> 包含它的单词），用于子串查找
+        self.words: Set[str] = set()
+        self.grams: Dict[str, Set[str]] = {}
+
+    def _add_word(self, term: str):
+        """新索引词加入词表（中文词不需要子串查找）"""
+        if _is_cjk(term):
+            return
+        self.words.add(term)
+        for gram in _grams(term):
+            self.grams.setdefault(gram, set()).add(term)
+
+    def add(self, post: Dict[str, Any]):
+        """添加或替换一篇文档（未发布的内容只会被移除）"""
+        post_id = post.get('id')
+        self.remove(post_id)
+        if post.get('status') != 'published':
+            return
+        doc = _Doc(post)
+        self.docs[post_id] = doc
+        for term in doc.terms:
+            ids = self.postings.get(term)
+            if ids is None:
+                self.postings[term] = {post_id}
+                self._add_word(term)
+            else:
+                ids.add(post_id)
+
+    def remove(self, post_id: str):
+        """移除一篇文档（词表中的空词延迟到重建时清理）"""
+        doc = self.docs.pop(post_id, None)
+        if doc is None:
+            return
+        for term in doc.terms:
+            ids = self.postings.get(term)
+            if ids is not None:
+                ids.discard(post_id)
+
+    def rebuild(self, posts: List[Dict[str, Any]]):
+        """全量构建"""
+        self.docs = {}
+        self.postings = {}
+        self.words = set()
+        self.grams = {}
+        for post in posts:
+            if post.get('status') != 'published':
+                continue
+            doc = _Doc(post)
+            post_id = post.get('id')
+            self.docs[post_id] = doc
+            for term in doc.terms:
+                self.postings.setdefault(term, set()).add(post_id)
+        for term in self.postings:
+            self._add_word(term)
+
+    def sync(self, posts: List[Dict[str, Any]]):
+        """整体替换：只对新增或变化的文章重新切词，变化过多时直接全量重建"""
+        changed = []
+        seen = set()
+        for post in posts:
+            post_id = post.get('id')
+            seen.add(post_id)
+            doc = self.docs.get(post_id)
+            if post.get('status') != 'published':
+                if doc is not None:
+                    changed.append(post)
+            elif doc is None or doc.signature != _doc_signature(post):
+                changed.append(post)
+            else:
+                doc.post = post
+        removed = [i for i in self.docs if i not in seen]
+
+        if len(changed) + len(removed) > max(len(self.docs), len(posts)) // 4 + 16:
+            self.rebuild(posts)
+            return
+        for post_id in removed:
+            self.remove(post_id)
+        for post in changed:
+            self.add(post)
+
+    def _matching_words(self, term: str) -> Iterable[str]:
+        """包含 term 的拉丁单词：按字母组求交集缩小范围，查询词过短时扫描词表"""
+        if len(term) < GRAM_SIZE:
+            return [word for word in self.words if term in word]
+        words: Optional[Set[str]] = None
+        for gram in sorted(_grams(term), key=lambda g: len(self.grams.get(g, ()))):
+            found = self.grams.get(gram)
+            if not found:
+                return []
+            words = set(found) if words is None else words & found
+        return [word for word in words if term in word]
+
+    def _lookup(self, term: str, substring: bool) -> Set[str]:
+        """查找单个查询词对应的文档ID集合"""
+        if not substring:
+            return self.postings.get(term, set())
+        ids: Set[str] = set()
+        for word in self._matching_words(term):
+            ids |= self.postings.get(word, set())
+        return ids
+
+    def candidates(self, terms: List[Tuple[str, bool]]) -> Optional[Set[str]]:
+        """求所有查询词的文档交集；没有可用查询词时返回 None（退化为全量比对）"""
+        result: Optional[Set[str]] = None
+        # 先查精确词（按倒排列表从短到长），尽早缩小候选集；交集为空时立即结束
+        ordered = sorted(terms, key=lambda t: (t[1], len(self.postings.get(t[0], ())) if not t[1] else 0))
+        for term, substring in ordered:
+            ids = self._lookup(term, substring)
+            result = set(ids) if result is None else result & ids
+            if not result:
+                return set()
+        return result
+
+
+class SearchIndex:
+    """全部内容类型的搜索索引"""
+
+    def __init__(self):
+        self._types: Dict[str, _TypeIndex] = {}
+        self._lock = threading.RLock()
+
+    def on_content_change(self, content_type: str, revision: int, event: str, payload: Any):
+        """ContentStorage 变更回调：增量更新对应类型的索引"""
+        with self._lock:
+            index = self._types.get(content_type)
+            if index is None:
+                # 尚未构建的类型在首次搜索时全量构建
+                return
+            if event == 'reload':
+                index.sync(payload)
+            elif index.revision != revision - 1:
+                # 漏掉了中间版本，下次搜索时按存储内容重新同步
+                return
+            elif event == 'upsert':
+                index.add(payload)
+            elif event == 'delete':
+                index.remove(payload)
+            index.revision = revision
+
+    def _ensure_fresh(self, content_type: str) -> _TypeIndex:
+        """确保索引与存储版本一致（文件被外部修改时由缓存刷新触发同步）"""
+        storage = ContentStorage(content_type)
+        revision = storage.get_revision()
+        with self._lock:
+            index = self._types.get(content_type)
+            if index is None:
+                index = _TypeIndex()
+                index.rebuild(storage.get_all())
+                index.revision = revision
+                self._types[content_type] = index
+            elif index.revision != revision:
+                index.sync(storage.get_all())
+                index.revision = revision
+            return index
+
+    def search(self, keyword: str, content_type: str, limit: Optional[int] = None,
+               offset: int = 0) -> Tuple[int, List[Dict[str, Any]]]:
+        """
+        搜索单个内容类型，匹配规则与原先的子串匹配一致
+        :param limit: 返回的条数，None 表示全部
+        :return: (匹配总数, 按相关度排序的第 offset 条起的结果)
+        """
+        keyword = keyword.lower()
+        terms = query_terms(keyword)
+        index = self._ensure_fresh(content_type)
+
+        with self._lock:
+            ids = index.candidates(terms) if terms else None
+            docs = index.docs.values() if ids is None else [index.docs[i] for i in ids if i in index.docs]
+            scored = ((_relevance(keyword, doc.title, doc.content), doc.post) for doc in docs)
+            return top_matches(keyword, scored, content_type, limit, offset)
+
+
+# 全局索引实例
+search_index = SearchIndex()
+add_change_listener(search_index.on_content_change)
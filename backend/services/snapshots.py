@@ -0,0 +1,290 @@
+"""
+发布快照
+每次发布把内容保存为不可变的快照：
+- objects/xx/<sha256>.json：单篇文章（规范化 JSON 的哈希命名，相同文章只存一份，各版本共享未变化的文章）
+- manifests/<sha256>.json：一个版本的文章哈希列表（同样按内容哈希命名，内容相同的发布共用一个版本）
+- <type>.head：当前版本的指针，写临时文件后原子替换
+- <type>.log：发布历史（NDJSON，每行一次发布或回滚）
+- <type>.pending：正在切换的版本（先落盘，再切换指针和重写正文，完成后删除）
+回滚只需把指针换回旧版本，并用快照对象重新生成正文（进程内已解析的文章直接复用，不重新解析）。
+发布和回滚持有该类型的文件锁，多个 worker 进程同时发布时正文与版本指针保持一致；
+切换中途崩溃时 pending 文件仍在，启动时（recover）按其中的版本重新生成正文并补齐指针和历史。
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.config import ADMIN_DATA_DIR
+from backend.utils.file_lock import file_lock
+from backend.utils.file_storage import get_content_storage
+from backend.utils.metrics import timed_io
+
+# 快照目录
+SNAPSHOT_DIR = ADMIN_DATA_DIR / "snapshots"
+
+# 进程内缓存的已解析文章对象数（对象不可变，缓存无需失效）
+OBJECT_CACHE_SIZE = 20000
+
+
+def canonical_json(value: Any) -> bytes:
+    """规范化 JSON（键排序、无空白），相同内容得到相同的字节和哈希"""
+    return json.dumps(value, ensure_ascii=False, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+
+def _fsync_path(path: Path):
+    """把文件或目录（目录项）刷到磁盘"""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _write_atomic(path: Path, raw: bytes, sync: bool = False):
+    """
+    写临时文件后原子替换
+    :param sync: 替换前 fsync 文件、替换后 fsync 所在目录，返回时新内容已落盘
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}-{threading.get_ident()}.tmp")
+    with open(tmp_path, 'wb') as f:
+        f.write(raw)
+        if sync:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    if sync:
+        _fsync_path(path.parent)
+
+
+class SnapshotNotFound(KeyError):
+    """版本或对象不存在"""
+    pass
+
+
+class SnapshotStore:
+    """内容寻址的发布快照"""
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self._objects: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    # ---------- 路径 ----------
+
+    def _object_path(self, digest: str) -> Path:
+        return self.directory / "objects" / digest[:2] / f"{digest}.json"
+
+    def _manifest_path(self, version: str) -> Path:
+        return self.directory / "manifests" / f"{version}.json"
+
+    def head_path(self, content_type: str) -> Path:
+        return self.directory / f"{content_type}.head"
+
+    def _log_path(self, content_type: str) -> Path:
+        return self.directory / f"{content_type}.log"
+
+    def _pending_path(self, content_type: str) -> Path:
+        return self.directory / f"{content_type}.pending"
+
+    # ---------- 对象 ----------
+
+    def _remember(self, digest: str, post: Dict[str, Any]):
+        self._objects[digest] = post
+        self._objects.move_to_end(digest)
+        while len(self._objects) > OBJECT_CACHE_SIZE:
+            self._objects.popitem(last=False)
+
+    def _put_object(self, post: Dict[str, Any]) -> Tuple[str, bool]:
+        """保存一篇文章，返回对象哈希和是否新写入（新对象尚未 fsync，由 commit 统一刷盘）"""
+        raw = canonical_json(post)
+        digest = hashlib.sha256(raw).hexdigest()
+        path = self._object_path(digest)
+        created = False
+        if digest not in self._objects and not path.exists():
+            _write_atomic(path, raw)
+            created = True
+        self._remember(digest, post)
+        return digest, created
+
+    def _get_object(self, digest: str) -> Dict[str, Any]:
+        post = self._objects.get(digest)
+        if post is not None:
+            self._objects.move_to_end(digest)
+            return post
+        try:
+            with open(self._object_path(digest), 'rb') as f:
+                post = json.loads(f.read())
+        except FileNotFoundError:
+            raise SnapshotNotFound(digest)
+        self._remember(digest, post)
+        return post
+
+    # ---------- 版本 ----------
+
+    def commit(self, content_type: str, document: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        保存一个版本的快照（不移动指针）
+        :return: {'version': 版本哈希, 'posts': 文章数, 'new_objects': 新写入的文章数}
+        """
+        posts = document.get('posts', [])
+        with timed_io('snapshot_commit'), self._lock:
+            digests = []
+            created_paths = []
+            for post in posts:
+                digest, created = self._put_object(post)
+                digests.append(digest)
+                if created:
+                    created_paths.append(self._object_path(digest))
+            new_objects = len(created_paths)
+            # 版本清单写入前新对象必须已落盘，否则断电后清单和指针可能引用不存在的对象
+            # （先全部写入再逐个 fsync，内核可以合并写回）
+            if created_paths:
+                for path in created_paths:
+                    _fsync_path(path)
+                for directory in {path.parent for path in created_paths}:
+                    _fsync_path(directory)
+                _fsync_path(self.directory / "objects")
+            extra = {k: v for k, v in document.items() if k != 'posts'}
+            raw = canonical_json({'type': content_type, 'posts': digests, 'extra': extra})
+            version = hashlib.sha256(raw).hexdigest()
+            path = self._manifest_path(version)
+            if not path.exists():
+                _write_atomic(path, raw, sync=True)
+        return {'version': version, 'posts': len(digests), 'new_objects': new_objects}
+
+    def checkout(self, content_type: str, version: str) -> Dict[str, Any]:
+        """读取一个版本的完整内容"""
+        try:
+            with open(self._manifest_path(version), 'rb') as f:
+                manifest = json.loads(f.read())
+        except (FileNotFoundError, OSError):
+            raise SnapshotNotFound(version)
+        if manifest.get('type') != content_type:
+            raise SnapshotNotFound(version)
+        with timed_io('snapshot_checkout'), self._lock:
+            posts = [self._get_object(digest) for digest in manifest['posts']]
+        return {**manifest.get('extra', {}), 'posts': posts}
+
+    def head(self, content_type: str) -> Optional[str]:
+        """当前版本哈希，从未发布过时返回 None"""
+        try:
+            return self.head_path(content_type).read_text(encoding='utf-8').strip() or None
+        except FileNotFoundError:
+            return None
+
+    def set_head(self, content_type: str, version: str, action: str, posts: int):
+        """原子切换当前版本指针，并记录到发布历史（返回时指针和历史都已落盘）"""
+        with self._lock:
+            _write_atomic(self.head_path(content_type), version.encode('utf-8'), sync=True)
+            entry = {'version': version, 'action': action, 'posts': posts,
+                     'published_at': datetime.utcnow().isoformat()}
+            with open(self._log_path(content_type), 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+
+    def begin(self, content_type: str, version: str, action: str):
+        """记录即将切换的版本（落盘后才切换指针和重写正文）"""
+        raw = json.dumps({'version': version, 'action': action}).encode('utf-8')
+        _write_atomic(self._pending_path(content_type), raw, sync=True)
+
+    def pending(self, content_type: str) -> Optional[Dict[str, str]]:
+        """未完成的切换（没有或文件损坏时返回 None）"""
+        try:
+            return json.loads(self._pending_path(content_type).read_bytes())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def finish(self, content_type: str):
+        """正文已重写，删除切换记录"""
+        try:
+            self._pending_path(content_type).unlink()
+        except FileNotFoundError:
+            pass
+
+    def history(self, content_type: str, limit: int = 50) -> List[Dict[str, Any]]:
+        """发布历史（最新的在前）"""
+        try:
+            with open(self._log_path(content_type), 'r', encoding='utf-8') as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return []
+        entries = []
+        for line in reversed(lines):
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                continue
+            if len(entries) >= limit:
+                break
+        return entries
+
+
+# 全局快照存储实例
+snapshot_store = SnapshotStore(SNAPSHOT_DIR)
+
+
+def _switch(content_type: str, version: str, action: str, document: Dict[str, Any]):
+    """
+    切换到已保存的版本：先记录切换，再切换指针和历史，然后原子替换正文，最后删除切换记录
+    正文写入时直接用新数据刷新内容缓存，读取方立即看到新版本
+    调用方持有该类型的文件锁
+    """
+    snapshot_store.begin(content_type, version, action)
+    snapshot_store.set_head(content_type, version, action, len(document['posts']))
+    get_content_storage(content_type).replace_all(document)
+    snapshot_store.finish(content_type)
+
+
+def publish(content_type: str, document: Dict[str, Any]) -> Dict[str, Any]:
+    """发布内容：先写快照，再切换版本（见 _switch）"""
+    with file_lock(snapshot_store.head_path(content_type)):
+        info = snapshot_store.commit(content_type, document)
+        _switch(content_type, info['version'], 'publish', document)
+    return info
+
+
+def rollback(content_type: str, version: str) -> Dict[str, Any]:
+    """回滚到历史版本（同样记录为一次发布）"""
+    with file_lock(snapshot_store.head_path(content_type)):
+        document = snapshot_store.checkout(content_type, version)
+        _switch(content_type, version, 'rollback', document)
+    return {'version': version, 'posts': len(document['posts']), 'document': document}
+
+
+def recover(content_types: List[str]) -> List[str]:
+    """
+    完成崩溃时未完成的切换：按切换记录中的版本重新生成正文，指针未切换时补齐指针和历史
+    :return: 恢复过的内容类型
+    """
+    recovered = []
+    for content_type in content_types:
+        with file_lock(snapshot_store.head_path(content_type)):
+            pending = snapshot_store.pending(content_type)
+            if pending is None:
+                continue
+            version = pending['version']
+            try:
+                document = snapshot_store.checkout(content_type, version)
+            except SnapshotNotFound:
+                # 版本清单未落盘（切换记录晚于清单写入，正常不会发生），保持原正文和指针
+                print(f"发布恢复失败（{content_type}）: 版本 {version[:12]} 不存在")
+                snapshot_store.finish(content_type)
+                continue
+            if snapshot_store.head(content_type) != version:
+                snapshot_store.set_head(content_type, version, pending['action'], len(document['posts']))
+            get_content_storage(content_type).replace_all(document)
+            snapshot_store.finish(content_type)
+            recovered.append(content_type)
+    return recovered
@@ -0,0 +1,330 @@
+"""
+静态资源构建与服务
+部署时执行 python -m backend.services.static_assets（或在启动时由第一个 worker 构建）为 frontend 下的资源计算内容哈希，
+生成 .gz / .br 预压缩文件，把图片转为 WebP（services/static_images.py），
+并把 HTML 中的资源引用改写为带版本号的地址（?v=哈希），图片改写为带 WebP 版本的 <picture>。
+带正确版本号的请求以 immutable 长期缓存返回，其余请求每次向服务器确认。
+构建持有文件锁，多个 worker 同时启动时依次执行，后执行的发现资源未变化只做哈希检查。
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import threading
+from email.utils import parsedate
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs
+
+from fastapi import Request
+from fastapi.responses import FileResponse
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.types import Scope
+
+from backend.config import BASE_DIR, CACHE_DIR
+from backend.services.static_images import optimize_images
+from backend.utils.file_lock import file_lock
+
+try:
+    import brotli
+except ImportError:  # 可选依赖，未安装时只生成 gzip
+    brotli = None
+
+FRONTEND_DIR = BASE_DIR / "frontend"
+STATIC_BUILD_DIR = CACHE_DIR / "static"
+MANIFEST_PATH = STATIC_BUILD_DIR / "manifest.json"
+# 优化后的图片（URL 前缀 /images/opt）和图片清单
+OPTIMIZED_IMAGES_DIR = STATIC_BUILD_DIR / "images-opt"
+OPTIMIZED_IMAGES_PREFIX = "/images/opt"
+IMAGES_MANIFEST_PATH = STATIC_BUILD_DIR / "images.json"
+
+# 参与指纹计算的资源目录（对应 URL 前缀 /css、/js、/images）
+ASSET_DIRS = ['css', 'js', 'images']
+# 需要改写资源引用的 HTML 目录（相对 frontend）
+HTML_DIRS = ['.', 'pages', 'admin']
+# 值得预压缩的文本类型
+COMPRESSIBLE_SUFFIXES = {'.css', '.js', '.html', '.svg', '.json', '.txt', '.map'}
+
+# 带版本号请求的缓存策略 / 其他请求的缓存策略
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "public, no-cache"
+
+# HTML 中 src/href 指向本站资源的引用
+_ASSET_REF_RE = re.compile(r'''(\b(?:src|href)=)(["'])(/(?:css|js|images)/[^"'?#]+)\2''')
+# HTML 中引用本站图片的 <img> 标签
+_IMG_TAG_RE = re.compile(r'''<img\b[^>]*?\bsrc=(["'])(/images/[^"'?#]+)\1[^>]*>''')
+
+# 资源 URL 路径 -> 内容哈希
+_manifest: Dict[str, str] = {}
+
+
+def _hash_file(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()[:12]
+
+
+def _write_atomic(path: Path, data: bytes):
+    """先写临时文件再改名（读取方不会看到写了一半的文件）"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}-{threading.get_ident()}.tmp")
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _write_compressed(target: Path, data: bytes):
+    """写入 .gz / .br 预压缩文件（压缩后没有变小则跳过）"""
+    if target.suffix not in COMPRESSIBLE_SUFFIXES:
+        return
+    gz = gzip.compress(data, compresslevel=9, mtime=0)
+    if len(gz) < len(data):
+        _write_atomic(target.with_name(target.name + '.gz'), gz)
+    if brotli is not None:
+        br = brotli.compress(data, quality=11)
+        if len(br) < len(data):
+            _write_atomic(target.with_name(target.name + '.br'), br)
+
+
+def rewrite_html(html: str, manifest: Dict[str, str], images: Optional[Dict[str, dict]] = None) -> str:
+    """
+    把 HTML 中的资源引用改写为带版本号的地址
+    :param images: 图片优化清单，有更小的 WebP 版本时 <img> 改写为 <picture>（原图作为回退）
+    """
+    def wrap(match):
+        entry = (images or {}).get(match.group(2))
+        if not entry or entry['webp_bytes'] >= entry['source_bytes']:
+            return match.group(0)
+        webp = entry['webp']
+        return (f'<picture><source srcset="{webp}?v={manifest.get(webp, entry["hash"])}" type="image/webp">'
+                f'{match.group(0)}</picture>')
+    html = _IMG_TAG_RE.sub(wrap, html)
+
+    def replace(match):
+        prefix, quote, url = match.groups()
+        digest = manifest.get(url)
+        if digest is None:
+            return match.group(0)
+        return f"{prefix}{quote}{url}?v={digest}{quote}"
+    return _ASSET_REF_RE.sub(replace, html)
+
+
+def build_assets(verbose: bool = False) -> Dict[str, str]:
+    """
+    构建静态资源：计算哈希、生成预压缩文件、优化图片、改写 HTML
+    与上次构建相比未变化的资源跳过压缩和图片转换；持有构建目录的文件锁，同一时间只有一个构建
+    """
+    with file_lock(STATIC_BUILD_DIR):
+        return _build_assets_locked(verbose)
+
+
+def _build_assets_locked(verbose: bool) -> Dict[str, str]:
+    """build_assets 的实现（调用方持有文件锁）"""
+    previous = _read_json(MANIFEST_PATH)
+    # 优化图片目录在构建时创建（挂载时不检查），没有图片时也要存在
+    OPTIMIZED_IMAGES_DIR.mkdir(parents=True, exist_ok=True)
+
+    manifest: Dict[str, str] = {}
+    compressed = 0
+    for asset_dir in ASSET_DIRS:
+        source_root = FRONTEND_DIR / asset_dir
+        if not source_root.exists():
+            continue
+        for path in source_root.rglob('*'):
+            if not path.is_file():
+                continue
+            rel = path.relative_to(FRONTEND_DIR).as_posix()
+            url = f"/{rel}"
+            digest = _hash_file(path)
+            manifest[url] = digest
+            target = STATIC_BUILD_DIR / rel
+            # 清单在全部输出写完后才替换，上次构建中断时未变化的资源同样会重新压缩
+            if previous.get(url) != digest:
+                _write_compressed(target, path.read_bytes())
+                compressed += 1
+
+    # 图片转为 WebP（按源文件哈希跳过未变化的图片），优化后的文件名已含哈希
+    images, image_stats = optimize_images(FRONTEND_DIR / 'images', OPTIMIZED_IMAGES_DIR, '/images',
+                                          OPTIMIZED_IMAGES_PREFIX, _read_json(IMAGES_MANIFEST_PATH).get('images', {}),
+                                          _write_atomic)
+    for entry in images.values():
+        for key in ('webp', 'mp4'):
+            if entry.get(key):
+                manifest[entry[key]] = entry['hash']
+    saved = image_stats['source_bytes'] - image_stats['output_bytes']
+    _write_atomic(IMAGES_MANIFEST_PATH, json.dumps(
+        {'images': images, 'source_bytes': image_stats['source_bytes'],
+         'output_bytes': image_stats['output_bytes'], 'saved_bytes': saved},
+        indent=2, sort_keys=True).encode('utf-8'))
+
+    # HTML 每次都重新改写（依赖所有资源的哈希）
+    for html_dir in HTML_DIRS:
+        for path in (FRONTEND_DIR / html_dir).glob('*.html'):
+            rel = path.relative_to(FRONTEND_DIR).as_posix()
+            html = rewrite_html(path.read_text(encoding='utf-8'), manifest, images).encode('utf-8')
+            target = STATIC_BUILD_DIR / 'html' / rel
+            try:
+                unchanged = target.read_bytes() == html
+            except OSError:
+                unchanged = False
+            if not unchanged:
+                _write_atomic(target, html)
+                _write_compressed(target, html)
+
+    _write_atomic(MANIFEST_PATH, json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+    _manifest.clear()
+    _manifest.update(manifest)
+    if verbose:
+        print(f"✅ 静态资源构建完成：{len(manifest)} 个资源，重新压缩 {compressed} 个")
+        print(f"✅ 图片优化：{len(images)} 张（重新转换 {image_stats['optimized']} 张），"
+              f"{image_stats['source_bytes'] / 1024:.0f} KB -> {image_stats['output_bytes'] / 1024:.0f} KB，"
+              f"节省 {saved / 1024:.0f} KB")
+    return manifest
+
+
+def _read_json(path: Path) -> dict:
+    """读取上次构建的清单（不存在或损坏时返回空表）"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def get_manifest() -> Dict[str, str]:
+    """获取资源哈希表（未构建时从磁盘读取）"""
+    if not _manifest and MANIFEST_PATH.exists():
+        try:
+            with open(MANIFEST_PATH, 'r', encoding='utf-8') as f:
+                _manifest.update(json.load(f))
+        except (OSError, ValueError):
+            pass
+    return _manifest
+
+
+def _accepted_encodings(headers: Headers) -> set:
+    """解析 Accept-Encoding（忽略 q=0 的编码）"""
+    accepted = set()
+    for part in headers.get('accept-encoding', '').split(','):
+        name, _, params = part.strip().partition(';')
+        if params.strip().replace(' ', '') in ('q=0', 'q=0.0'):
+            continue
+        if name:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+def _pick_variant(source: Path, source_stat: os.stat_result, build_path: Path,
+                  headers: Headers) -> Optional[Tuple[str, Path, os.stat_result]]:
+    """按 Accept-Encoding 选择预压缩文件（比源文件旧的视为过期）"""
+    accepted = _accepted_encodings(headers)
+    for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+        if encoding not in accepted:
+            continue
+        candidate = build_path.with_name(build_path.name + suffix)
+        try:
+            stat = candidate.stat()
+        except FileNotFoundError:
+            continue
+        if stat.st_mtime >= source_stat.st_mtime:
+            return encoding, candidate, stat
+    return None
+
+
+def is_not_modified(response_headers: Headers, request_headers: Headers) -> bool:
+    """
+    条件请求是否可以返回 304：与 StaticFiles.is_not_modified 相同检查 If-None-Match 和 If-Modified-Since，
+    If-None-Match 可以列出多个 ETag；带有 If-None-Match 时忽略 If-Modified-Since
+    """
+    if_none_match = request_headers.get('if-none-match')
+    if if_none_match:
+        return response_headers.get('etag') in [t.strip() for t in if_none_match.split(',')]
+    if_modified_since = parsedate(request_headers.get('if-modified-since', ''))
+    last_modified = parsedate(response_headers.get('last-modified', ''))
+    return if_modified_since is not None and last_modified is not None and if_modified_since >= last_modified
+
+
+def negotiated_file_response(source: Path, build_path: Path, scope: Scope, cache_control: str,
+                             source_stat: Optional[os.stat_result] = None, status_code: int = 200) -> Response:
+    """返回文件响应：客户端支持时使用预压缩版本，并处理条件请求"""
+    headers = Headers(scope=scope)
+    source_stat = source_stat or source.stat()
+    media_type = mimetypes.guess_type(source.name)[0] or 'application/octet-stream'
+    variant = _pick_variant(source, source_stat, build_path, headers)
+    if variant is not None:
+        encoding, path, stat = variant
+        response = FileResponse(path, status_code=status_code, stat_result=stat,
+                                media_type=media_type, method=scope.get('method'))
+        response.headers['content-encoding'] = encoding
+    else:
+        response = FileResponse(source, status_code=status_code, stat_result=source_stat,
+                                media_type=media_type, method=scope.get('method'))
+    response.headers['vary'] = 'Accept-Encoding'
+    response.headers['cache-control'] = cache_control
+
+    if is_not_modified(response.headers, headers):
+        return Response(status_code=304, headers={
+            k: v for k, v in response.headers.items()
+            if k in ('etag', 'cache-control', 'vary', 'content-encoding', 'last-modified')
+        })
+    return response
+
+
+def html_response(rel_path: str, request: Request) -> Response:
+    """返回页面 HTML（优先使用改写过资源引用的构建版本）"""
+    source = FRONTEND_DIR / rel_path
+    built = STATIC_BUILD_DIR / 'html' / rel_path
+    try:
+        if built.stat().st_mtime >= source.stat().st_mtime:
+            source = built
+    except FileNotFoundError:
+        pass
+    return negotiated_file_response(source, built, request.scope, REVALIDATE_CACHE_CONTROL)
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    支持预压缩和版本化缓存的静态文件目录
+    :param url_prefix: 挂载路径（如 /css），用于查找资源哈希
+    :param build_subdir: 构建目录中对应的子目录
+    :param rewritten: 是否优先返回构建目录中改写过的文件（HTML 页面目录）
+    :param check_dir: 创建时检查目录是否存在（构建输出目录传 False，首次请求前由构建创建）
+    """
+
+    def __init__(self, *, directory: str, url_prefix: str, build_subdir: str, rewritten: bool = False,
+                 check_dir: bool = True):
+        super().__init__(directory=directory, check_dir=check_dir)
+        self.url_prefix = url_prefix.rstrip('/')
+        self.build_dir = STATIC_BUILD_DIR / build_subdir
+        self.rewritten = rewritten
+
+    def file_response(self, full_path, stat_result, scope, status_code=200) -> Response:
+        source = Path(full_path)
+        rel = source.resolve().relative_to(Path(self.directory).resolve()).as_posix()
+        build_path = self.build_dir / rel
+
+        if self.rewritten:
+            # 构建版本不比源文件旧时使用构建版本
+            try:
+                built_stat = build_path.stat()
+                if built_stat.st_mtime >= stat_result.st_mtime:
+                    source, stat_result = build_path, built_stat
+            except FileNotFoundError:
+                pass
+
+        # 请求带有与当前内容一致的版本号时允许长期缓存
+        cache_control = REVALIDATE_CACHE_CONTROL
+        query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+        version = query.get('v', [None])[0]
+        if version and get_manifest().get(f"{self.url_prefix}/{rel}") == version:
+            cache_control = IMMUTABLE_CACHE_CONTROL
+
+        return negotiated_file_response(source, build_path, scope, cache_control,
+                                        source_stat=stat_result, status_code=status_code)
+
+
+if __name__ == '__main__':
+    build_assets(verbose=True)
@@ -0,0 +1,168 @@
+"""
+静态图片优化
+构建静态资源时把 frontend/images 下的 PNG/JPEG/GIF 转为 WebP（GIF 转为动画 WebP，可选生成静音 MP4），
+按页面上的显示尺寸缩小图标，结果按内容哈希命名保存在 cache/static/images-opt/，源文件未变化时跳过。
+优化结果记录在清单中，页面 HTML 的 <img> 改写为带 WebP <source> 的 <picture>（原图作为回退）。
+"""
+import fnmatch
+import hashlib
+import io
+import json
+import shutil
+import subprocess
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from PIL import Image, ImageSequence
+
+from backend.config import STATIC_IMAGE_MP4
+
+# 参与优化的源图片格式（WebP/SVG 已经足够小，不再处理）
+SOURCE_SUFFIXES = {'.png', '.jpg', '.jpeg', '.gif', '.bmp'}
+
+# 按显示尺寸缩小的图片：文件名通配 -> 最大高度（像素，按 2 倍屏计算，根字号 28px）
+DISPLAY_HEIGHTS = {
+    'nav-*': 160,     # .nav-icon 高 2.86rem
+    'doge.*': 200,    # .doge-container 3.57rem
+    'play.*': 80,     # .player-btn img 1.43rem
+    'pause.*': 80,
+}
+
+# WebP 质量：静态图 / 动画（动画帧数多，使用稍低的质量和较快的压缩方法）
+STATIC_QUALITY = 90
+ANIMATED_QUALITY = 80
+
+# 参数变化时所有输出重新生成
+PIPELINE_VERSION = f"1:{STATIC_QUALITY}:{ANIMATED_QUALITY}:{json.dumps(DISPLAY_HEIGHTS, sort_keys=True)}"
+
+
+def display_height(name: str) -> Optional[int]:
+    """图片的最大显示高度，没有限制时返回 None"""
+    for pattern, height in DISPLAY_HEIGHTS.items():
+        if fnmatch.fnmatch(name, pattern):
+            return height
+    return None
+
+
+def _fit(size: Tuple[int, int], max_height: Optional[int]) -> Tuple[int, int]:
+    """等比缩小到最大高度（不放大）"""
+    width, height = size
+    if max_height is None or height <= max_height:
+        return size
+    return max(1, round(width * max_height / height)), max_height
+
+
+def encode_webp(data: bytes, max_height: Optional[int]) -> Tuple[bytes, Dict[str, Any]]:
+    """
+    编码为 WebP，动画 GIF 保留全部帧、帧时长和循环次数
+    返回: (webp_data, {width, height, frames, animated})
+    """
+    image = Image.open(io.BytesIO(data))
+    size = _fit(image.size, max_height)
+    frames = getattr(image, 'n_frames', 1)
+    output = io.BytesIO()
+    if frames > 1:
+        images, durations = [], []
+        for frame in ImageSequence.Iterator(image):
+            durations.append(frame.info.get('duration', image.info.get('duration', 100)))
+            frame = frame.convert('RGBA')
+            if frame.size != size:
+                frame = frame.resize(size, Image.LANCZOS)
+            images.append(frame)
+        images[0].save(output, format='WEBP', save_all=True, append_images=images[1:],
+                       duration=durations, loop=image.info.get('loop', 0),
+                       quality=ANIMATED_QUALITY, method=4)
+    else:
+        has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+        frame = image.convert('RGBA' if has_alpha else 'RGB')
+        if frame.size != size:
+            frame = frame.resize(size, Image.LANCZOS)
+        frame.save(output, format='WEBP', quality=STATIC_QUALITY, method=6)
+    return output.getvalue(), {'width': size[0], 'height': size[1], 'frames': frames, 'animated': frames > 1}
+
+
+def encode_mp4(source: Path, target: Path, size: Tuple[int, int]) -> bool:
+    """用 ffmpeg 把动画转为静音 MP4（H.264 要求宽高为偶数），ffmpeg 不可用时返回 False"""
+    ffmpeg = shutil.which('ffmpeg')
+    if ffmpeg is None:
+        return False
+    width, height = size[0] // 2 * 2, size[1] // 2 * 2
+    tmp_path = target.with_name(f".{target.name}.tmp.mp4")
+    result = subprocess.run(
+        [ffmpeg, '-y', '-loglevel', 'error', '-i', str(source), '-an', '-movflags', '+faststart',
+         '-pix_fmt', 'yuv420p', '-vf', f"scale={width}:{height}", str(tmp_path)],
+        capture_output=True
+    )
+    if result.returncode != 0:
+        tmp_path.unlink(missing_ok=True)
+        print(f"⚠️  MP4 转换失败 {source.name}: {result.stderr.decode(errors='replace').strip()}")
+        return False
+    tmp_path.replace(target)
+    return True
+
+
+def optimize_images(source_dir: Path, output_dir: Path, url_prefix: str, output_prefix: str,
+                    previous: Dict[str, Any], write) -> Tuple[Dict[str, Any], Dict[str, int]]:
+    """
+    优化目录下的全部图片，源文件哈希和参数未变化且输出存在时沿用上次结果
+    :param previous: 上次构建的清单（源 URL -> 结果）
+    :param write: 原子写文件的函数 write(path, data)
+    :return: (新清单, 统计 {optimized, skipped, source_bytes, output_bytes})
+    """
+    manifest: Dict[str, Any] = {}
+    stats = {'optimized': 0, 'skipped': 0, 'source_bytes': 0, 'output_bytes': 0}
+    if not source_dir.exists():
+        return manifest, stats
+
+    for path in sorted(source_dir.rglob('*')):
+        if not path.is_file() or path.suffix.lower() not in SOURCE_SUFFIXES:
+            continue
+        # 已有手工转换的同名 WebP（如 background.webp）时不再生成
+        if path.with_suffix('.webp').exists():
+            continue
+        rel = path.relative_to(source_dir).as_posix()
+        url = f"{url_prefix}/{rel}"
+        data = path.read_bytes()
+        digest = hashlib.sha256(data + PIPELINE_VERSION.encode()).hexdigest()[:12]
+
+        entry = previous.get(url)
+        if (entry and entry.get('hash') == digest and entry.get('webp')
+                and (output_dir / Path(entry['webp']).name).exists()
+                and (not STATIC_IMAGE_MP4 or not entry.get('animated') or entry.get('mp4'))):
+            stats['skipped'] += 1
+        else:
+            try:
+                webp, info = encode_webp(data, display_height(path.name))
+            except Exception as e:
+                print(f"⚠️  图片优化失败 {rel}: {e}")
+                continue
+            stem = Path(rel).with_suffix('').as_posix().replace('/', '_')
+            webp_name = f"{stem}.{digest}.webp"
+            write(output_dir / webp_name, webp)
+            entry = {
+                'hash': digest,
+                'webp': f"{output_prefix}/{webp_name}",
+                'source_bytes': len(data),
+                'webp_bytes': len(webp),
+                **info
+            }
+            if STATIC_IMAGE_MP4 and info['animated']:
+                mp4_name = f"{stem}.{digest}.mp4"
+                if encode_mp4(path, output_dir / mp4_name, (info['width'], info['height'])):
+                    entry['mp4'] = f"{output_prefix}/{mp4_name}"
+                    entry['mp4_bytes'] = (output_dir / mp4_name).stat().st_size
+            stats['optimized'] += 1
+
+        manifest[url] = entry
+        stats['source_bytes'] += entry['source_bytes']
+        stats['output_bytes'] += min(entry['webp_bytes'], entry['source_bytes'])
+
+    # 删除不再使用的旧输出
+    if output_dir.exists():
+        keep = set()
+        for entry in manifest.values():
+            keep.update(Path(entry[key]).name for key in ('webp', 'mp4') if entry.get(key))
+        for path in output_dir.iterdir():
+            if path.is_file() and path.name not in keep:
+                path.unlink(missing_ok=True)
+    return manifest, stats
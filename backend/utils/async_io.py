@@ -0,0 +1,76 @@
+"""
+异步文件读写
+阻塞的文件/数据库操作放到有界线程池中执行，事件循环只负责等待结果。
+一次慢速写入或大文件解析最多占用一个工作线程，其他请求照常处理。
+"""
+import asyncio
+import functools
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Optional, TypeVar
+
+from backend.config import IO_WORKERS
+from backend.utils.metrics import timed_io
+
+T = TypeVar('T')
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=max(1, IO_WORKERS), thread_name_prefix='io')
+    return _executor
+
+
+async def run_io(func: Callable[..., T], *args, **kwargs) -> T:
+    """在文件读写线程池中执行阻塞函数"""
+    loop = asyncio.get_running_loop()
+    if kwargs:
+        func = functools.partial(func, **kwargs)
+    return await loop.run_in_executor(_get_executor(), func, *args)
+
+
+def shutdown_io(wait: bool = True):
+    """关闭文件读写线程池（等待进行中的写入完成）"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=wait)
+        _executor = None
+
+
+def read_json_file(path: Path, default: Any = None) -> Any:
+    """读取 JSON 文件，文件不存在时返回 default"""
+    try:
+        with timed_io('json_read') as io:
+            with open(path, 'rb') as f:
+                raw = f.read()
+            io.bytes = len(raw)
+    except FileNotFoundError:
+        return default
+    return json.loads(raw)
+
+
+def write_json_file(path: Path, data: Any, indent: Optional[int] = 2, operation: str = 'json_write'):
+    """
+    写入 JSON 文件
+    先写入同目录的临时文件并刷盘再替换，读取方不会看到写了一半的文件，崩溃后保留旧文件或新文件之一
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}-{threading.get_ident()}.tmp")
+    with timed_io(operation) as io:
+        raw = json.dumps(data, ensure_ascii=False, indent=indent).encode('utf-8')
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(raw)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        io.bytes = len(raw)
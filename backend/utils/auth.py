@@ -1,19 +1,49 @@
 """
 JWT 认证工具
+配置文件按修改时间缓存；已验证的 token 在有效期内缓存，避免每次管理请求都重新验签
 """
+import hashlib
 import json
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Optional, Dict
+from typing import Optional, Dict, Tuple
 from jose import JWTError, jwt
-from pathlib import Path
+from backend.config import ADMIN_DATA_DIR
 
 # 配置文件路径
-CONFIG_PATH = Path(__file__).parent.parent.parent / "admin_data" / "config.json"
+CONFIG_PATH = ADMIN_DATA_DIR / "config.json"
+
+# 已验证 token 缓存的容量和最长缓存时间（秒），过期时间以 token 的 exp 为准
+TOKEN_CACHE_SIZE = 256
+TOKEN_CACHE_TTL = 300
+
+_config_lock = threading.Lock()
+_config_cache: Dict = {'version': None, 'data': None}
+
+# token 摘要 -> (payload, 缓存失效时间)
+_token_cache: "OrderedDict[str, Tuple[Dict, float]]" = OrderedDict()
+_token_lock = threading.Lock()
+
+def _config_version() -> Tuple[int, int]:
+    stat = CONFIG_PATH.stat()
+    return stat.st_mtime_ns, stat.st_size
 
 def load_config():
-    """加载配置文件"""
-    with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    """加载配置文件（文件未变化时返回缓存的内容，调用方不应修改返回值）"""
+    version = _config_version()
+    with _config_lock:
+        if _config_cache['version'] != version:
+            with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
+                _config_cache['data'] = json.load(f)
+            _config_cache['version'] = version
+        return _config_cache['data']
+
+def clear_token_cache():
+    """清空已验证 token 缓存"""
+    with _token_lock:
+        _token_cache.clear()
 
 def verify_admin(username: str, password: str) -> bool:
     """验证管理员账号密码"""
@@ -25,32 +55,51 @@ def create_access_token(data: Dict, expires_delta: Optional[timedelta] = None) -
     """创建 JWT token"""
     config = load_config()
     jwt_config = config.get('jwt', {})
-    
+
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=jwt_config.get('access_token_expire_minutes', 1440))
-    
+
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(
-        to_encode, 
-        jwt_config.get('secret_key'), 
+        to_encode,
+        jwt_config.get('secret_key'),
         algorithm=jwt_config.get('algorithm', 'HS256')
     )
     return encoded_jwt
 
 def verify_token(token: str) -> Optional[Dict]:
-    """验证 JWT token"""
+    """验证 JWT token（已验证过且未过期的 token 直接使用缓存结果）"""
+    config = load_config()
+    jwt_config = config.get('jwt', {})
+    secret_key = jwt_config.get('secret_key')
+    algorithm = jwt_config.get('algorithm', 'HS256')
+
+    # 密钥或算法变化后旧的缓存自然失效
+    digest = hashlib.sha256(f"{secret_key}\0{algorithm}\0{token}".encode('utf-8')).hexdigest()
+    now = time.time()
+    with _token_lock:
+        cached = _token_cache.get(digest)
+        if cached is not None:
+            payload, expires_at = cached
+            if now < expires_at:
+                _token_cache.move_to_end(digest)
+                return dict(payload)
+            del _token_cache[digest]
+
     try:
-        config = load_config()
-        jwt_config = config.get('jwt', {})
-        
-        payload = jwt.decode(
-            token, 
-            jwt_config.get('secret_key'), 
-            algorithms=[jwt_config.get('algorithm', 'HS256')]
-        )
-        return payload
+        payload = jwt.decode(token, secret_key, algorithms=[algorithm])
     except JWTError:
         return None
+
+    expires_at = now + TOKEN_CACHE_TTL
+    if isinstance(payload.get('exp'), (int, float)):
+        expires_at = min(expires_at, payload['exp'])
+    with _token_lock:
+        _token_cache[digest] = (dict(payload), expires_at)
+        _token_cache.move_to_end(digest)
+        while len(_token_cache) > TOKEN_CACHE_SIZE:
+            _token_cache.popitem(last=False)
+    return payload
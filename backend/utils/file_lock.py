@@ -0,0 +1,71 @@
+"""
+跨进程文件锁
+多个 worker 进程（uvicorn --workers N）修改同一个数据文件时，用 flock 串行化"读取-修改-写入"，
+写入本身仍是临时文件 + 原子替换，读取方不需要加锁。
+锁文件与数据文件同目录（.{文件名}.lock）；同一线程内可重入。
+不支持 flock 的平台（Windows）退化为进程内锁，只保证单进程部署的正确性。
+"""
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+class _LockState:
+    """单个锁文件在本进程内的状态"""
+
+    __slots__ = ('lock', 'depth', 'fd')
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.depth = 0
+        self.fd = None
+
+
+_states: Dict[str, _LockState] = {}
+_states_lock = threading.Lock()
+
+
+def lock_path(path: Path) -> Path:
+    """数据文件（或目录）对应的锁文件"""
+    return path.with_name(f".{path.name}.lock")
+
+
+@contextmanager
+def file_lock(path: Path):
+    """
+    独占锁定数据文件（跨进程、跨线程）
+    :param path: 被保护的数据文件或目录（不需要已存在）
+    """
+    target = lock_path(path)
+    key = str(target)
+    with _states_lock:
+        state = _states.get(key)
+        if state is None:
+            state = _states[key] = _LockState()
+
+    with state.lock:
+        if state.depth == 0 and fcntl is not None:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            fd = os.open(target, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            except BaseException:
+                os.close(fd)
+                raise
+            state.fd = fd
+        state.depth += 1
+        try:
+            yield
+        finally:
+            state.depth -= 1
+            if state.depth == 0 and state.fd is not None:
+                fcntl.flock(state.fd, fcntl.LOCK_UN)
+                os.close(state.fd)
+                state.fd = None
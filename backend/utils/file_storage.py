@@ -3,14 +3,104 @@
 用于读写 JSON 数据文件
 """
 import json
-from pathlib import Path
-from typing import List, Dict, Any, Optional
+import threading
+from typing import List, Dict, Any, Optional, Tuple, Callable
 import uuid
 from datetime import datetime
 
-# 数据目录
-ADMIN_DATA_DIR = Path(__file__).parent.parent.parent / "admin_data"
-USER_DATA_DIR = Path(__file__).parent.parent.parent / "user_data"
+from backend.config import STORAGE_BACKEND, ADMIN_DATA_DIR
+from backend.utils.async_io import write_json_file
+from backend.utils.file_lock import file_lock
+from backend.utils.metrics import timed_io
+
+
+def page_key(post: Dict[str, Any]) -> Tuple[str, str]:
+    """分页排序键：(创建时间, ID)"""
+    return post.get('created_at') or '', post.get('id') or ''
+
+
+def new_post_record(content_type: str, content: Dict[str, Any]) -> Dict[str, Any]:
+    """生成新内容记录（ID 和时间戳）"""
+    return {
+        'id': str(uuid.uuid4()),
+        'type': content_type,
+        'created_at': datetime.utcnow().isoformat(),
+        'updated_at': datetime.utcnow().isoformat(),
+        **content
+    }
+
+
+def updated_post_record(post: Dict[str, Any], post_id: str, content: Dict[str, Any]) -> Dict[str, Any]:
+    """合并更新内容（保留原有的创建时间和ID）"""
+    return {
+        **post,
+        **content,
+        'id': post_id,
+        'created_at': post.get('created_at'),
+        'updated_at': datetime.utcnow().isoformat()
+    }
+
+
+class _CacheEntry:
+    """单个内容类型的缓存条目"""
+
+    __slots__ = ('signature', 'revision', 'posts', 'published', 'published_keys', 'by_id')
+
+    def __init__(self, signature: Tuple[int, int, int], revision: int, posts: List[Dict[str, Any]]):
+        self.signature = signature
+        self.revision = revision
+        self.posts = posts
+        # 预先筛选并排序好的已发布内容（按 (创建时间, ID) 倒序，用于游标分页）
+        published = [p for p in posts if p.get('status') == 'published']
+        published.sort(key=page_key, reverse=True)
+        self.published = published
+        self.published_keys = [page_key(p) for p in published]
+        self.by_id = {p.get('id'): p for p in posts}
+
+
+# 进程内共享的内容缓存：content_type -> _CacheEntry
+_content_cache: Dict[str, _CacheEntry] = {}
+_cache_lock = threading.Lock()
+_cache_stats = {'hits': 0, 'misses': 0, 'writes': 0}
+
+# 内容变更监听器：listener(content_type, revision, event, payload)
+# event 取值：'reload'（payload 为全部 posts）、'upsert'（payload 为单条 post）、'delete'（payload 为 post_id）
+_change_listeners: List[Callable[[str, int, str, Any], None]] = []
+
+
+def add_change_listener(listener: Callable[[str, int, str, Any], None]):
+    """注册内容变更监听器（用于搜索索引等派生数据的增量更新）"""
+    if listener not in _change_listeners:
+        _change_listeners.append(listener)
+
+
+def notify_change(content_type: str, revision: int, event: str, payload: Any):
+    """通知所有监听器，单个监听器出错不影响数据写入"""
+    for listener in list(_change_listeners):
+        try:
+            listener(content_type, revision, event, payload)
+        except Exception as e:
+            print(f"内容变更监听器执行失败: {e}")
+
+
+def get_cache_stats() -> Dict[str, Any]:
+    """获取内容缓存的命中统计"""
+    with _cache_lock:
+        stats = dict(_cache_stats)
+        stats['types'] = {
+            content_type: {'revision': entry.revision, 'posts': len(entry.posts)}
+            for content_type, entry in _content_cache.items()
+        }
+    total = stats['hits'] + stats['misses']
+    stats['hit_ratio'] = round(stats['hits'] / total, 4) if total else 0.0
+    return stats
+
+
+def clear_cache():
+    """清空内容缓存（下次读取时重新加载文件）"""
+    with _cache_lock:
+        _content_cache.clear()
+
 
 class ContentStorage:
     """内容存储管理器"""
@@ -25,136 +115,219 @@ class ContentStorage:
         self._ensure_file_exists()
     
     def _ensure_file_exists(self):
-        """确保数据文件存在"""
+        """确保数据文件存在（已缓存的类型跳过检查）"""
+        if self.content_type in _content_cache:
+            return
         if not self.file_path.exists():
-            self._save_data({"posts": []})
+            self._create_empty()
+    
+    def _create_empty(self):
+        """创建空数据文件（加锁后再次检查，避免覆盖其他进程刚写入的数据）"""
+        with file_lock(self.file_path):
+            if not self.file_path.exists():
+                self._save_data({"posts": []})
+    
+    def _file_signature(self) -> Tuple[int, int, int]:
+        """
+        文件签名（inode + 修改时间 + 大小），用于判断缓存是否失效
+        每次写入都原子替换为新文件（新 inode），其他 worker 进程写入后本进程的缓存也会失效
+        """
+        stat = self.file_path.stat()
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
     
     def _load_data(self) -> Dict[str, Any]:
         """加载数据文件"""
-        with open(self.file_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        with timed_io('content_load') as io:
+            with open(self.file_path, 'rb') as f:
+                raw = f.read()
+            io.bytes = len(raw)
+            return json.loads(raw)
     
-    def _save_data(self, data: Dict[str, Any]):
-        """保存数据文件"""
-        with open(self.file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+    def _save_data(self, data: Dict[str, Any], event: str = 'reload', payload: Any = None):
+        """
+        保存数据文件（写临时文件后原子替换，读取方不会看到写了一半的文件），并用写入的数据刷新缓存
+        :param event: 通知监听器的变更类型，默认视为整体替换
+        :param payload: 变更内容（upsert 为单条 post，delete 为 post_id）
+        """
+        write_json_file(self.file_path, data, operation='content_save')
+        
+        signature = self._file_signature()
+        posts = data.get('posts', [])
+        with _cache_lock:
+            previous = _content_cache.get(self.content_type)
+            revision = previous.revision + 1 if previous else 1
+            _content_cache[self.content_type] = _CacheEntry(signature, revision, posts)
+            _cache_stats['writes'] += 1
+        
+        notify_change(self.content_type, revision, event, posts if event == 'reload' else payload)
+    
+    def _get_cached(self) -> _CacheEntry:
+        """获取缓存条目，文件被外部修改（mtime/大小变化）时重新加载"""
+        try:
+            signature = self._file_signature()
+        except FileNotFoundError:
+            self._create_empty()
+            signature = self._file_signature()
+        
+        with _cache_lock:
+            entry = _content_cache.get(self.content_type)
+            if entry is not None and entry.signature == signature:
+                _cache_stats['hits'] += 1
+                return entry
+            _cache_stats['misses'] += 1
+            revision = entry.revision + 1 if entry else 1
+        
+        data = self._load_data()
+        entry = _CacheEntry(signature, revision, data.get('posts', []))
+        with _cache_lock:
+            _content_cache[self.content_type] = entry
+        notify_change(self.content_type, revision, 'reload', entry.posts)
+        return entry
     
     def get_all(self) -> List[Dict[str, Any]]:
         """获取所有内容"""
-        data = self._load_data()
-        return data.get('posts', [])
+        return list(self._get_cached().posts)
+    
+    def get_published(self) -> List[Dict[str, Any]]:
+        """获取已发布的内容（按创建时间倒序）"""
+        return list(self._get_cached().published)
+    
+    def get_published_page(self, limit: int, after: Optional[Tuple[str, str]] = None
+                           ) -> Tuple[List[Dict[str, Any]], Optional[Tuple[str, str]]]:
+        """
+        游标分页获取已发布内容
+        :param after: 上一页最后一条的 (创建时间, ID)，None 表示第一页
+        :return: (本页内容, 下一页游标)，没有更多内容时游标为 None
+        """
+        entry = self._get_cached()
+        keys = entry.published_keys
+        start = 0
+        if after is not None:
+            # 倒序列表中第一个严格小于游标的位置
+            lo, hi = 0, len(keys)
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if keys[mid] >= after:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            start = lo
+        page = entry.published[start:start + limit]
+        next_key = keys[start + limit - 1] if start + limit < len(keys) else None
+        return page, next_key
+    
+    def get_signature(self) -> Tuple[int, int, int]:
+        """获取数据文件签名（inode + 修改时间 + 大小），不加载文件内容，用于生成 ETag"""
+        try:
+            return self._file_signature()
+        except FileNotFoundError:
+            self._create_empty()
+            return self._file_signature()
+    
+    def get_revision(self) -> int:
+        """获取当前数据版本号（每次重新加载或写入时递增）"""
+        return self._get_cached().revision
     
     def get_by_id(self, post_id: str) -> Optional[Dict[str, Any]]:
         """根据ID获取内容"""
-        posts = self.get_all()
-        for post in posts:
-            if post.get('id') == post_id:
-                return post
-        return None
+        return self._get_cached().by_id.get(post_id)
+    
+    def search(self, keyword: str, limit: Optional[int] = None,
+               offset: int = 0) -> Tuple[int, List[Dict[str, Any]]]:
+        """
+        搜索已发布内容（使用内存倒排索引）
+        :return: (匹配总数, 按相关度排序的第 offset 条起的 limit 条摘要结果)
+        """
+        from backend.services.search_index import search_index
+        return search_index.search(keyword, self.content_type, limit, offset)
     
     def create(self, content: Dict[str, Any]) -> Dict[str, Any]:
-        """创建新内容"""
-        data = self._load_data()
-        posts = data.get('posts', [])
-        
-        # 生成ID和时间戳
-        new_post = {
-            'id': str(uuid.uuid4()),
-            'type': self.content_type,
-            'created_at': datetime.utcnow().isoformat(),
-            'updated_at': datetime.utcnow().isoformat(),
-            **content
-        }
-        
-        posts.append(new_post)
-        data['posts'] = posts
-        self._save_data(data)
+        """创建新内容（读取-修改-写入期间持有文件锁，多个 worker 进程同时写入不会丢失修改）"""
+        with file_lock(self.file_path):
+            data = self._load_data()
+            posts = data.get('posts', [])
+            
+            # 生成ID和时间戳
+            new_post = new_post_record(self.content_type, content)
+            
+            posts.append(new_post)
+            data['posts'] = posts
+            self._save_data(data, 'upsert', new_post)
         
         return new_post
     
     def update(self, post_id: str, content: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """更新内容"""
-        data = self._load_data()
-        posts = data.get('posts', [])
-        
-        for i, post in enumerate(posts):
-            if post.get('id') == post_id:
-                # 保留原有的创建时间和ID
-                updated_post = {
-                    **post,
-                    **content,
-                    'id': post_id,
-                    'created_at': post.get('created_at'),
-                    'updated_at': datetime.utcnow().isoformat()
-                }
-                posts[i] = updated_post
-                data['posts'] = posts
-                self._save_data(data)
-                return updated_post
+        with file_lock(self.file_path):
+            data = self._load_data()
+            posts = data.get('posts', [])
+            
+            for i, post in enumerate(posts):
+                if post.get('id') == post_id:
+                    # 保留原有的创建时间和ID
+                    updated_post = updated_post_record(post, post_id, content)
+                    posts[i] = updated_post
+                    data['posts'] = posts
+                    self._save_data(data, 'upsert', updated_post)
+                    return updated_post
         
         return None
     
     def delete(self, post_id: str) -> bool:
         """删除内容"""
-        data = self._load_data()
-        posts = data.get('posts', [])
-        
-        new_posts = [p for p in posts if p.get('id') != post_id]
-        
-        if len(new_posts) < len(posts):
-            data['posts'] = new_posts
-            self._save_data(data)
-            return True
+        with file_lock(self.file_path):
+            data = self._load_data()
+            posts = data.get('posts', [])
+            
+            new_posts = [p for p in posts if p.get('id') != post_id]
+            
+            if len(new_posts) < len(posts):
+                data['posts'] = new_posts
+                self._save_data(data, 'delete', post_id)
+                return True
         
         return False
+    
+    def replace_all(self, data: Dict[str, Any]):
+        """整体替换数据（发布草稿时使用）"""
+        with file_lock(self.file_path):
+            self._save_data(data)
+
+
+def get_content_storage(content_type: str):
+    """
+    按配置 STORAGE_BACKEND 获取内容存储
+    json：ContentStorage（admin_data/{type}.json）；sqlite：SqliteContentStorage（DATABASE_URL）
+    """
+    if STORAGE_BACKEND == 'sqlite':
+        from backend.utils.sqlite_storage import SqliteContentStorage
+        return SqliteContentStorage(content_type)
+    return ContentStorage(content_type)
 
 
 class ChatStorage:
-    """聊天消息存储管理器"""
+    """聊天消息存储管理器（基于追加写入的聊天日志）"""
     
     def __init__(self):
-        self.file_path = USER_DATA_DIR / "chat_messages.json"
-        self._ensure_file_exists()
-    
-    def _ensure_file_exists(self):
-        """确保数据文件存在"""
-        if not self.file_path.exists():
-            self._save_data({"messages": []})
-    
-    def _load_data(self) -> Dict[str, Any]:
-        """加载数据文件"""
-        with open(self.file_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    
-    def _save_data(self, data: Dict[str, Any]):
-        """保存数据文件"""
-        with open(self.file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        from backend.services.chat_log import chat_log
+        self.log = chat_log
     
     def get_recent(self, limit: int = 100) -> List[Dict[str, Any]]:
         """获取最近的聊天消息"""
-        data = self._load_data()
-        messages = data.get('messages', [])
-        return messages[-limit:] if len(messages) > limit else messages
+        return self.log.recent(limit)
     
     def add_message(self, message: Dict[str, Any]) -> Dict[str, Any]:
         """添加聊天消息"""
-        data = self._load_data()
-        messages = data.get('messages', [])
-        
         new_message = {
-            'id': str(uuid.uuid4()),
             'timestamp': datetime.utcnow().isoformat(),
             **message
         }
-        
-        messages.append(new_message)
-        
-        # 只保留最近500条消息
-        if len(messages) > 500:
-            messages = messages[-500:]
-        
-        data['messages'] = messages
-        self._save_data(data)
-        
-        return new_message
+        return self.log.append_sync(new_message)
+    
+    async def add_message_async(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        """异步添加聊天消息（并发消息合并刷盘，写入在文件读写线程池中执行）"""
+        new_message = {
+            'timestamp': datetime.utcnow().isoformat(),
+            **message
+        }
+        return await self.log.append(new_message)
@@ -0,0 +1,69 @@
+"""
+HTTP 缓存工具
+根据数据版本（文件 inode+修改时间+大小、消息ID等）生成强 ETag，
+请求带 If-None-Match 且未变化时直接返回 304，无需加载和序列化数据
+"""
+import hashlib
+from pathlib import Path
+from typing import Optional, Tuple
+
+from fastapi import Request, Response
+
+# 各接口的 Cache-Control 策略（统一在此配置）
+CACHE_POLICIES = {
+    # 内容列表：允许缓存，但每次使用前向服务器确认（命中时 304）
+    'content': 'public, no-cache',
+    # 公告：同上
+    'announcement': 'public, no-cache',
+    # 书籍滚动文本：变化很少，允许直接缓存 5 分钟
+    'book': 'public, max-age=300',
+    # 聊天消息：每次确认
+    'chat': 'no-cache',
+    # 首页启动数据：每次确认
+    'bootstrap': 'public, no-cache',
+}
+
+
+def file_version(path: Path) -> Optional[Tuple[int, int, int]]:
+    """
+    文件版本（inode + 修改时间 + 大小），文件不存在时返回 None
+    数据文件通过原子替换写入，每次写入都会换新的 inode，其他进程据此可靠地发现变化
+    """
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+def make_etag(*parts) -> str:
+    """由版本信息生成强 ETag"""
+    digest = hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()[:20]
+    return f'"{digest}"'
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """判断请求中的 If-None-Match 是否与当前 ETag 匹配"""
+    header = request.headers.get('if-none-match')
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    candidates = [tag.strip() for tag in header.split(',')]
+    # 弱比较：忽略 W/ 前缀（反向代理压缩后可能把强 ETag 变为弱 ETag）
+    return any(tag == etag or tag == f'W/{etag}' for tag in candidates)
+
+
+def conditional_response(request: Request, response: Response, policy: str, *version) -> Optional[Response]:
+    """
+    处理条件请求
+    未变化时返回 304 响应；否则在 response 上设置 ETag 和 Cache-Control 并返回 None
+    :param policy: CACHE_POLICIES 中的策略名，同时作为 ETag 的命名空间
+    :param version: 数据版本（以及影响响应内容的查询参数）
+    """
+    etag = make_etag(policy, *version)
+    headers = {'ETag': etag, 'Cache-Control': CACHE_POLICIES[policy]}
+    if is_not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
@@ -0,0 +1,179 @@
+"""
+JSON Patch（RFC 6902）
+支持 add / remove / replace / move / copy / test 六种操作，路径使用 JSON Pointer（RFC 6901）。
+应用补丁时不修改原文档：只复制路径上经过的对象和数组（未改动的部分与原文档共享），
+任何一个操作失败都不会留下改了一半的文档。
+"""
+import copy
+from typing import Any, Dict, List, Tuple
+
+
+class JsonPatchError(ValueError):
+    """补丁格式错误或路径不存在"""
+    pass
+
+
+class JsonPatchTestFailed(JsonPatchError):
+    """test 操作的值不一致"""
+    pass
+
+
+_MISSING = object()
+
+
+def parse_pointer(pointer: str) -> List[str]:
+    """解析 JSON Pointer 为路径片段（~1 -> /，~0 -> ~）"""
+    if not isinstance(pointer, str):
+        raise JsonPatchError("路径必须是字符串")
+    if pointer == '':
+        return []
+    if not pointer.startswith('/'):
+        raise JsonPatchError(f"无效的路径: {pointer}")
+    return [part.replace('~1', '/').replace('~0', '~') for part in pointer[1:].split('/')]
+
+
+def _array_index(array: list, token: str, allow_end: bool) -> int:
+    """解析数组下标；allow_end 时 '-' 和 len(array) 表示末尾"""
+    if token == '-' and allow_end:
+        return len(array)
+    if not token.isdigit() or (token != '0' and token.startswith('0')):
+        raise JsonPatchError(f"无效的数组下标: {token}")
+    index = int(token)
+    if index > len(array) or (index == len(array) and not allow_end):
+        raise JsonPatchError(f"数组下标越界: {token}")
+    return index
+
+
+def _get(document: Any, parts: List[str]) -> Any:
+    """读取路径上的值"""
+    node = document
+    for token in parts:
+        if isinstance(node, dict):
+            if token not in node:
+                raise JsonPatchError(f"路径不存在: /{'/'.join(parts)}")
+            node = node[token]
+        elif isinstance(node, list):
+            node = node[_array_index(node, token, allow_end=False)]
+        else:
+            raise JsonPatchError(f"路径不存在: /{'/'.join(parts)}")
+    return node
+
+
+def _copy_path(document: Any, parts: List[str]) -> Tuple[Any, Any]:
+    """
+    浅复制根节点到父节点路径上的每一层容器
+    :return: (新的根节点, 新的父节点)
+    """
+    root = _shallow_copy(document)
+    parent = root
+    for token in parts[:-1]:
+        if isinstance(parent, dict):
+            if token not in parent:
+                raise JsonPatchError(f"路径不存在: /{'/'.join(parts)}")
+            child = _shallow_copy(parent[token])
+            parent[token] = child
+        elif isinstance(parent, list):
+            index = _array_index(parent, token, allow_end=False)
+            child = _shallow_copy(parent[index])
+            parent[index] = child
+        else:
+            raise JsonPatchError(f"路径不存在: /{'/'.join(parts)}")
+        parent = child
+    if not isinstance(parent, (dict, list)):
+        raise JsonPatchError(f"路径不存在: /{'/'.join(parts)}")
+    return root, parent
+
+
+def _shallow_copy(node: Any) -> Any:
+    if isinstance(node, dict):
+        return dict(node)
+    if isinstance(node, list):
+        return list(node)
+    return node
+
+
+def _add(document: Any, parts: List[str], value: Any) -> Any:
+    if not parts:
+        return value
+    root, parent = _copy_path(document, parts)
+    token = parts[-1]
+    if isinstance(parent, dict):
+        parent[token] = value
+    else:
+        parent.insert(_array_index(parent, token, allow_end=True), value)
+    return root
+
+
+def _remove(document: Any, parts: List[str]) -> Any:
+    if not parts:
+        raise JsonPatchError("不能删除根节点")
+    root, parent = _copy_path(document, parts)
+    token = parts[-1]
+    if isinstance(parent, dict):
+        if token not in parent:
+            raise JsonPatchError(f"路径不存在: /{'/'.join(parts)}")
+        del parent[token]
+    else:
+        del parent[_array_index(parent, token, allow_end=False)]
+    return root
+
+
+def _replace(document: Any, parts: List[str], value: Any) -> Any:
+    if not parts:
+        return value
+    root, parent = _copy_path(document, parts)
+    token = parts[-1]
+    if isinstance(parent, dict):
+        if token not in parent:
+            raise JsonPatchError(f"路径不存在: /{'/'.join(parts)}")
+        parent[token] = value
+    else:
+        parent[_array_index(parent, token, allow_end=False)] = value
+    return root
+
+
+def apply_operation(document: Any, operation: Dict[str, Any]) -> Any:
+    """应用单个操作，返回新文档"""
+    if not isinstance(operation, dict):
+        raise JsonPatchError("补丁操作必须是对象")
+    op = operation.get('op')
+    parts = parse_pointer(operation.get('path'))
+    value = operation.get('value', _MISSING)
+    if op in ('add', 'replace', 'test') and value is _MISSING:
+        raise JsonPatchError(f"{op} 操作缺少 value")
+
+    if op == 'add':
+        return _add(document, parts, value)
+    if op == 'remove':
+        return _remove(document, parts)
+    if op == 'replace':
+        return _replace(document, parts, value)
+    if op in ('move', 'copy'):
+        from_parts = parse_pointer(operation.get('from'))
+        if op == 'move' and parts[:len(from_parts)] == from_parts and len(parts) > len(from_parts):
+            raise JsonPatchError("不能把节点移动到自己的子节点")
+        moved = _get(document, from_parts)
+        if op == 'move':
+            if from_parts == parts:
+                return document
+            document = _remove(document, from_parts)
+        else:
+            moved = copy.deepcopy(moved)
+        return _add(document, parts, moved)
+    if op == 'test':
+        if _get(document, parts) != value:
+            raise JsonPatchTestFailed(f"test 失败: {operation.get('path')}")
+        return document
+    raise JsonPatchError(f"不支持的操作: {op}")
+
+
+def apply_patch(document: Any, operations: List[Dict[str, Any]]) -> Any:
+    """
+    按顺序应用补丁，返回新文档（原文档不变）
+    任一操作失败时抛出 JsonPatchError，整个补丁不生效
+    """
+    if not isinstance(operations, list):
+        raise JsonPatchError("补丁必须是操作数组")
+    for operation in operations:
+        document = apply_operation(document, operation)
+    return document
@@ -0,0 +1,214 @@
+"""
+运行指标
+进程内记录请求数、延迟/响应大小直方图和存储 I/O 耗时，以 Prometheus 文本格式输出（/api/metrics）。
+每次记录只做一次加锁和一次二分查找，可以在生产环境常开。
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+# 直方图分桶（上界）
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+_HELP = {
+    'weirdcore_http_requests_total': ('counter', 'HTTP 请求数'),
+    'weirdcore_http_request_duration_seconds': ('histogram', 'HTTP 请求处理耗时'),
+    'weirdcore_http_response_size_bytes': ('histogram', 'HTTP 响应体大小'),
+    'weirdcore_io_duration_seconds': ('histogram', '存储/图片处理操作耗时'),
+    'weirdcore_io_bytes_total': ('counter', '存储/图片处理操作读写的字节数'),
+    'weirdcore_image_uploads_total': ('counter', '图片上传数（encoded 为重新编码，deduplicated 为命中已有图片）'),
+    'weirdcore_response_cache_total': ('counter', '预序列化响应缓存查找次数（hit/miss）'),
+}
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class _Histogram:
+    """固定分桶的直方图（计数为非累积，输出时累加）"""
+
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """指标注册表"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._gauges: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, _Histogram]] = {}
+        self._help: Dict[str, Tuple[str, str]] = dict(_HELP)
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        """计数器累加"""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    def set_gauge(self, name: str, value: float, help_text: str = '', **labels):
+        """设置瞬时值（在输出指标时采集）"""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._gauges.setdefault(name, {})[key] = value
+            if help_text and name not in self._help:
+                self._help[name] = ('gauge', help_text)
+
+    def observe(self, name: str, value: float, buckets: Tuple[float, ...] = LATENCY_BUCKETS, **labels):
+        """记录一次直方图观测值"""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = _Histogram(buckets)
+            histogram.observe(value)
+
+    def reset(self):
+        """清空全部指标"""
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+
+    def render(self) -> str:
+        """输出 Prometheus 文本格式"""
+        lines: List[str] = []
+        with self._lock:
+            for kind, metrics in (('counter', self._counters), ('gauge', self._gauges)):
+                for name in sorted(metrics):
+                    self._render_header(lines, name, kind)
+                    for key, value in sorted(metrics[name].items()):
+                        lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+            for name in sorted(self._histograms):
+                self._render_header(lines, name, 'histogram')
+                for key, histogram in sorted(self._histograms[name].items()):
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_format_labels(key, le=_format_value(bound))} {cumulative}")
+                    lines.append(f"{name}_bucket{_format_labels(key, le='+Inf')} {histogram.count}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {_format_value(histogram.sum)}")
+                    lines.append(f"{name}_count{_format_labels(key)} {histogram.count}")
+        return '\n'.join(lines) + '\n'
+
+    def _render_header(self, lines: List[str], name: str, kind: str):
+        kind, help_text = self._help.get(name, (kind, ''))
+        if help_text:
+            lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(key: LabelKey, **extra) -> str:
+    pairs = list(key) + list(extra.items())
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(str(v))}"' for k, v in pairs) + '}'
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value)) if abs(value) < 1e15 else repr(value)
+    return repr(value)
+
+
+# 全局注册表
+metrics = MetricsRegistry()
+
+
+class _IOTimer:
+    """timed_io 的计时结果，调用方在块内设置 bytes"""
+
+    __slots__ = ('bytes',)
+
+    def __init__(self):
+        self.bytes = 0
+
+
+@contextmanager
+def timed_io(operation: str):
+    """
+    记录一次存储/图片处理操作的耗时和字节数
+    用法：
+        with timed_io('content_load') as io:
+            raw = f.read()
+            io.bytes = len(raw)
+    """
+    timer = _IOTimer()
+    start = time.perf_counter()
+    try:
+        yield timer
+    finally:
+        metrics.observe('weirdcore_io_duration_seconds', time.perf_counter() - start, operation=operation)
+        if timer.bytes:
+            metrics.inc('weirdcore_io_bytes_total', timer.bytes, operation=operation)
+
+
+class MetricsMiddleware:
+    """
+    记录每个路由的请求数、耗时和响应大小（纯 ASGI 中间件，不影响流式响应）
+    路由标签使用路径模板（如 /api/content/{content_type}），未匹配的请求记为 unmatched
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._route_names: Dict[int, str] = {}
+
+    def _route_label(self, scope) -> str:
+        endpoint = scope.get('endpoint')
+        if endpoint is None:
+            return 'unmatched'
+        label = self._route_names.get(id(endpoint))
+        if label is None:
+            # 路由在应用启动后不再变化，首次遇到时建立 endpoint -> 路径模板 的映射
+            for route in scope['app'].routes:
+                target = getattr(route, 'endpoint', None) or getattr(route, 'app', None)
+                if target is not None:
+                    self._route_names.setdefault(id(target), route.path)
+            label = self._route_names.setdefault(id(endpoint), 'unknown')
+        return label
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            elif message['type'] == 'http.response.body':
+                size += len(message.get('body', b''))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            method = scope['method']
+            route = self._route_label(scope)
+            metrics.inc('weirdcore_http_requests_total', method=method, route=route, status=str(status))
+            metrics.observe('weirdcore_http_request_duration_seconds', time.perf_counter() - start,
+                            method=method, route=route)
+            metrics.observe('weirdcore_http_response_size_bytes', size, SIZE_BUCKETS, method=method, route=route)
@@ -0,0 +1,84 @@
+"""
+请求体大小限制
+上传接口在接收请求体时按实际收到的字节数计算（纯 ASGI 中间件，包括没有 Content-Length 的分块传输请求），
+超出上限立即返回 413 并停止接收，不会先把整个请求体解析到临时文件再报错；
+声明的 Content-Length 已超出上限时直接拒绝。单个文件的大小在处理时另外检查。
+"""
+import json
+from typing import Dict, Optional
+
+
+class RequestSizeLimitMiddleware:
+    """按路径前缀限制请求体大小（多个前缀匹配时取最长的），超出时返回 413"""
+
+    def __init__(self, app, limits: Dict[str, int]):
+        """
+        :param limits: 路径前缀 -> 最大字节数
+        """
+        self.app = app
+        # 长前缀优先（/api/upload/images 不落入 /api/upload/image 的限制）
+        self.limits = sorted(limits.items(), key=lambda item: len(item[0]), reverse=True)
+
+    def _limit(self, path: str) -> Optional[int]:
+        for prefix, limit in self.limits:
+            if path.startswith(prefix):
+                return limit
+        return None
+
+    @staticmethod
+    async def _reject(send, limit: int):
+        """返回 413 并关闭连接"""
+        body = json.dumps(
+            {'detail': f"请求体过大（上限 {limit // 1024 // 1024}MB）"}, ensure_ascii=False
+        ).encode('utf-8')
+        await send({
+            'type': 'http.response.start',
+            'status': 413,
+            'headers': [(b'content-type', b'application/json'),
+                        (b'content-length', str(len(body)).encode()),
+                        (b'connection', b'close')],
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def __call__(self, scope, receive, send):
+        limit = self._limit(scope['path']) if scope['type'] == 'http' else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        length = dict(scope['headers']).get(b'content-length')
+        if length is not None and length.isdigit() and int(length) > limit:
+            await self._reject(send, limit)
+            return
+
+        received = 0
+        exceeded = False
+        started = False
+        rejected = False
+
+        async def limited_receive():
+            nonlocal received, exceeded, rejected
+            if exceeded:
+                return {'type': 'http.disconnect'}
+            message = await receive()
+            if message['type'] == 'http.request':
+                received += len(message.get('body', b''))
+                if received > limit:
+                    # 停止接收：应用按客户端断开处理，已开始的响应无法再改为 413
+                    exceeded = True
+                    if not started:
+                        await self._reject(send, limit)
+                        rejected = True
+                    return {'type': 'http.disconnect'}
+            return message
+
+        async def guarded_send(message):
+            nonlocal started
+            if rejected:
+                # 已返回 413，丢弃应用随后产生的错误响应
+                return
+            if message['type'] == 'http.response.start':
+                started = True
+            await send(message)
+
+        await self.app(scope, limited_receive, guarded_send)
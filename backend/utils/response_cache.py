@@ -0,0 +1,102 @@
+"""
+预序列化响应缓存
+读取接口按数据版本缓存已编码的 JSON 响应体，版本未变化时直接返回缓存的字节，
+跳过每次请求的响应模型校验、jsonable_encoder 和 json.dumps；数据写入后版本变化，下次请求时重新生成。
+安装了 orjson 时用它编码（可选依赖，未安装时使用标准库 json，输出相同）。
+"""
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from fastapi import Response
+
+from backend.config import RESPONSE_CACHE_MAX_BYTES
+from backend.utils.metrics import metrics
+
+try:
+    import orjson
+except ImportError:  # 可选依赖，未安装时使用标准库 json
+    orjson = None
+
+
+def dumps(value: Any) -> bytes:
+    """编码为紧凑的 UTF-8 JSON（与 FastAPI 默认的 JSONResponse 格式一致）"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(value)
+        except TypeError:
+            # orjson 不支持的值（如超过 64 位的整数）交给标准库处理
+            pass
+    return json.dumps(value, ensure_ascii=False, allow_nan=False, separators=(',', ':')).encode('utf-8')
+
+
+class CachedBody:
+    """缓存的响应体和附加响应头（如分页游标）"""
+
+    __slots__ = ('version', 'body', 'headers')
+
+    def __init__(self, version: Hashable, body: bytes, headers: Dict[str, str]):
+        self.version = version
+        self.body = body
+        self.headers = headers
+
+
+class ResponseCache:
+    """按 (接口, 参数) 缓存最新版本的响应体，总大小超出容量时淘汰最久未使用的条目"""
+
+    def __init__(self, max_bytes: int = RESPONSE_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, CachedBody]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def lookup(self, key: Hashable, version: Hashable) -> Optional[CachedBody]:
+        """查找当前版本的缓存（只访问内存，可以在事件循环中直接调用）"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.version != version:
+                metrics.inc('weirdcore_response_cache_total', result='miss')
+                return None
+            self._entries.move_to_end(key)
+        metrics.inc('weirdcore_response_cache_total', result='hit')
+        return entry
+
+    def build(self, key: Hashable, version: Hashable,
+              produce: Callable[[], Tuple[Any, Dict[str, str]]]) -> CachedBody:
+        """
+        生成并缓存响应体（在文件读写线程中执行）
+        :param produce: 返回 (响应数据, 附加响应头)
+        """
+        value, headers = produce()
+        entry = CachedBody(version, dumps(value), headers)
+        size = len(entry.body)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._total_bytes -= len(previous.body)
+            # 超过容量的响应不缓存
+            if size <= self.max_bytes:
+                self._entries[key] = entry
+                self._total_bytes += size
+                while self._total_bytes > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._total_bytes -= len(evicted.body)
+        return entry
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self._total_bytes}
+
+
+def json_bytes_response(entry: CachedBody, response: Response) -> Response:
+    """返回缓存的响应体，带上已设置在 response 上的响应头（ETag、Cache-Control 等）"""
+    return Response(
+        content=entry.body,
+        media_type="application/json",
+        headers={**response.headers, **entry.headers}
+    )
+
+
+# 全局响应缓存实例
+response_cache = ResponseCache()
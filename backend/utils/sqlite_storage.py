@@ -0,0 +1,287 @@
+"""
+SQLite 内容存储
+与 ContentStorage（JSON 文件）提供相同的方法，通过 STORAGE_BACKEND=sqlite 启用。
+数据库使用 WAL 模式；(type, status, created_at, id) 索引支持列表和游标分页，
+posts_fts（FTS5 trigram）支持任意子串搜索。
+"""
+import json
+import threading
+import time
+from typing import List, Dict, Any, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from backend.database import Base
+from backend.models import Post, ContentRevision
+from backend.utils.file_storage import page_key, notify_change, new_post_record, updated_post_record
+from backend.utils.metrics import timed_io
+
+# FTS5 全文索引（外部内容表，触发器保持与 posts 同步）
+_FTS_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5(
+        title, content, content='posts', content_rowid='seq', tokenize='trigram'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS posts_fts_ai AFTER INSERT ON posts BEGIN
+        INSERT INTO posts_fts(rowid, title, content) VALUES (new.seq, new.title, new.content);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS posts_fts_ad AFTER DELETE ON posts BEGIN
+        INSERT INTO posts_fts(posts_fts, rowid, title, content) VALUES ('delete', old.seq, old.title, old.content);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS posts_fts_au AFTER UPDATE ON posts BEGIN
+        INSERT INTO posts_fts(posts_fts, rowid, title, content) VALUES ('delete', old.seq, old.title, old.content);
+        INSERT INTO posts_fts(rowid, title, content) VALUES (new.seq, new.title, new.content);
+    END""",
+]
+
+# trigram 分词至少需要 3 个字符，更短的关键词直接扫描
+FTS_MIN_QUERY_LENGTH = 3
+
+_INSERT_SQL = text(
+    "INSERT INTO posts (id, type, status, title, content, created_at, updated_at, data) "
+    "VALUES (:id, :type, :status, :title, :content, :created_at, :updated_at, :data)"
+)
+
+_engine = None
+# 已初始化表结构的引擎 -> 是否支持 FTS5
+_schema_ready: Dict[int, bool] = {}
+_schema_lock = threading.Lock()
+
+
+def get_engine():
+    """获取当前使用的数据库引擎（默认为 backend.database.engine）"""
+    global _engine
+    if _engine is None:
+        from backend.database import engine
+        _engine = engine
+    return _engine
+
+
+def use_engine(engine):
+    """切换数据库引擎（迁移工具和基准测试使用）"""
+    global _engine
+    _engine = engine
+
+
+def ensure_schema(engine) -> bool:
+    """创建表、索引和全文索引（每个引擎只执行一次），返回是否支持 FTS5"""
+    key = id(engine)
+    if key in _schema_ready:
+        return _schema_ready[key]
+    with _schema_lock:
+        if key not in _schema_ready:
+            Base.metadata.create_all(engine, tables=[Post.__table__, ContentRevision.__table__])
+            fts = True
+            try:
+                with engine.begin() as conn:
+                    for ddl in _FTS_DDL:
+                        conn.execute(text(ddl))
+            except OperationalError as e:
+                print(f"SQLite 不支持 FTS5 trigram，搜索退化为逐条扫描: {e}")
+                fts = False
+            _schema_ready[key] = fts
+    return _schema_ready[key]
+
+
+def _row_values(content_type: str, post: Dict[str, Any]) -> Dict[str, Any]:
+    """把一篇内容转换为 posts 表的一行"""
+    return {
+        'id': post.get('id'),
+        'type': content_type,
+        'status': post.get('status') or '',
+        'title': post.get('title'),
+        'content': post.get('content'),
+        'created_at': post.get('created_at') or '',
+        'updated_at': post.get('updated_at'),
+        'data': json.dumps(post, ensure_ascii=False),
+    }
+
+
+def dedupe_posts(posts: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """
+    去掉重复 ID 的文章（同一 ID 保留最后一条，位置也取最后一次出现的位置）
+    posts 表的 (type, id) 唯一，旧 JSON 文件中的重复 ID 直接写入会使整个事务失败
+    :return: (去重后的文章, 出现重复的 ID)
+    """
+    seen = set()
+    duplicates = []
+    kept = []
+    for post in reversed(posts):
+        post_id = post.get('id')
+        if post_id in seen:
+            if post_id not in duplicates:
+                duplicates.append(post_id)
+            continue
+        seen.add(post_id)
+        kept.append(post)
+    kept.reverse()
+    duplicates.reverse()
+    return kept, duplicates
+
+
+class SqliteContentStorage:
+    """SQLite 内容存储管理器（方法与 ContentStorage 一致）"""
+
+    def __init__(self, content_type: str, engine=None):
+        """
+        初始化存储管理器
+        :param content_type: 内容类型 (research, media, activity, shop)
+        """
+        self.content_type = content_type
+        self.engine = engine or get_engine()
+        self.fts = ensure_schema(self.engine)
+
+    # ---------- 内部工具 ----------
+
+    def _bump_revision(self, conn) -> int:
+        """在当前事务内递增本类型的数据版本"""
+        params = {'type': self.content_type, 'ns': time.time_ns()}
+        updated = conn.execute(text(
+            "UPDATE content_revisions SET revision = revision + 1, updated_ns = :ns WHERE type = :type"
+        ), params).rowcount
+        if not updated:
+            conn.execute(text(
+                "INSERT INTO content_revisions (type, revision, updated_ns) VALUES (:type, 1, :ns)"
+            ), params)
+        return conn.execute(text(
+            "SELECT revision FROM content_revisions WHERE type = :type"
+        ), params).scalar_one()
+
+    def _query_posts(self, sql: str, **params) -> List[Dict[str, Any]]:
+        with timed_io('sqlite_query'):
+            with self.engine.connect() as conn:
+                rows = conn.execute(text(sql), {'type': self.content_type, **params}).fetchall()
+            return [json.loads(row[0]) for row in rows]
+
+    # ---------- 读取 ----------
+
+    def get_all(self) -> List[Dict[str, Any]]:
+        """获取所有内容（按写入顺序）"""
+        return self._query_posts("SELECT data FROM posts WHERE type = :type ORDER BY seq")
+
+    def get_published(self) -> List[Dict[str, Any]]:
+        """获取已发布的内容（按创建时间倒序）"""
+        return self._query_posts(
+            "SELECT data FROM posts WHERE type = :type AND status = 'published' "
+            "ORDER BY created_at DESC, id DESC"
+        )
+
+    def get_published_page(self, limit: int, after: Optional[Tuple[str, str]] = None
+                           ) -> Tuple[List[Dict[str, Any]], Optional[Tuple[str, str]]]:
+        """
+        游标分页获取已发布内容
+        :param after: 上一页最后一条的 (创建时间, ID)，None 表示第一页
+        :return: (本页内容, 下一页游标)，没有更多内容时游标为 None
+        """
+        if after is None:
+            posts = self._query_posts(
+                "SELECT data FROM posts WHERE type = :type AND status = 'published' "
+                "ORDER BY created_at DESC, id DESC LIMIT :limit",
+                limit=limit + 1
+            )
+        else:
+            posts = self._query_posts(
+                "SELECT data FROM posts WHERE type = :type AND status = 'published' "
+                "AND (created_at, id) < (:created_at, :id) "
+                "ORDER BY created_at DESC, id DESC LIMIT :limit",
+                created_at=after[0], id=after[1], limit=limit + 1
+            )
+        if len(posts) > limit:
+            posts = posts[:limit]
+            return posts, page_key(posts[-1])
+        return posts, None
+
+    def get_signature(self) -> Tuple[int, int]:
+        """获取数据签名（最后写入时间 + 版本号），用于生成 ETag"""
+        with self.engine.connect() as conn:
+            row = conn.execute(text(
+                "SELECT updated_ns, revision FROM content_revisions WHERE type = :type"
+            ), {'type': self.content_type}).first()
+        return (row[0], row[1]) if row else (0, 0)
+
+    def get_revision(self) -> int:
+        """获取当前数据版本号（每次写入时递增）"""
+        return self.get_signature()[1]
+
+    def get_by_id(self, post_id: str) -> Optional[Dict[str, Any]]:
+        """根据ID获取内容"""
+        posts = self._query_posts("SELECT data FROM posts WHERE type = :type AND id = :id", id=post_id)
+        return posts[0] if posts else None
+
+    def search(self, keyword: str, limit: Optional[int] = None,
+               offset: int = 0) -> Tuple[int, List[Dict[str, Any]]]:
+        """
+        搜索已发布内容（标题或正文包含关键词，忽略大小写）
+        排序、分页和摘要与内存倒排索引一致
+        :return: (匹配总数, 按相关度排序的第 offset 条起的 limit 条摘要结果)
+        """
+        from backend.services.search_index import match_relevance, top_matches
+
+        keyword = keyword.lower()
+        if self.fts and len(keyword) >= FTS_MIN_QUERY_LENGTH:
+            phrase = '"' + keyword.replace('"', '""') + '"'
+            candidates = self._query_posts(
+                "SELECT data FROM posts WHERE seq IN "
+                "(SELECT rowid FROM posts_fts WHERE posts_fts MATCH :phrase) "
+                "AND type = :type AND status = 'published'",
+                phrase=phrase
+            )
+        else:
+            candidates = self.get_published()
+
+        scored = ((match_relevance(keyword, post.get('title'), post.get('content')), post) for post in candidates)
+        return top_matches(keyword, scored, self.content_type, limit, offset)
+
+    # ---------- 写入 ----------
+
+    def create(self, content: Dict[str, Any]) -> Dict[str, Any]:
+        """创建新内容"""
+        new_post = new_post_record(self.content_type, content)
+        with timed_io('sqlite_write'), self.engine.begin() as conn:
+            conn.execute(_INSERT_SQL, _row_values(self.content_type, new_post))
+            revision = self._bump_revision(conn)
+        notify_change(self.content_type, revision, 'upsert', new_post)
+        return new_post
+
+    def update(self, post_id: str, content: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """更新内容"""
+        with timed_io('sqlite_write'), self.engine.begin() as conn:
+            row = conn.execute(text(
+                "SELECT data FROM posts WHERE type = :type AND id = :id"
+            ), {'type': self.content_type, 'id': post_id}).first()
+            if row is None:
+                return None
+            updated_post = updated_post_record(json.loads(row[0]), post_id, content)
+            values = _row_values(self.content_type, updated_post)
+            conn.execute(text(
+                "UPDATE posts SET status = :status, title = :title, content = :content, "
+                "created_at = :created_at, updated_at = :updated_at, data = :data "
+                "WHERE type = :type AND id = :id"
+            ), values)
+            revision = self._bump_revision(conn)
+        notify_change(self.content_type, revision, 'upsert', updated_post)
+        return updated_post
+
+    def delete(self, post_id: str) -> bool:
+        """删除内容"""
+        with timed_io('sqlite_write'), self.engine.begin() as conn:
+            deleted = conn.execute(text(
+                "DELETE FROM posts WHERE type = :type AND id = :id"
+            ), {'type': self.content_type, 'id': post_id}).rowcount
+            if not deleted:
+                return False
+            revision = self._bump_revision(conn)
+        notify_change(self.content_type, revision, 'delete', post_id)
+        return True
+
+    def replace_all(self, data: Dict[str, Any]):
+        """整体替换数据（发布草稿、迁移时使用）；重复 ID 的文章保留最后一条"""
+        posts, duplicates = dedupe_posts(data.get('posts', []))
+        if duplicates:
+            print(f"⚠️ {self.content_type} 中存在重复的文章ID，保留最后一条: {', '.join(map(str, duplicates))}")
+        with timed_io('sqlite_write'), self.engine.begin() as conn:
+            conn.execute(text("DELETE FROM posts WHERE type = :type"), {'type': self.content_type})
+            if posts:
+                conn.execute(_INSERT_SQL, [_row_values(self.content_type, p) for p in posts])
+            revision = self._bump_revision(conn)
+        notify_change(self.content_type, revision, 'reload', posts)
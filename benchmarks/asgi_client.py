@@ -0,0 +1,114 @@
+"""
+进程内 ASGI 客户端
+直接调用 ASGI 应用（不经过网络和 HTTP 解析），支持 lifespan 启动/关闭事件。
+只用于基准测试，不依赖 httpx 等第三方库。
+"""
+import asyncio
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+
+class ASGIClient:
+    """最小的 ASGI HTTP 客户端"""
+
+    def __init__(self, app):
+        self.app = app
+        self._lifespan_task: Optional[asyncio.Task] = None
+        self._lifespan_queue: Optional[asyncio.Queue] = None
+        self._lifespan_events: Optional[asyncio.Queue] = None
+
+    # ---------- lifespan ----------
+
+    async def _lifespan_message(self, message_type: str) -> Dict:
+        await self._lifespan_queue.put({'type': message_type})
+        return await self._lifespan_events.get()
+
+    async def startup(self):
+        """执行应用的启动事件"""
+        self._lifespan_queue = asyncio.Queue()
+        self._lifespan_events = asyncio.Queue()
+        scope = {'type': 'lifespan', 'asgi': {'version': '3.0'}, 'state': {}}
+        self._lifespan_task = asyncio.ensure_future(
+            self.app(scope, self._lifespan_queue.get, self._lifespan_events.put)
+        )
+        message = await self._lifespan_message('lifespan.startup')
+        if message['type'] != 'lifespan.startup.complete':
+            raise RuntimeError(f"应用启动失败: {message.get('message')}")
+
+    async def shutdown(self):
+        """执行应用的关闭事件"""
+        if self._lifespan_task is None:
+            return
+        await self._lifespan_message('lifespan.shutdown')
+        await self._lifespan_task
+        self._lifespan_task = None
+
+    # ---------- HTTP ----------
+
+    async def request(self, method: str, url: str, headers: Optional[Dict[str, str]] = None,
+                      body: bytes = b'', first_chunk: bool = False) -> Tuple[int, Dict[str, str], bytes]:
+        """
+        发送一个请求
+        :param first_chunk: 收到第一段非空响应体后即断开连接（用于 SSE 等不会结束的流式响应）
+        :return: (状态码, 响应头（小写键）, 响应体)
+        """
+        parts = urlsplit(url)
+        request_headers = {'host': 'bench', **{k.lower(): v for k, v in (headers or {}).items()}}
+        if body:
+            request_headers['content-length'] = str(len(body))
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': method.upper(),
+            'scheme': 'http',
+            'path': parts.path,
+            'raw_path': parts.path.encode('utf-8'),
+            'query_string': parts.query.encode('utf-8'),
+            'root_path': '',
+            'headers': [(k.encode('latin-1'), v.encode('latin-1')) for k, v in request_headers.items()],
+            'client': ('127.0.0.1', 50000),
+            'server': ('bench', 80),
+        }
+
+        sent = False
+        finished = asyncio.Event()
+
+        async def receive():
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {'type': 'http.request', 'body': body, 'more_body': False}
+            # 响应发送完毕后通知应用连接已断开
+            await finished.wait()
+            return {'type': 'http.disconnect'}
+
+        status = 0
+        response_headers: Dict[str, str] = {}
+        chunks = []
+
+        async def send(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+                response_headers.update(
+                    (k.decode('latin-1').lower(), v.decode('latin-1')) for k, v in message.get('headers', [])
+                )
+            elif message['type'] == 'http.response.body':
+                chunks.append(message.get('body', b''))
+                if not message.get('more_body', False) or (first_chunk and message.get('body')):
+                    finished.set()
+
+        app_task = asyncio.ensure_future(self.app(scope, receive, send))
+        waiter = asyncio.ensure_future(finished.wait())
+        try:
+            await asyncio.wait({app_task, waiter}, return_when=asyncio.FIRST_COMPLETED)
+            finished.set()
+            # 提前断开时应用在收到 http.disconnect 后结束
+            await app_task
+        finally:
+            finished.set()
+            waiter.cancel()
+            if not app_task.done():
+                app_task.cancel()
+        return status, response_headers, b''.join(chunks)
@@ -0,0 +1,61 @@
+"""
+管理请求认证基准测试：缓存配置 + 已验证 token vs 原先每次读取配置并验签
+
+用法：
+    python -m benchmarks.bench_auth --repeat 20000
+"""
+import argparse
+import json
+
+from fastapi.security import HTTPAuthorizationCredentials
+from jose import jwt
+
+from benchmarks.common import temp_dir, percentile, time_calls
+from backend.utils import auth
+
+
+def legacy_verify_token(token: str):
+    """原先 verify_token 的实现：每次打开并解析 config.json，再完整验签"""
+    with open(auth.CONFIG_PATH, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    jwt_config = config.get('jwt', {})
+    return jwt.decode(token, jwt_config.get('secret_key'),
+                      algorithms=[jwt_config.get('algorithm', 'HS256')])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="管理请求认证基准测试")
+    parser.add_argument('--repeat', type=int, default=20000)
+    args = parser.parse_args()
+
+    with temp_dir() as root:
+        auth.CONFIG_PATH = root / "config.json"
+        with open(auth.CONFIG_PATH, 'w', encoding='utf-8') as f:
+            json.dump({
+                'admin': {'username': 'admin', 'password': 'password'},
+                'jwt': {'secret_key': 'bench-secret', 'algorithm': 'HS256',
+                        'access_token_expire_minutes': 1440}
+            }, f)
+        auth.clear_token_cache()
+
+        # 与各管理接口相同的依赖入口
+        from backend.routers.auth import get_current_admin
+        token = auth.create_access_token({'sub': 'admin'})
+        credentials = HTTPAuthorizationCredentials(scheme='Bearer', credentials=token)
+        assert legacy_verify_token(token)['sub'] == get_current_admin(credentials) == 'admin'
+
+        cases = [
+            ('原实现（读配置 + 验签）', lambda: legacy_verify_token(token)),
+            ('仅缓存配置（每次验签）', lambda: (auth.clear_token_cache(), get_current_admin(credentials))),
+            ('缓存配置 + token', lambda: get_current_admin(credentials)),
+        ]
+        print(f"{'路径':<22}{'p50':>10}{'p99':>10}{'每秒':>12}")
+        for name, func in cases:
+            samples = time_calls(func, args.repeat)
+            total_s = sum(samples) / 1000
+            print(f"{name:<22}{percentile(samples, 50) * 1000:>8.1f}us"
+                  f"{percentile(samples, 99) * 1000:>8.1f}us{args.repeat / total_s:>12.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+"""
+事件循环阻塞测试：大文件写入进行中时，并发的公开读取是否仍然保持低延迟
+
+在临时目录生成合成数据并进程内启动应用，先保存一份很大的草稿，然后：
+1. 对照组：在事件循环上直接调用 replace_all（与改造前的路由相同），同时并发读取
+2. 实验组：通过 /api/draft/{type}/publish 发布同样大小的草稿（写入在文件读写线程池中执行），同时并发读取
+3. 聊天：模拟另一个 worker 进程持有聊天日志文件锁，此时发送一条消息（写入在线程池中等待文件锁），
+   同时并发读取 /api/chat/messages（全部和增量）并打开 SSE 推送连接（测量收到补发消息的延迟）
+比较写入期间的读取延迟。实验组和聊天的读取 p99 应远低于写入耗时，否则以非零状态码退出。
+（json 解析本身持有 GIL，实验组的最大读取延迟约等于单次解析草稿的耗时，而不是整个写入过程）
+
+用法：
+    python -m benchmarks.bench_blocking --draft-posts 20000 --readers 16 --chat-lock-ms 1000
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from typing import Dict, List
+
+from benchmarks.bench_http import ADMIN_USER, ADMIN_PASSWORD, seed_data
+from benchmarks.common import make_posts, percentile, temp_dir
+
+READ_URLS = ['/api/content/research?limit=20', '/api/announcement', '/api/book/content?offset=0&lines=20']
+# SSE 连接只读取第一段响应（补发的历史消息）后断开
+CHAT_READ_URLS = ['/api/chat/messages', '/api/chat/messages?after=1', '/api/chat/stream?after=0']
+WRITE_TYPE = 'media'
+
+
+async def read_while(client, done: asyncio.Event, readers: int, urls: List[str]) -> List[float]:
+    """写入完成前不断发送读取请求，返回每次的延迟（毫秒）"""
+    latencies: List[float] = []
+
+    async def reader(n: int):
+        i = n
+        while not done.is_set():
+            start = time.perf_counter()
+            url = urls[i % len(urls)]
+            status, _, _ = await client.request('GET', url, first_chunk='/stream' in url)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if status != 200:
+                raise RuntimeError(f"读取失败: HTTP {status}")
+            i += 1
+
+    await asyncio.gather(*(reader(n) for n in range(readers)))
+    return latencies
+
+
+async def measure(client, write, readers: int, urls: List[str] = READ_URLS) -> Dict[str, float]:
+    """在执行 write 的同时并发读取，返回写入耗时和读取延迟统计"""
+    done = asyncio.Event()
+
+    async def writer():
+        # 先让读取请求开始排队
+        await asyncio.sleep(0.05)
+        start = time.perf_counter()
+        try:
+            await write()
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            done.set()
+        return elapsed
+
+    write_ms, latencies = await asyncio.gather(writer(), read_while(client, done, readers, urls))
+    return {
+        'write_ms': write_ms,
+        'reads': len(latencies),
+        'p50_ms': percentile(latencies, 50),
+        'p99_ms': percentile(latencies, 99),
+        'max_ms': max(latencies, default=0.0),
+    }
+
+
+async def run(args) -> bool:
+    from backend.main import app
+    from backend.services.chat_log import CHAT_LOG_DIR
+    from backend.services.draft_store import DRAFTS_DIR
+    from backend.utils.async_io import read_json_file
+    from backend.utils.file_lock import file_lock
+    from backend.utils.file_storage import ContentStorage
+    from benchmarks.asgi_client import ASGIClient
+
+    client = ASGIClient(app)
+    await client.startup()
+    try:
+        status, _, body = await client.request(
+            'POST', '/api/auth/login', {'content-type': 'application/json'},
+            json.dumps({'username': ADMIN_USER, 'password': ADMIN_PASSWORD}).encode())
+        if status != 200:
+            raise RuntimeError(f"登录失败: HTTP {status}")
+        auth = {'authorization': f"Bearer {json.loads(body)['access_token']}"}
+
+        draft = {'posts': make_posts(args.draft_posts, WRITE_TYPE, seed=1, content_length=args.content_length)}
+        raw = json.dumps(draft, ensure_ascii=False).encode('utf-8')
+        status, _, _ = await client.request('POST', f'/api/draft/{WRITE_TYPE}',
+                                            {**auth, 'content-type': 'application/json'}, raw)
+        if status != 200:
+            raise RuntimeError(f"保存草稿失败: HTTP {status}")
+        print(f"草稿: {args.draft_posts} 篇, {len(raw) / 1024 / 1024:.1f} MB; 并发读取: {args.readers}")
+
+        # 预热读取路径
+        for url in READ_URLS + CHAT_READ_URLS:
+            await client.request('GET', url, first_chunk='/stream' in url)
+
+        async def blocking_write():
+            # 与改造前的发布路由相同：在事件循环上读取草稿并写入正文
+            data = read_json_file(DRAFTS_DIR / f"{WRITE_TYPE}.json")
+            data.pop('revision', None)
+            ContentStorage(WRITE_TYPE).replace_all(data)
+
+        async def offloaded_write():
+            status, _, _ = await client.request('POST', f'/api/draft/{WRITE_TYPE}/publish', auth)
+            if status != 200:
+                raise RuntimeError(f"发布失败: HTTP {status}")
+
+        async def chat_write():
+            # 另一个线程持有聊天日志的文件锁（相当于另一个 worker 进程正在写入），
+            # 期间发送的消息在线程池中等待文件锁，聊天读取不应等待
+            held = threading.Event()
+
+            def hold_lock():
+                with file_lock(CHAT_LOG_DIR):
+                    held.set()
+                    time.sleep(args.chat_lock_ms / 1000)
+
+            holder = threading.Thread(target=hold_lock)
+            holder.start()
+            await asyncio.get_running_loop().run_in_executor(None, held.wait)
+            status, _, _ = await client.request(
+                'POST', '/api/chat/messages', {'content-type': 'application/json'},
+                json.dumps({'user': 'bench', 'text': 'blocking'}).encode())
+            holder.join()
+            if status != 200:
+                raise RuntimeError(f"发送消息失败: HTTP {status}")
+
+        results = {
+            '事件循环内写入': await measure(client, blocking_write, args.readers),
+            '线程池写入': await measure(client, offloaded_write, args.readers),
+            '聊天等待文件锁': await measure(client, chat_write, args.readers, CHAT_READ_URLS),
+        }
+    finally:
+        await client.shutdown()
+
+    print(f"\n{'方式':<12}{'写入':>10}{'读取次数':>10}{'读 p50':>10}{'读 p99':>10}{'读 max':>10}")
+    for name, r in results.items():
+        print(f"{name:<12}{r['write_ms']:>8.0f}ms{r['reads']:>10}{r['p50_ms']:>8.1f}ms"
+              f"{r['p99_ms']:>8.1f}ms{r['max_ms']:>8.1f}ms")
+
+    ok = all(r['reads'] > args.readers and r['p99_ms'] < r['write_ms'] / 2
+             for r in (results['线程池写入'], results['聊天等待文件锁']))
+    if ok:
+        print("\n✅ 写入期间读取请求持续完成，未被阻塞")
+    else:
+        print("\n❌ 写入期间读取请求被阻塞（读取 p99 接近写入耗时）")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="事件循环阻塞测试")
+    parser.add_argument('--draft-posts', type=int, default=20000, help="发布的草稿文章数（决定写入大小）")
+    parser.add_argument('--content-length', type=int, default=1000, help="每篇文章的正文长度")
+    parser.add_argument('--readers', type=int, default=16, help="并发读取的客户端数")
+    parser.add_argument('--chat-lock-ms', type=int, default=1000, help="模拟其他进程持有聊天日志文件锁的时长（毫秒）")
+    args = parser.parse_args()
+
+    with temp_dir() as root:
+        seed_data(root, posts=400, messages=10, book_lines=200, images=0)
+        os.environ['ADMIN_DATA_DIR'] = str(root / "admin_data")
+        os.environ['USER_DATA_DIR'] = str(root / "user_data")
+        os.environ['CACHE_DIR'] = str(root / "cache")
+        os.environ['STORAGE_BACKEND'] = 'json'
+        ok = asyncio.run(run(args))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
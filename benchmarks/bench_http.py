@@ -0,0 +1,313 @@
+"""
+HTTP 负载测试：在临时目录生成合成的 admin_data / user_data，进程内启动 FastAPI 应用，
+用并发的异步客户端依次压测各个接口，输出吞吐量和 p50/p95/p99 延迟，并保存为 JSON 便于跨提交对比。
+完全离线运行（请求直接调用 ASGI 应用，不经过网络）。
+
+用法：
+    python -m benchmarks.bench_http --posts 10000 --concurrency 32 --requests 500
+    python -m benchmarks.bench_http --only search content_page --compare benchmarks/results/旧结果.json
+    python -m benchmarks.bench_http --backend sqlite
+"""
+import argparse
+import asyncio
+import io
+import itertools
+import json
+import os
+import platform
+import random
+import subprocess
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from benchmarks.common import CONTENT_TYPES, make_text, percentile, temp_dir, write_content
+
+RESULTS_DIR = Path(__file__).parent / "results"
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+ADMIN_USER = 'admin'
+ADMIN_PASSWORD = 'bench-password'
+SEARCH_QUERIES = ['世界', '的', '数据中心', 'radio', 'pix', 'ghost mall', '不存在的关键词xyz']
+LIST_FIELDS = 'id,title,content,images,created_at'
+
+# 请求：(方法, URL, 请求头, 请求体)
+Request = Tuple[str, str, Dict[str, str], bytes]
+
+
+# ---------- 合成数据 ----------
+
+def make_image_bytes(width: int, height: int, fmt: str) -> bytes:
+    """生成带渐变和噪点的测试图片（接近照片的压缩难度）"""
+    from PIL import Image
+    gradient = Image.linear_gradient('L').resize((width, height))
+    noise = Image.effect_noise((width, height), 48)
+    image = Image.merge('RGB', (gradient, noise, gradient.transpose(Image.Transpose.FLIP_LEFT_RIGHT)))
+    buffer = io.BytesIO()
+    image.save(buffer, fmt)
+    return buffer.getvalue()
+
+
+def seed_data(root: Path, posts: int, messages: int, book_lines: int, images: int) -> Dict[str, List[str]]:
+    """生成合成数据目录，返回生成的图片文件名"""
+    rng = random.Random(0)
+    admin_dir = root / "admin_data"
+    user_dir = root / "user_data"
+    write_content(admin_dir, posts)
+    user_dir.mkdir(parents=True)
+
+    with open(admin_dir / "config.json", 'w', encoding='utf-8') as f:
+        json.dump({
+            'admin': {'username': ADMIN_USER, 'password': ADMIN_PASSWORD},
+            'jwt': {'secret_key': uuid.uuid4().hex, 'algorithm': 'HS256', 'access_token_expire_minutes': 60}
+        }, f)
+
+    with open(admin_dir / "announcement.json", 'w', encoding='utf-8') as f:
+        json.dump({'items': [{'type': 'text', 'content': make_text(rng, 200)}], 'status': 'published',
+                   'updated_at': datetime(2024, 1, 1).isoformat()}, f, ensure_ascii=False)
+
+    (admin_dir / "book").mkdir()
+    with open(admin_dir / "book" / "book.txt", 'w', encoding='utf-8') as f:
+        for _ in range(book_lines):
+            f.write(make_text(rng, rng.randint(10, 80)) + '\n\n')
+
+    images_dir = admin_dir / "images"
+    images_dir.mkdir()
+    image_names = []
+    webp = make_image_bytes(1600, 1200, 'WEBP')
+    for _ in range(images):
+        name = f"{uuid.UUID(int=rng.getrandbits(128)).hex}.webp"
+        (images_dir / name).write_bytes(webp)
+        image_names.append(name)
+
+    # 以旧版格式写入聊天记录，应用启动时自动导入为分段日志
+    start = datetime(2024, 1, 1)
+    with open(user_dir / "chat_messages.json", 'w', encoding='utf-8') as f:
+        json.dump({'messages': [
+            {'user': f"user{i % 50}", 'text': make_text(rng, rng.randint(5, 60)),
+             'timestamp': (start + timedelta(seconds=i)).isoformat()}
+            for i in range(messages)
+        ]}, f, ensure_ascii=False)
+
+    return {'images': image_names}
+
+
+def multipart_body(field: str, filename: str, data: bytes, content_type: str) -> Tuple[bytes, str]:
+    """构造只包含一个文件字段的 multipart/form-data 请求体"""
+    boundary = uuid.uuid4().hex
+    body = (
+        f'--{boundary}\r\n'
+        f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+        f'Content-Type: {content_type}\r\n\r\n'
+    ).encode('utf-8') + data + f'\r\n--{boundary}--\r\n'.encode('utf-8')
+    return body, f'multipart/form-data; boundary={boundary}'
+
+
+# ---------- 场景 ----------
+
+class Scenario:
+    """一个压测场景：按顺序生成请求"""
+
+    def __init__(self, name: str, make: Callable[[int], Request], requests: Optional[int] = None):
+        self.name = name
+        self.make = make
+        self.requests = requests
+
+
+async def build_scenarios(client, seeded: Dict[str, List[str]], upload_requests: int) -> List[Scenario]:
+    """登录并准备需要前置数据的请求（ETag、token 等）"""
+    status, _, body = await client.request('POST', '/api/auth/login', {'content-type': 'application/json'},
+                                           json.dumps({'username': ADMIN_USER, 'password': ADMIN_PASSWORD}).encode())
+    if status != 200:
+        raise RuntimeError(f"登录失败: HTTP {status}")
+    auth = {'authorization': f"Bearer {json.loads(body)['access_token']}"}
+
+    _, headers, _ = await client.request('GET', '/api/content/research')
+    etag = headers.get('etag', '')
+    _, _, body = await client.request('GET', '/api/chat/messages')
+    last_id = max((m.get('id', 0) for m in json.loads(body)['messages']), default=0)
+
+    upload_png = make_image_bytes(1200, 900, 'PNG')
+    upload_body, upload_type = multipart_body('file', 'bench.png', upload_png, 'image/png')
+    image_names = seeded['images'] or ['missing.webp']
+
+    def get(url: str, headers: Optional[Dict[str, str]] = None):
+        return lambda i: ('GET', url, headers or {}, b'')
+
+    return [
+        Scenario('health', get('/api/health')),
+        Scenario('page_index', get('/', {'accept-encoding': 'gzip, br'})),
+        Scenario('static_js', get('/js/main.js', {'accept-encoding': 'gzip, br'})),
+        Scenario('content_full', lambda i: ('GET', f'/api/content/{CONTENT_TYPES[i % 4]}', {}, b'')),
+        Scenario('content_page', lambda i: (
+            'GET', f'/api/content/{CONTENT_TYPES[i % 4]}?limit=20&fields={LIST_FIELDS}', {}, b'')),
+        Scenario('content_304', get('/api/content/research', {'if-none-match': etag})),
+        Scenario('search', lambda i: ('GET', f'/api/search?q={SEARCH_QUERIES[i % len(SEARCH_QUERIES)]}', {}, b'')),
+        Scenario('announcement', get('/api/announcement')),
+        Scenario('book_window', lambda i: ('GET', f'/api/book/content?offset={i * 100}&lines=100', {}, b'')),
+        Scenario('book_random', get('/api/book/content?random=1')),
+        Scenario('bootstrap', get('/api/bootstrap')),
+        Scenario('chat_history', get('/api/chat/messages')),
+        Scenario('chat_poll', get(f'/api/chat/messages?after={last_id}')),
+        Scenario('chat_post', lambda i: ('POST', '/api/chat/messages', {'content-type': 'application/json'},
+                                         json.dumps({'user': f'bench{i % 20}', 'text': f'消息 {i}'}).encode())),
+        Scenario('admin_list', lambda i: ('GET', f'/api/admin/{CONTENT_TYPES[i % 4]}', auth, b'')),
+        Scenario('media_original', lambda i: ('GET', f'/media/images/{image_names[i % len(image_names)]}', {}, b'')),
+        Scenario('media_resize', lambda i: (
+            'GET', f'/media/images/{image_names[i % len(image_names)]}?w={(160, 480, 1024)[i % 3]}', {}, b'')),
+        Scenario('upload', lambda i: ('POST', '/api/upload/image', {**auth, 'content-type': upload_type}, upload_body),
+                 requests=upload_requests),
+    ]
+
+
+# ---------- 执行与统计 ----------
+
+async def run_scenario(client, scenario: Scenario, concurrency: int, requests: int, warmup: int) -> Dict:
+    """用 concurrency 个并发客户端发送 requests 个请求，返回统计结果"""
+    for i in range(warmup):
+        await client.request(*scenario.make(i))
+
+    total = scenario.requests or requests
+    counter = itertools.count()
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+
+    async def worker():
+        while True:
+            i = next(counter)
+            if i >= total:
+                return
+            method, url, headers, body = scenario.make(i)
+            start = time.perf_counter()
+            try:
+                status, _, _ = await client.request(method, url, headers, body)
+            except Exception as e:
+                print(f"  {scenario.name} 请求异常: {e}")
+                status = 0
+            latencies.append((time.perf_counter() - start) * 1000)
+            statuses[str(status)] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, total))))
+    elapsed = time.perf_counter() - start
+
+    return {
+        'requests': total,
+        'concurrency': min(concurrency, total),
+        'duration_s': round(elapsed, 4),
+        'throughput_rps': round(total / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p95_ms': round(percentile(latencies, 95), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+        'max_ms': round(max(latencies), 3) if latencies else 0.0,
+        'status': dict(statuses),
+    }
+
+
+def git_commit() -> str:
+    """当前提交（用于区分结果文件），不在 git 仓库中时返回 unknown"""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def print_table(results: Dict[str, Dict], baseline: Optional[Dict[str, Dict]] = None):
+    header = f"{'场景':<16}{'请求数':>8}{'req/s':>10}{'p50':>10}{'p95':>10}{'p99':>10}  状态码"
+    if baseline:
+        header += f"{'p50 变化':>12}{'req/s 变化':>12}"
+    print(header)
+    for name, r in results.items():
+        line = (f"{name:<16}{r['requests']:>8}{r['throughput_rps']:>10.0f}{r['p50_ms']:>8.2f}ms"
+                f"{r['p95_ms']:>8.2f}ms{r['p99_ms']:>8.2f}ms  {r['status']}")
+        old = (baseline or {}).get(name)
+        if old:
+            p50_change = (r['p50_ms'] / old['p50_ms'] - 1) * 100 if old['p50_ms'] else 0.0
+            rps_change = (r['throughput_rps'] / old['throughput_rps'] - 1) * 100 if old['throughput_rps'] else 0.0
+            line += f"{p50_change:>+11.1f}%{rps_change:>+11.1f}%"
+        print(line)
+
+
+async def run_all(args, seeded) -> Dict[str, Dict]:
+    # 环境变量已指向合成数据，此时再导入应用
+    from backend.main import app
+    from benchmarks.asgi_client import ASGIClient
+
+    client = ASGIClient(app)
+    await client.startup()
+    try:
+        scenarios = await build_scenarios(client, seeded, args.upload_requests)
+        results = {}
+        for scenario in scenarios:
+            if args.only and scenario.name not in args.only:
+                continue
+            results[scenario.name] = await run_scenario(client, scenario, args.concurrency, args.requests, args.warmup)
+            r = results[scenario.name]
+            print(f"  {scenario.name:<16}{r['throughput_rps']:>10.0f} req/s  p50 {r['p50_ms']:.2f}ms  p99 {r['p99_ms']:.2f}ms")
+        return results
+    finally:
+        await client.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP 负载测试")
+    parser.add_argument('--posts', type=int, default=10000, help="合成文章总数（四种类型平均分配）")
+    parser.add_argument('--messages', type=int, default=2000, help="合成聊天消息数")
+    parser.add_argument('--book-lines', type=int, default=20000, help="合成书籍行数")
+    parser.add_argument('--images', type=int, default=20, help="合成图片数")
+    parser.add_argument('--backend', choices=['json', 'sqlite'], default='json', help="内容存储后端")
+    parser.add_argument('--concurrency', type=int, default=32, help="并发客户端数")
+    parser.add_argument('--requests', type=int, default=500, help="每个场景的请求数")
+    parser.add_argument('--upload-requests', type=int, default=20, help="上传场景的请求数")
+    parser.add_argument('--warmup', type=int, default=5, help="每个场景正式计时前的预热请求数")
+    parser.add_argument('--only', nargs='+', help="只运行指定场景")
+    parser.add_argument('--output', type=Path, help="结果 JSON 路径（默认 benchmarks/results/http-<提交>-<时间>.json）")
+    parser.add_argument('--compare', type=Path, help="与之前的结果 JSON 对比")
+    args = parser.parse_args()
+
+    with temp_dir() as root:
+        print(f"生成合成数据：{args.posts} 篇文章，{args.messages} 条消息，{args.book_lines} 行书籍，{args.images} 张图片")
+        seeded = seed_data(root, args.posts, args.messages, args.book_lines, args.images)
+        os.environ['ADMIN_DATA_DIR'] = str(root / "admin_data")
+        os.environ['USER_DATA_DIR'] = str(root / "user_data")
+        os.environ['CACHE_DIR'] = str(root / "cache")
+        os.environ['STORAGE_BACKEND'] = args.backend
+        os.environ['DATABASE_URL'] = f"sqlite:///{root / 'bench.db'}"
+        if args.backend == 'sqlite':
+            from backend.migrate_storage import migrate
+            migrate('sqlite')
+
+        # 静态文件目录使用相对路径，需在项目根目录下运行
+        os.chdir(ROOT_DIR)
+        results = asyncio.run(run_all(args, seeded))
+
+    report = {
+        'commit': git_commit(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'params': {k: v for k, v in vars(args).items() if k not in ('output', 'compare')},
+        'scenarios': results,
+    }
+    output = args.output or RESULTS_DIR / f"http-{report['commit']}-{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print()
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f).get('scenarios')
+        print(f"对比基准：{args.compare}")
+    print_table(results, baseline)
+    print(f"\n结果已保存到 {output}")
+
+
+if __name__ == '__main__':
+    main()
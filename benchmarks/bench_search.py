@@ -0,0 +1,79 @@
+"""
+搜索基准测试：倒排索引 vs 原先的逐文件线性扫描
+
+用法：
+    python -m benchmarks.bench_search --sizes 10000 100000
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+
+from benchmarks.common import CONTENT_TYPES, write_content, temp_dir, percentile, time_calls
+from backend.utils import file_storage
+
+QUERIES = ['世界', '的', '数据中心', 'radio', 'pix', 'adio', 'ghost mall', '不存在的关键词xyz']
+# 搜索接口每个类型默认返回的条数
+TOP_K = 10
+
+
+def linear_search(admin_dir: Path, q: str) -> dict:
+    """原先 /api/search 的实现：每次查询打开并解析全部 JSON 文件后逐条子串匹配"""
+    keyword = q.lower()
+    results = {t: [] for t in CONTENT_TYPES}
+    for content_type in CONTENT_TYPES:
+        with open(admin_dir / f"{content_type}.json", 'r', encoding='utf-8') as f:
+            posts = json.load(f).get('posts', [])
+        for post in posts:
+            if post.get('status') != 'published':
+                continue
+            title = (post.get('title') or '').lower()
+            content = (post.get('content') or '').lower()
+            if keyword in title or keyword in content:
+                relevance = (10 if keyword in title else 0) + (1 if keyword in content else 0)
+                results[content_type].append({**post, 'type': content_type, 'relevance': relevance})
+    return results
+
+
+def run(size: int, repeat: int):
+    with temp_dir() as root:
+        admin_dir = root / "admin_data"
+        write_content(admin_dir, size)
+        file_storage.ADMIN_DATA_DIR = admin_dir
+        file_storage.clear_cache()
+
+        from backend.services.search_index import SearchIndex
+        index = SearchIndex()
+
+        start = time.perf_counter()
+        for content_type in CONTENT_TYPES:
+            index.search('预热', content_type)
+        build_ms = (time.perf_counter() - start) * 1000
+        print(f"\n== {size} 篇文章（索引构建 {build_ms:.0f} ms）")
+        print(f"{'查询':<14}{'匹配数':>8}{'线性 p50':>12}{'索引全部':>12}{'索引前{}条'.format(TOP_K):>12}{'加速':>8}")
+
+        for q in QUERIES:
+            expected = linear_search(admin_dir, q)
+            actual = {t: index.search(q, t)[1] for t in CONTENT_TYPES}
+            key = lambda r: sorted(p['id'] for p in r)
+            assert all(key(expected[t]) == key(actual[t]) for t in CONTENT_TYPES), f"结果不一致: {q}"
+
+            linear = percentile(time_calls(lambda: linear_search(admin_dir, q), max(1, repeat // 5)), 50)
+            indexed = percentile(time_calls(lambda: [index.search(q, t) for t in CONTENT_TYPES], repeat), 50)
+            top = percentile(time_calls(lambda: [index.search(q, t, TOP_K) for t in CONTENT_TYPES], repeat), 50)
+            hits = sum(len(v) for v in expected.values())
+            print(f"{q:<14}{hits:>8}{linear:>10.2f}ms{indexed:>10.2f}ms{top:>10.2f}ms"
+                  f"{linear / max(top, 1e-6):>7.0f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="搜索基准测试")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    for size in args.sizes:
+        run(size, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+"""
+读取接口序列化基准测试：每次请求校验并序列化 vs 预序列化响应缓存
+
+在临时目录生成合成数据，进程内启动应用，对同一批接口比较两种处理方式：
+1. 原方式：另建一个只含原路由写法的 FastAPI 应用（直接返回文章列表，管理端列表经 List[ContentResponse] 校验），
+   每次请求由 FastAPI 校验、jsonable_encoder 转换并用标准库 json 编码
+2. 缓存方式：正式应用的路由，内容未变化时直接返回按内容签名缓存的已编码字节
+请求逐个发送（单个事件循环），按进程 CPU 时间计算每核每秒请求数；另外列出缓存失效后重新编码一次的耗时
+（orjson 与标准库 json）。
+
+用法：
+    python -m benchmarks.bench_serialization --posts 10000 --requests 200
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import Dict, List, Optional
+
+from benchmarks.bench_http import ADMIN_USER, ADMIN_PASSWORD, ROOT_DIR, seed_data
+from benchmarks.common import percentile, temp_dir
+
+CONTENT_TYPE = 'research'
+
+
+def baseline_app():
+    """原路由写法（每次请求校验和序列化）"""
+    from fastapi import Depends, FastAPI
+    from backend.routers.auth import get_current_admin
+    from backend.schemas.content import ContentResponse
+    from backend.utils.async_io import run_io
+    from backend.utils.file_storage import get_content_storage
+
+    app = FastAPI()
+
+    @app.get("/api/content/{content_type}", response_model=None)
+    async def get_public_content(content_type: str, limit: Optional[int] = None):
+        storage = get_content_storage(content_type)
+        if limit is None:
+            return await run_io(storage.get_published)
+        posts, _ = await run_io(storage.get_published_page, limit, None)
+        return posts
+
+    @app.get("/api/admin/{content_type}", response_model=List[ContentResponse])
+    async def get_all_content(content_type: str, admin: str = Depends(get_current_admin)):
+        return await run_io(get_content_storage(content_type).get_all)
+
+    return app
+
+
+async def measure(client, url: str, headers: Dict[str, str], requests: int) -> Dict[str, float]:
+    """逐个发送请求，返回墙钟/CPU 吞吐量和延迟"""
+    for _ in range(3):
+        await client.request('GET', url, headers)
+    latencies = []
+    size = 0
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    for _ in range(requests):
+        start = time.perf_counter()
+        status, _, body = await client.request('GET', url, headers)
+        latencies.append((time.perf_counter() - start) * 1000)
+        if status != 200:
+            raise RuntimeError(f"{url}: HTTP {status}")
+        size = len(body)
+    wall, cpu = time.perf_counter() - wall_start, time.process_time() - cpu_start
+    return {
+        'rps': requests / wall,
+        'rps_per_core': requests / cpu if cpu else 0.0,
+        'p50_ms': percentile(latencies, 50),
+        'p99_ms': percentile(latencies, 99),
+        'bytes': size,
+    }
+
+
+def measure_encode(posts: list, repeat: int = 5) -> Dict[str, Optional[float]]:
+    """缓存失效后重新编码一次的耗时（毫秒）"""
+    from backend.utils import response_cache
+
+    def best(func) -> float:
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            samples.append((time.perf_counter() - start) * 1000)
+        return min(samples)
+
+    stdlib = best(lambda: json.dumps(posts, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+    fast = best(lambda: response_cache.orjson.dumps(posts)) if response_cache.orjson is not None else None
+    return {'json': stdlib, 'orjson': fast}
+
+
+async def run(args):
+    from backend.main import app
+    from backend.utils.file_storage import get_content_storage
+    from benchmarks.asgi_client import ASGIClient
+
+    cached = ASGIClient(app)
+    await cached.startup()
+    baseline = ASGIClient(baseline_app())
+    try:
+        status, _, body = await cached.request(
+            'POST', '/api/auth/login', {'content-type': 'application/json'},
+            json.dumps({'username': ADMIN_USER, 'password': ADMIN_PASSWORD}).encode())
+        if status != 200:
+            raise RuntimeError(f"登录失败: HTTP {status}")
+        auth = {'authorization': f"Bearer {json.loads(body)['access_token']}"}
+
+        scenarios = [
+            ('公开列表 20 条', f'/api/content/{CONTENT_TYPE}?limit=20', {}),
+            ('公开全部', f'/api/content/{CONTENT_TYPE}', {}),
+            ('管理端全部', f'/api/admin/{CONTENT_TYPE}', auth),
+        ]
+        results = []
+        for name, url, headers in scenarios:
+            before = await measure(baseline, url, headers, args.requests)
+            after = await measure(cached, url, headers, args.requests)
+            results.append((name, before, after))
+
+        encode = measure_encode(get_content_storage(CONTENT_TYPE).get_published())
+    finally:
+        await cached.shutdown()
+
+    print(f"\n{'接口':<12}{'方式':<8}{'req/s':>10}{'req/s/核':>12}{'p50':>10}{'p99':>10}{'响应体':>10}")
+    for name, before, after in results:
+        for label, r in (('原方式', before), ('缓存', after)):
+            print(f"{name:<12}{label:<8}{r['rps']:>10.0f}{r['rps_per_core']:>12.0f}"
+                  f"{r['p50_ms']:>8.2f}ms{r['p99_ms']:>8.2f}ms{r['bytes'] / 1024:>8.0f}KB")
+        print(f"{'':<12}{'提升':<8}{after['rps_per_core'] / before['rps_per_core']:>21.1f}x")
+
+    orjson_ms = f"{encode['orjson']:.1f}ms" if encode['orjson'] is not None else "未安装"
+    print(f"\n缓存失效后重新编码全部已发布内容：json {encode['json']:.1f}ms，orjson {orjson_ms}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="读取接口序列化基准测试")
+    parser.add_argument('--posts', type=int, default=10000, help="合成文章总数（四种类型平均分配）")
+    parser.add_argument('--requests', type=int, default=200, help="每个接口每种方式的请求数")
+    args = parser.parse_args()
+
+    with temp_dir() as root:
+        print(f"生成合成数据：{args.posts} 篇文章")
+        seed_data(root, args.posts, messages=10, book_lines=200, images=0)
+        os.environ['ADMIN_DATA_DIR'] = str(root / "admin_data")
+        os.environ['USER_DATA_DIR'] = str(root / "user_data")
+        os.environ['CACHE_DIR'] = str(root / "cache")
+        os.environ['STORAGE_BACKEND'] = 'json'
+        # 静态文件目录使用相对路径，需在项目根目录下运行
+        os.chdir(ROOT_DIR)
+        asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
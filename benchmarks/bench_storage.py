@@ -0,0 +1,85 @@
+"""
+存储后端基准测试：JSON 文件 vs SQLite（WAL + 索引 + FTS5）
+
+测量单个内容类型在不同数据量下的增删改查和列表延迟。
+JSON 后端的读取走进程内缓存（与线上一致），另外单独列出冷启动加载时间。
+
+用法：
+    python -m benchmarks.bench_storage --sizes 1000 10000 100000
+"""
+import argparse
+import time
+import uuid
+
+from benchmarks.common import make_posts, temp_dir, percentile, time_calls
+from backend.database import make_engine
+from backend.utils import file_storage
+from backend.utils.file_storage import ContentStorage
+from backend.utils.sqlite_storage import SqliteContentStorage
+
+CONTENT_TYPE = 'research'
+
+
+def measure(name: str, func, repeat: int) -> str:
+    samples = time_calls(func, repeat)
+    return f"{name:<16}{percentile(samples, 50):>10.2f}ms{percentile(samples, 99):>10.2f}ms"
+
+
+def bench_backend(label: str, storage, posts, repeat: int, write_repeat: int):
+    print(f"\n-- {label}")
+    start = time.perf_counter()
+    storage.replace_all({'posts': posts})
+    print(f"{'批量写入':<16}{(time.perf_counter() - start) * 1000:>10.0f}ms")
+
+    if isinstance(storage, ContentStorage):
+        file_storage.clear_cache()
+        start = time.perf_counter()
+        storage.get_all()
+        print(f"{'冷启动加载':<16}{(time.perf_counter() - start) * 1000:>10.0f}ms")
+
+    sample_ids = [p['id'] for p in posts[::max(1, len(posts) // repeat)]][:repeat]
+    cursor = storage.get_published_page(20)[1]
+    created = []
+
+    print(f"{'操作':<16}{'p50':>12}{'p99':>12}")
+    print(measure('首页 20 条', lambda: storage.get_published_page(20), repeat))
+    print(measure('第二页 20 条', lambda: storage.get_published_page(20, cursor), repeat))
+    print(measure('全部已发布', lambda: storage.get_published(), max(1, repeat // 10)))
+    ids = iter(sample_ids * 2)
+    print(measure('按ID读取', lambda: storage.get_by_id(next(ids)), repeat))
+    print(measure('新增', lambda: created.append(storage.create({
+        'title': 'bench', 'content': uuid.uuid4().hex, 'images': [], 'links': [], 'status': 'published'
+    })), write_repeat))
+    updates = iter(created * 2)
+    print(measure('更新', lambda: storage.update(next(updates)['id'], {'content': 'updated'}), write_repeat))
+    deletes = iter(created)
+    print(measure('删除', lambda: storage.delete(next(deletes)['id']), write_repeat))
+    print(measure('搜索', lambda: storage.search('ghost'), max(1, repeat // 10)))
+
+
+def run(size: int, repeat: int, write_repeat: int):
+    print(f"\n== {size} 篇文章")
+    posts = make_posts(size, CONTENT_TYPE, content_length=200)
+    with temp_dir() as root:
+        file_storage.ADMIN_DATA_DIR = root / "admin_data"
+        file_storage.ADMIN_DATA_DIR.mkdir()
+        file_storage.clear_cache()
+        bench_backend('JSON', ContentStorage(CONTENT_TYPE), posts, repeat, write_repeat)
+
+        engine = make_engine(f"sqlite:///{root / 'bench.db'}")
+        bench_backend('SQLite', SqliteContentStorage(CONTENT_TYPE, engine), posts, repeat, write_repeat)
+        engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="存储后端基准测试")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--repeat', type=int, default=200, help="读取操作的重复次数")
+    parser.add_argument('--write-repeat', type=int, default=10, help="写入操作的重复次数")
+    args = parser.parse_args()
+    for size in args.sizes:
+        run(size, args.repeat, args.write_repeat)
+
+
+if __name__ == '__main__':
+    main()
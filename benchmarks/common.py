@@ -0,0 +1,98 @@
+"""
+基准测试公共工具
+生成合成数据、临时数据目录、计时统计
+"""
+import json
+import random
+import shutil
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List, Dict, Any
+
+CONTENT_TYPES = ['research', 'media', 'activity', 'shop']
+
+# 合成文本使用的常用汉字和英文单词
+_CJK_CHARS = '的一是在不了有和人这中大为上个国我以要他时来用们生到作地于出就分对成会可主发年动同工也能下过子说产种面而方后多定行学法所民得经十三之进着等部度家电力里如水化高自二理起小物现实加量都两体制机当使点从业本去把性好应开它合还因由其些然前外天政四日那社义事平形相全表间样与关各重新线内数正心反你明看原又么利比或但质气第向道命此变条只没结解问意建月公无系军很情者最立代想已通并提直题党程展五果料象员革位入常文总次品式活设及管特件长求老头基资边流路级少图山统接知较将组见计别她手角期根论运农指几九区强放决西被干做必战先回则任取据处理世'
+_WORDS = ['weird', 'core', 'store', 'retro', 'window', 'dream', 'signal', 'static', 'memory',
+          'pixel', 'archive', 'radio', 'night', 'ghost', 'mall', 'pool', 'vapor', 'noise',
+          'python', 'server', 'cache', 'index', 'search', 'liminal', 'space', 'tape']
+
+
+def make_text(rng: random.Random, length: int) -> str:
+    """生成中英混合的合成文本"""
+    parts = []
+    size = 0
+    while size < length:
+        if rng.random() < 0.6:
+            chunk = ''.join(rng.choice(_CJK_CHARS) for _ in range(rng.randint(4, 16)))
+        else:
+            chunk = ' '.join(rng.choice(_WORDS) for _ in range(rng.randint(1, 5)))
+        parts.append(chunk)
+        size += len(chunk) + 1
+    return '，'.join(parts)[:length]
+
+
+def make_posts(count: int, content_type: str = 'research', seed: int = 0,
+               content_length: int = 400) -> List[Dict[str, Any]]:
+    """生成指定数量的合成文章"""
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    posts = []
+    for i in range(count):
+        created = (start + timedelta(minutes=i)).isoformat()
+        posts.append({
+            'id': str(uuid.UUID(int=rng.getrandbits(128))),
+            'type': content_type,
+            'title': make_text(rng, rng.randint(6, 24)),
+            'content': make_text(rng, content_length),
+            'images': [],
+            'links': [],
+            'status': 'published' if rng.random() < 0.9 else 'draft',
+            'created_at': created,
+            'updated_at': created,
+            'author': 'Admin'
+        })
+    return posts
+
+
+def write_content(admin_dir: Path, total_posts: int, seed: int = 0, content_length: int = 400):
+    """在 admin_dir 下为四种内容类型写入共 total_posts 篇文章"""
+    admin_dir.mkdir(parents=True, exist_ok=True)
+    per_type = total_posts // len(CONTENT_TYPES)
+    for i, content_type in enumerate(CONTENT_TYPES):
+        posts = make_posts(per_type, content_type, seed=seed + i, content_length=content_length)
+        with open(admin_dir / f"{content_type}.json", 'w', encoding='utf-8') as f:
+            json.dump({'posts': posts}, f, ensure_ascii=False, indent=2)
+
+
+@contextmanager
+def temp_dir(prefix: str = 'weirdcore-bench-'):
+    """临时目录，退出时删除"""
+    path = Path(tempfile.mkdtemp(prefix=prefix))
+    try:
+        yield path
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def percentile(samples: List[float], p: float) -> float:
+    """计算百分位数（最近秩法）"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    k = max(0, min(len(ordered) - 1, int(round(p / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[k]
+
+
+def time_calls(func, repeat: int) -> List[float]:
+    """重复调用并返回每次耗时（毫秒）"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
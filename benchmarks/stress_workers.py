@@ -0,0 +1,203 @@
+"""
+多 worker 进程压力测试：多个进程同时写入同一份数据时是否丢失或重复写入
+
+在临时目录生成合成数据，启动 N 个进程（相当于 uvicorn --workers N），每个进程进程内启动应用，并发执行：
+1. 发送聊天消息
+2. 通过管理接口新增文章（JSON 文件存储的读取-修改-写入）
+3. 以 JSON Patch 增量修改同一份草稿（版本冲突时重新读取后重试）
+全部结束后在主进程中检查：聊天消息ID全局唯一且连续、每条消息都写入了日志；新增文章全部存在；
+草稿中的修改一条不少，版本号等于成功的修改次数。任何写入丢失时以非零状态码退出。
+
+用法：
+    python -m benchmarks.stress_workers --workers 4 --messages 200 --posts 50 --patches 50
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict
+
+from benchmarks.bench_http import ADMIN_USER, ADMIN_PASSWORD, seed_data
+from benchmarks.common import temp_dir
+
+CONTENT_TYPE = 'research'
+DRAFT_TYPE = 'media'
+# 每个进程内同时进行的请求数
+CONCURRENCY = 8
+
+
+def set_environment(root: Path):
+    os.environ['ADMIN_DATA_DIR'] = str(root / "admin_data")
+    os.environ['USER_DATA_DIR'] = str(root / "user_data")
+    os.environ['CACHE_DIR'] = str(root / "cache")
+    os.environ['STORAGE_BACKEND'] = 'json'
+    # 压力测试只检查写入，不需要跨进程推送
+    os.environ['CHAT_SYNC_INTERVAL'] = '0'
+
+
+async def worker_main(worker: int, args, start_barrier) -> Dict[str, Any]:
+    from backend.main import app
+    from benchmarks.asgi_client import ASGIClient
+
+    client = ASGIClient(app)
+    await client.startup()
+    try:
+        # 所有进程启动完成后同时开始写入
+        await asyncio.get_running_loop().run_in_executor(None, start_barrier.wait)
+        status, _, body = await client.request(
+            'POST', '/api/auth/login', {'content-type': 'application/json'},
+            json.dumps({'username': ADMIN_USER, 'password': ADMIN_PASSWORD}).encode())
+        if status != 200:
+            raise RuntimeError(f"登录失败: HTTP {status}")
+        auth = {'authorization': f"Bearer {json.loads(body)['access_token']}",
+                'content-type': 'application/json'}
+        semaphore = asyncio.Semaphore(CONCURRENCY)
+        result = {'message_ids': [], 'post_ids': [], 'patches': 0, 'conflicts': 0}
+
+        async def send_message(i: int):
+            async with semaphore:
+                payload = {'user': f"w{worker}", 'text': f"{worker}-{i}"}
+                status, _, body = await client.request(
+                    'POST', '/api/chat/messages', {'content-type': 'application/json'},
+                    json.dumps(payload).encode())
+                if status != 200:
+                    raise RuntimeError(f"发送消息失败: HTTP {status}")
+                result['message_ids'].append(json.loads(body)['message']['id'])
+
+        async def create_post(i: int):
+            async with semaphore:
+                payload = {'title': f"stress {worker}-{i}", 'content': 'x', 'images': [], 'links': [],
+                           'status': 'published'}
+                status, _, body = await client.request(
+                    'POST', f'/api/admin/{CONTENT_TYPE}', auth, json.dumps(payload).encode())
+                if status != 200:
+                    raise RuntimeError(f"新增文章失败: HTTP {status}")
+                result['post_ids'].append(json.loads(body)['id'])
+
+        async def patch_draft(i: int):
+            async with semaphore:
+                operation = {'op': 'add', 'path': '/posts/-', 'value': {'title': f"draft {worker}-{i}"}}
+                revision = None
+                while True:
+                    if revision is None:
+                        status, _, body = await client.request('GET', f'/api/draft/{DRAFT_TYPE}', auth)
+                        revision = json.loads(body)['revision']
+                    status, _, body = await client.request(
+                        'PATCH', f'/api/draft/{DRAFT_TYPE}', auth,
+                        json.dumps({'revision': revision, 'operations': [operation]}).encode())
+                    if status == 200:
+                        result['patches'] += 1
+                        return
+                    if status != 409:
+                        raise RuntimeError(f"修改草稿失败: HTTP {status}")
+                    result['conflicts'] += 1
+                    revision = json.loads(body)['detail']['revision']
+
+        await asyncio.gather(
+            *(send_message(i) for i in range(args.messages)),
+            *(create_post(i) for i in range(args.posts)),
+            *(patch_draft(i) for i in range(args.patches)),
+        )
+        return result
+    finally:
+        await client.shutdown()
+
+
+def run_worker(worker: int, root: str, args, start_barrier, results):
+    set_environment(Path(root))
+    try:
+        results.put((worker, asyncio.run(worker_main(worker, args, start_barrier))))
+    except Exception as e:
+        # 主进程按结果数等待，出错时同样要放入结果
+        results.put((worker, {'error': str(e)}))
+        raise
+
+
+def verify(root: Path, args, results: Dict[int, Dict[str, Any]]) -> bool:
+    from backend.services.chat_log import ChatLog
+    from backend.services.draft_store import draft_store
+    from backend.utils.file_storage import ContentStorage
+
+    ok = True
+    workers = len(results)
+
+    message_ids = [i for r in results.values() for i in r['message_ids']]
+    expected = workers * args.messages
+    logged = ChatLog(root / "user_data" / "chat", ring_size=expected + 100).recent(expected + 100)
+    logged_ids = [m['id'] for m in logged]
+    texts = {m['text'] for m in logged}
+    missing_texts = [f"{w}-{i}" for w in results for i in range(args.messages) if f"{w}-{i}" not in texts]
+    print(f"聊天消息: 发送 {len(message_ids)}，日志 {len(logged)}，"
+          f"重复ID {len(message_ids) - len(set(message_ids))}，丢失 {len(missing_texts)}")
+    if (len(set(message_ids)) != expected or missing_texts
+            or sorted(logged_ids) != list(range(1, len(logged_ids) + 1))):
+        print("❌ 聊天消息丢失或ID重复")
+        ok = False
+
+    post_ids = {i for r in results.values() for i in r['post_ids']}
+    stored = {p['id'] for p in ContentStorage(CONTENT_TYPE).get_all()}
+    lost_posts = post_ids - stored
+    print(f"新增文章: {len(post_ids)}，丢失 {len(lost_posts)}")
+    if len(post_ids) != workers * args.posts or lost_posts:
+        print("❌ 新增文章丢失")
+        ok = False
+
+    draft = draft_store.get(DRAFT_TYPE)
+    titles = {p.get('title') for p in draft.get('posts', [])}
+    lost_patches = [f"draft {w}-{i}" for w in results for i in range(args.patches)
+                    if f"draft {w}-{i}" not in titles]
+    conflicts = sum(r['conflicts'] for r in results.values())
+    print(f"草稿修改: {sum(r['patches'] for r in results.values())}（冲突重试 {conflicts}），"
+          f"版本号 {draft.get('revision')}，丢失 {len(lost_patches)}")
+    if lost_patches:
+        print("❌ 草稿修改丢失")
+        ok = False
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="多 worker 进程写入压力测试")
+    parser.add_argument('--workers', type=int, default=4, help="进程数")
+    parser.add_argument('--messages', type=int, default=200, help="每个进程发送的聊天消息数")
+    parser.add_argument('--posts', type=int, default=50, help="每个进程新增的文章数")
+    parser.add_argument('--patches', type=int, default=50, help="每个进程提交的草稿修改数")
+    args = parser.parse_args()
+
+    with temp_dir() as root:
+        seed_data(root, posts=200, messages=0, book_lines=10, images=0)
+        set_environment(root)
+
+        context = multiprocessing.get_context('spawn')
+        start_barrier = context.Barrier(args.workers + 1)
+        results_queue = context.Queue()
+        processes = [context.Process(target=run_worker, args=(w, str(root), args, start_barrier, results_queue))
+                     for w in range(args.workers)]
+        for process in processes:
+            process.start()
+        start_barrier.wait()
+        start = time.perf_counter()
+
+        results = {}
+        for _ in processes:
+            worker, result = results_queue.get()
+            results[worker] = result
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - start
+        failed = [r['error'] for r in results.values() if 'error' in r]
+        print(f"{args.workers} 个进程，耗时 {elapsed:.1f}s")
+        for error in failed:
+            print(f"❌ 进程出错: {error}")
+
+        ok = not failed and verify(root, args, results)
+    if ok:
+        print("\n✅ 没有丢失或重复的写入")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
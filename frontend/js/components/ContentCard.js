@@ -49,7 +49,7 @@ export class ContentCard {
         return `
             <div class="content-images">
                 ${post.images.map(img => `
-                    <img src="${img}" alt="图片" class="content-image">
+                    <img src="${img}" srcset="${HtmlHelpers.imageSrcset(img)}" sizes="(max-width: 600px) 50vw, 320px" alt="图片" class="content-image" loading="lazy">
                 `).join('')}
             </div>
         `;
@@ -122,7 +122,7 @@ export class ContentCard {
         return `
             <div class="post-img" style="margin-top: 15px;">
                 ${post.images.map(img => `
-                    <img src="${img}" alt="图片" style="max-width: 100%; height: auto; margin-bottom: 10px; opacity: 0; transition: opacity 0.25s;" onload="this.style.opacity=1">
+                    <img src="${img}" srcset="${HtmlHelpers.imageSrcset(img)}" sizes="(max-width: 800px) 100vw, 800px" alt="图片" loading="lazy" style="max-width: 100%; height: auto; margin-bottom: 10px; opacity: 0; transition: opacity 0.25s;" onload="this.style.opacity=1">
                 `).join('')}
             </div>
         `;
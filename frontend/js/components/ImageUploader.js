@@ -226,7 +226,7 @@ export class ImageUploader {
         const imageCard = document.createElement('div');
         imageCard.className = 'image-preview-card';
         imageCard.innerHTML = `
-            <img src="${imageData.url}" alt="上传的图片">
+            <img src="${(imageData.variants && imageData.variants.thumb) || imageData.url}" alt="上传的图片">
             <button class="remove-btn" onclick="event.stopPropagation()">×</button>
         `;
         
@@ -17,6 +17,7 @@ export class AdminContentPageBase {
         this.editingPostId = null;
         this.imageUploader = null;
         this.draftTimer = null; // 草稿自动保存定时器
+        this.draftRevision = 0; // 草稿版本号（增量保存的基础版本）
         this.isEditorDirty = false; // 编辑器是否有未保存的修改
 
         // 检查登录状态
@@ -145,8 +146,7 @@ export class AdminContentPageBase {
         
         try {
             // 从草稿加载内容
-            this.posts = await api.get(`/draft/${this.currentType}`, { auth: true });
-            this.posts = this.posts.posts || [];
+            await this.reloadDraft();
             this.render();
         } catch (error) {
             console.error('加载内容失败:', error);
@@ -163,6 +163,40 @@ export class AdminContentPageBase {
         }
     }
 
+    /**
+     * 重新加载草稿和版本号
+     */
+    async reloadDraft() {
+        const draft = await api.get(`/draft/${this.currentType}`, { auth: true });
+        this.posts = draft.posts || [];
+        this.draftRevision = draft.revision || 0;
+    }
+
+    /**
+     * 增量保存草稿（JSON Patch）
+     * change(posts) 返回 { operations, posts }：要提交的补丁和应用后的本地列表。
+     * 版本冲突（409）时重新加载草稿，基于最新内容重新生成补丁再提交一次
+     */
+    async patchDraft(change) {
+        for (let attempt = 0; ; attempt++) {
+            const { operations, posts } = change(this.posts);
+            try {
+                const result = await api.patch(`/draft/${this.currentType}`, {
+                    revision: this.draftRevision,
+                    operations
+                }, { auth: true });
+                this.posts = posts;
+                this.draftRevision = result.revision;
+                return;
+            } catch (error) {
+                if (error.status !== 409 || attempt > 0) {
+                    throw error;
+                }
+                await this.reloadDraft();
+            }
+        }
+    }
+
     /**
      * 渲染内容列表
      */
@@ -273,9 +307,6 @@ export class AdminContentPageBase {
      */
     async saveDraft() {
         try {
-            // 保存当前所有内容（包括正在编辑的）到草稿
-            const draftData = { posts: [...this.posts] };
-            
             // 获取当前编辑的内容
             const currentData = {
                 id: this.postId.value || this.generateId(),
@@ -289,17 +320,30 @@ export class AdminContentPageBase {
                 created_at: new Date().toISOString(),
                 updated_at: new Date().toISOString()
             };
+            // 新建的内容保存后即有 ID，之后的自动保存更新同一条
+            this.postId.value = currentData.id;
             
-            // 更新或添加到草稿中
-            const index = draftData.posts.findIndex(p => p.id === currentData.id);
-            if (index >= 0) {
-                draftData.posts[index] = currentData;
-            } else {
-                draftData.posts.unshift(currentData);
-            }
-            
-            // 保存草稿到服务器
-            await api.post(`/draft/${this.currentType}`, draftData, { auth: true });
+            // 只提交当前编辑的这一条（已有内容只提交变化的字段）
+            await this.patchDraft(posts => {
+                const index = posts.findIndex(p => p.id === currentData.id);
+                if (index < 0) {
+                    return {
+                        operations: [{ op: 'add', path: '/posts/0', value: currentData }],
+                        posts: [currentData, ...posts]
+                    };
+                }
+                
+                const operations = [{ op: 'test', path: `/posts/${index}/id`, value: currentData.id }];
+                for (const [key, value] of Object.entries(currentData)) {
+                    if (JSON.stringify(posts[index][key]) !== JSON.stringify(value)) {
+                        operations.push({ op: 'add', path: `/posts/${index}/${key}`, value });
+                    }
+                }
+                return {
+                    operations,
+                    posts: posts.map((p, i) => i === index ? { ...p, ...currentData } : p)
+                };
+            });
             console.log('✅ 草稿已自动保存');
         } catch (error) {
             console.error('保存草稿失败:', error);
@@ -413,12 +457,20 @@ export class AdminContentPageBase {
         }
 
         try {
-            // 从草稿数组中删除
-            this.posts = this.posts.filter(p => p.id !== postId);
-            
-            // 保存更新后的草稿
-            const draftData = { posts: this.posts };
-            await api.post(`/draft/${this.currentType}`, draftData, { auth: true });
+            // 从草稿中删除
+            await this.patchDraft(posts => {
+                const index = posts.findIndex(p => p.id === postId);
+                if (index < 0) {
+                    return { operations: [], posts };
+                }
+                return {
+                    operations: [
+                        { op: 'test', path: `/posts/${index}/id`, value: postId },
+                        { op: 'remove', path: `/posts/${index}` }
+                    ],
+                    posts: posts.filter(p => p.id !== postId)
+                };
+            });
             
             // 同步到正式内容（发布草稿）
             await api.post(`/draft/${this.currentType}/publish`, {}, { auth: true });
@@ -6,11 +6,18 @@ import { api } from '../utils/apiClient.js';
 import { ContentCard } from '../components/ContentCard.js';
 import { EmptyState } from '../components/EmptyState.js';
 
+// 每页加载的条数
+const PAGE_SIZE = 20;
+// 列表卡片用到的字段
+const LIST_FIELDS = 'id,title,content,images,created_at';
+
 export class ContentPageBase {
     constructor(config) {
         this.config = config;
         this.container = document.getElementById(config.containerId);
         this.posts = [];
+        this.nextCursor = null;
+        this.loadingMore = false;
         
         if (!this.container) {
             console.error(`Container #${config.containerId} not found`);
@@ -25,12 +32,14 @@ export class ContentPageBase {
     }
 
     /**
-     * 加载内容
+     * 加载内容（第一页）
      */
     async loadContent() {
         try {
             this.showLoading();
-            this.posts = await api.get(`/content/${this.config.type}`);
+            const page = await this.takePrefetched() || await this.fetchPage(null);
+            this.posts = page.data;
+            this.nextCursor = page.nextCursor;
             this.render();
         } catch (error) {
             console.error('加载内容失败:', error);
@@ -38,6 +47,50 @@ export class ContentPageBase {
         }
     }
 
+    /**
+     * 加载下一页并追加到列表
+     */
+    async loadMore() {
+        if (!this.nextCursor || this.loadingMore) return;
+        this.loadingMore = true;
+        try {
+            const page = await this.fetchPage(this.nextCursor);
+            this.posts = this.posts.concat(page.data);
+            this.nextCursor = page.nextCursor;
+            this.render();
+        } catch (error) {
+            console.error('加载更多内容失败:', error);
+        } finally {
+            this.loadingMore = false;
+        }
+    }
+
+    /**
+     * 在首页窗口中打开时，使用首页启动数据中的第一页（每个类型只使用一次，再次打开时重新请求）
+     */
+    async takePrefetched() {
+        try {
+            const bootstrap = window.parent !== window ? window.parent.bootstrapData : null;
+            if (!bootstrap) return null;
+            const content = (await bootstrap).content;
+            const prefetched = content && content[this.config.type];
+            if (!prefetched) return null;
+            delete content[this.config.type];
+            return { data: prefetched.posts, nextCursor: prefetched.next_cursor };
+        } catch (error) {
+            return null;
+        }
+    }
+
+    /**
+     * 请求一页内容
+     */
+    fetchPage(cursor) {
+        const params = new URLSearchParams({ limit: PAGE_SIZE, fields: LIST_FIELDS });
+        if (cursor) params.set('cursor', cursor);
+        return api.getPage(`/content/${this.config.type}?${params}`);
+    }
+
     /**
      * 渲染内容
      */
@@ -51,7 +104,28 @@ export class ContentPageBase {
             .map(post => this.renderPost(post))
             .join('');
         
-        this.container.innerHTML = this.wrapContent(html);
+        this.container.innerHTML = this.wrapContent(html + this.renderLoadMore());
+
+        const loadMoreBtn = this.container.querySelector('.load-more-btn');
+        if (loadMoreBtn) {
+            loadMoreBtn.addEventListener('click', () => {
+                loadMoreBtn.disabled = true;
+                loadMoreBtn.textContent = '加载中...';
+                this.loadMore();
+            });
+        }
+    }
+
+    /**
+     * 渲染"加载更多"按钮（还有下一页时）
+     */
+    renderLoadMore() {
+        if (!this.nextCursor) return '';
+        return `
+            <div style="text-align: center; margin: 20px 0;">
+                <button class="btn load-more-btn">加载更多</button>
+            </div>
+        `;
     }
 
     /**
@@ -9,7 +9,10 @@ class ChatApp {
         this.userColors = new Map(); // 存储用户颜色映射
         this.colorIndex = 1;
         this.maxColors = 6;
-        this.pollInterval = null; // 轮询定时器
+        this.pollInterval = null; // 轮询定时器（不支持 SSE 时的后备方案）
+        this.eventSource = null; // SSE 连接
+        this.lastId = 0; // 已接收的最新消息ID
+        this.seenIds = new Set(); // 已渲染的消息ID，避免重复显示
         
         this.initElements();
         this.bindEvents();
@@ -75,8 +78,8 @@ class ChatApp {
         this.showChatView();
         this.addSystemMessage(`${username} 加入了聊天室`);
         
-        // 开始轮询新消息（每3秒检查一次）
-        this.startPolling();
+        // 开始接收新消息（优先 SSE 推送，失败时回退到轮询）
+        this.startStream();
     }
 
     handleLogout() {
@@ -87,7 +90,8 @@ class ChatApp {
         this.currentUser = null;
         this.showLoginView();
         
-        // 停止轮询
+        // 停止接收新消息
+        this.stopStream();
         this.stopPolling();
     }
 
@@ -137,8 +141,9 @@ class ChatApp {
                 throw new Error('发送失败');
             }
 
-            // 立即显示消息
-            this.addMessage(message);
+            // 立即显示消息（使用服务器返回的带ID的消息）
+            const data = await response.json();
+            this.addMessage(data.message || message);
             this.messageInput.value = '';
             this.messageInput.focus();
         } catch (error) {
@@ -148,11 +153,29 @@ class ChatApp {
     }
 
     addMessage(message) {
+        if (!this.trackMessage(message)) {
+            return;
+        }
         this.messages.push(message);
         this.renderMessage(message);
         this.scrollToBottom();
     }
 
+    /**
+     * 记录消息ID，已显示过的消息返回 false
+     */
+    trackMessage(message) {
+        if (message.id === undefined) {
+            return true;
+        }
+        if (this.seenIds.has(message.id)) {
+            return false;
+        }
+        this.seenIds.add(message.id);
+        this.lastId = Math.max(this.lastId, message.id);
+        return true;
+    }
+
     addSystemMessage(text) {
         const messageEl = document.createElement('div');
         messageEl.className = 'message message-system';
@@ -209,14 +232,18 @@ class ChatApp {
             const response = await fetch('/api/chat/messages');
             const data = await response.json();
             
-            this.messages = data.messages || [];
+            this.messages = [];
+            this.seenIds.clear();
             
             // 清空容器
             this.messagesContainer.innerHTML = '';
             
             // 渲染所有消息
-            this.messages.forEach(msg => {
-                this.renderMessage(msg);
+            (data.messages || []).forEach(msg => {
+                if (this.trackMessage(msg)) {
+                    this.messages.push(msg);
+                    this.renderMessage(msg);
+                }
             });
             
             this.scrollToBottom();
@@ -225,8 +252,42 @@ class ChatApp {
         }
     }
 
+    startStream() {
+        if (!window.EventSource) {
+            this.startPolling();
+            return;
+        }
+
+        this.stopStream();
+        this.eventSource = new EventSource(`/api/chat/stream?after=${this.lastId}`);
+
+        this.eventSource.addEventListener('message', (e) => {
+            try {
+                this.addMessage(JSON.parse(e.data));
+            } catch (error) {
+                console.error('解析推送消息失败:', error);
+            }
+        });
+
+        this.eventSource.addEventListener('error', () => {
+            // 连接被彻底关闭（不会自动重连）时回退到轮询
+            if (this.eventSource && this.eventSource.readyState === EventSource.CLOSED) {
+                this.stopStream();
+                this.startPolling();
+            }
+        });
+    }
+
+    stopStream() {
+        if (this.eventSource) {
+            this.eventSource.close();
+            this.eventSource = null;
+        }
+    }
+
     startPolling() {
-        // 每3秒检查新消息
+        // 每3秒增量检查新消息
+        this.stopPolling();
         this.pollInterval = setInterval(() => {
             this.checkNewMessages();
         }, 3000);
@@ -241,21 +302,13 @@ class ChatApp {
 
     async checkNewMessages() {
         try {
-            const response = await fetch('/api/chat/messages');
+            // 只获取比已接收消息更新的部分
+            const response = await fetch(`/api/chat/messages?after=${this.lastId}`);
             const data = await response.json();
             
-            const serverMessages = data.messages || [];
-            
-            // 检查是否有新消息
-            if (serverMessages.length > this.messages.length) {
-                // 只渲染新消息
-                const newMessages = serverMessages.slice(this.messages.length);
-                newMessages.forEach(msg => {
-                    this.renderMessage(msg);
-                });
-                this.messages = serverMessages;
-                this.scrollToBottom();
-            }
+            (data.messages || []).forEach(msg => {
+                this.addMessage(msg);
+            });
         } catch (e) {
             console.error('检查新消息失败:', e);
         }
@@ -52,6 +52,32 @@ export class ApiClient {
         }
     }
 
+    /**
+     * 分页 GET 请求
+     * 返回 { data, nextCursor }，nextCursor 来自响应头 X-Next-Cursor（没有下一页时为 null）
+     */
+    async getPage(endpoint, options = {}) {
+        try {
+            const response = await fetch(`${this.baseUrl}${endpoint}`, {
+                method: 'GET',
+                headers: this.getHeaders(options.auth),
+                ...options
+            });
+
+            if (!response.ok) {
+                throw new Error(`HTTP ${response.status}`);
+            }
+
+            return {
+                data: await response.json(),
+                nextCursor: response.headers.get('X-Next-Cursor')
+            };
+        } catch (error) {
+            console.error('GET 请求失败:', error);
+            throw error;
+        }
+    }
+
     /**
      * POST 请求
      */
@@ -100,6 +126,36 @@ export class ApiClient {
         }
     }
 
+    /**
+     * PATCH 请求
+     * 失败时抛出的错误带有 status 和 detail（如 409 冲突时 detail.revision 为服务端当前版本）
+     */
+    async patch(endpoint, data, options = {}) {
+        try {
+            const response = await fetch(`${this.baseUrl}${endpoint}`, {
+                method: 'PATCH',
+                headers: this.getHeaders(options.auth),
+                body: JSON.stringify(data),
+                ...options
+            });
+
+            if (!response.ok) {
+                const error = await response.json();
+                const detail = error.detail;
+                const message = typeof detail === 'string' ? detail : (detail && detail.message);
+                throw Object.assign(new Error(message || `HTTP ${response.status}`), {
+                    status: response.status,
+                    detail
+                });
+            }
+
+            return await response.json();
+        } catch (error) {
+            console.error('PATCH 请求失败:', error);
+            throw error;
+        }
+    }
+
     /**
      * DELETE 请求
      */
@@ -47,6 +47,14 @@ export const HtmlHelpers = {
         return text;
     },
 
+    /**
+     * 生成响应式图片的 srcset（仅对上传的图片生效，服务器按 ?w= 返回对应宽度）
+     */
+    imageSrcset(url, widths = [320, 768, 1280]) {
+        if (!url || !url.startsWith('/media/images/')) return '';
+        return widths.map(w => `${url}?w=${w} ${w}w`).join(', ');
+    },
+
     /**
      * 截断文本
      */
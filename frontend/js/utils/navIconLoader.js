@@ -57,6 +57,8 @@ export async function initNavIcons() {
         const imgElement = link.querySelector('.nav-icon');
         
         if (!imgElement) continue;
+        // 构建时已改写为 <picture>（WebP + 原图回退）的图标不再检测
+        if (imgElement.closest('picture')) continue;
 
         // 获取可用的图标URL
         const iconUrl = await getAvailableIconUrl(windowType);